@@ -0,0 +1,27 @@
+import streamlit as st
+
+def stream_ai_response(client, prompt_text):
+    """
+    Stream an AI response into the page, showing the queue position while
+    the request waits for its turn.
+
+    When the AI service is busy, requests from every learner wait in the
+    shared LLM scheduler; instead of an open-ended spinner the learner sees
+    where they are in line until the response starts to arrive.
+
+    Parameters:
+    - client: TeacherClient used to send the prompt
+    - prompt_text: The prompt to send
+
+    Returns:
+    - The complete response text
+    """
+    status = st.empty()
+
+    def show_position(position):
+        status.info(f"⏳ Waiting for the AI service: you are number {position} in line...")
+
+    try:
+        return st.write_stream(client.stream_prompt(prompt_text, on_wait=show_position))
+    finally:
+        status.empty()
@@ -1,4 +1,5 @@
 import streamlit as st
+from components.top_navigator import SECTIONS
 
 def render_bottom_navigator(page_info):
     """
@@ -18,13 +19,8 @@ def render_bottom_navigator(page_info):
     lesson_num = page_info.get("lesson", "")
     current_section = page_info.get("section", "")
     
-    # Define sections and their icons (same as top_navigator)
-    sections = [
-        ("introduction", "🌟 Introduction"),
-        ("examples", "🔍 Examples"),
-        ("activities", "🎯 Activities"),
-        ("reflection", "💭 Reflection")
-    ]
+    # Same sections as the top navigator
+    sections = SECTIONS
     
     # Create columns for each section
     cols = st.columns(len(sections))
@@ -1,5 +1,5 @@
 import streamlit as st
-from utils.navigation import get_all_pages
+from utils.course_manifest import get_course_manifest
 
 def render_breadcrumb(current_page_info):
     """Render breadcrumb navigation for the current page."""
@@ -7,8 +7,7 @@ def render_breadcrumb(current_page_info):
     section = current_page_info["section"].title()
     
     # Get all pages from this lesson
-    all_pages = get_all_pages()
-    lesson_pages = [p for p in all_pages if p["lesson"] == lesson_num]
+    lesson_pages = get_course_manifest().lesson_pages(lesson_num)
     
     # Create breadcrumb HTML
     breadcrumb_html = f"""
@@ -1,5 +1,7 @@
 import streamlit as st
 import os
+import functools
+from utils.course_manifest import get_course_manifest
 
 def render_breadcrumb(current_page):
     """
@@ -25,53 +27,59 @@ def render_breadcrumb(current_page):
         # On course_introduction.py, render directly (without any 'with' context)
         breadcrumb_column = None
     
-    # Extract page info from filename
+    # Look up the page in the course manifest instead of splitting its filename
+    entry = get_course_manifest().get(current_page)
+    lesson_num = entry["lesson"] if entry else ""
+    section_name = entry["section"].capitalize() if entry else ""
+    
+    breadcrumb_content = build_breadcrumb_html(current_page, lesson_num, section_name)
+    
+    # Render the breadcrumb in the appropriate column or directly
+    if breadcrumb_column is not None:
+        # For pages with logo, render in the breadcrumb column
+        with breadcrumb_column:
+            st.markdown(breadcrumb_content, unsafe_allow_html=True)
+    else:
+        # For course_introduction.py, render directly
+        st.markdown(breadcrumb_content, unsafe_allow_html=True)
+
+@functools.lru_cache(maxsize=256)
+def build_breadcrumb_html(current_page, lesson_num, section_name):
+    """
+    Build the breadcrumb HTML for a page.
+    
+    The HTML only depends on the arguments, so it is cached per page and
+    shared by every session instead of being rebuilt on each rerun.
+    
+    Parameters:
+    - current_page: Currently active page filename
+    - lesson_num: Lesson of the page from the course manifest ("" if unknown)
+    - section_name: Capitalized section of the page ("" if unknown)
+    """
     if current_page == "app":
         # Special case for app.py (root)
         parts = [("Home", "app")]
     elif current_page == "course_introduction":
         # Special case for course introduction
         parts = [("Home", "app"), ("Course Introduction", "course_introduction")]
-    elif current_page.startswith("course_"):
+    elif lesson_num == "intro":
         # Other course pages
-        section = current_page.replace("course_", "")
-        section_name = section.capitalize()
         parts = [
             ("Home", "app"),
             ("Course Introduction", "course_introduction"),
             (section_name, current_page)
         ]
+    elif lesson_num and section_name:
+        # Lesson pages
+        parts = [
+            ("Home", "app"),
+            ("Course", "course_introduction"),
+            (f"Lesson {lesson_num}", f"lesson_{lesson_num}_introduction"),
+            (section_name, current_page)
+        ]
     else:
-        # Handle lesson pages (format: lesson_X_section.py)
-        page_parts = current_page.split("_")
-        
-        if len(page_parts) >= 3 and page_parts[0] == "lesson":
-            # Get lesson number and section
-            lesson_num = page_parts[1]
-            section = page_parts[2]
-            
-            # Format the section name
-            if section == "introduction":
-                section_name = "Introduction"
-            elif section == "examples":
-                section_name = "Examples"
-            elif section == "activities":
-                section_name = "Activities"
-            elif section == "reflection":
-                section_name = "Reflection"
-            else:
-                section_name = section.capitalize()
-            
-            # Create breadcrumb parts
-            parts = [
-                ("Home", "app"),
-                ("Course", "course_introduction"),
-                (f"Lesson {lesson_num}", f"lesson_{lesson_num}_introduction"),
-                (section_name, current_page)
-            ]
-        else:
-            # For any other page pattern
-            parts = [("Home", "app"), (current_page, current_page)]
+        # For any other page pattern
+        parts = [("Home", "app"), (current_page, current_page)]
     
     # Create HTML for the breadcrumb with larger font and more prominent appearance
     breadcrumb_html = ['<div style="font-size: 1.2rem; margin-bottom: 1.5rem; font-weight: 500; display: flex; align-items: center;">']
@@ -122,13 +130,4 @@ def render_breadcrumb(current_page):
     </script>
     ''')
     
-    # Render the breadcrumb in the appropriate column or directly
-    breadcrumb_content = ''.join(breadcrumb_html)
-    
-    if breadcrumb_column is not None:
-        # For pages with logo, render in the breadcrumb column
-        with breadcrumb_column:
-            st.markdown(breadcrumb_content, unsafe_allow_html=True)
-    else:
-        # For course_introduction.py, render directly
-        st.markdown(breadcrumb_content, unsafe_allow_html=True) 
\ No newline at end of file
+    return ''.join(breadcrumb_html)
@@ -0,0 +1,177 @@
+import os
+import streamlit as st
+import streamlit.components.v1 as components_v1
+from utils.delta_sync import CLIENT, encoded_size
+from utils.state_management import get_sync_ledger
+
+# Browser database used to keep a copy of the learner's progress
+DB_NAME = "PromptEngineeringCourse"
+# Version 2 creates every store; version 1 databases could be missing some
+DB_VERSION = 2
+STORE_NAMES = ("progress", "reflections", "completions")
+# Times a failed write is sent again before it is dropped
+MAX_PUT_ATTEMPTS = 3
+
+# Session state keys used by the bridge
+BRIDGE_KEY = "browser_storage_bridge"
+STATE_KEY = "browser_storage"
+
+_bridge = components_v1.declare_component(
+    "browser_storage",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "browser_storage")
+)
+
+def _get_bridge_state():
+    """Return the bridge bookkeeping for this session, with the browser's latest reply applied."""
+    if STATE_KEY not in st.session_state:
+        st.session_state[STATE_KEY] = {
+            "next_id": 1,
+            "pending": [],
+            "in_flight": None,
+            "values": {},
+            "last_error": None
+        }
+    state = st.session_state[STATE_KEY]
+
+    # The reply to the batch in flight is already in session state at the start of the run
+    reply = st.session_state.get(BRIDGE_KEY)
+    if state["in_flight"] and reply and reply.get("id") == state["in_flight"]["id"]:
+        _apply_reply(state, reply)
+    return state
+
+def _value_key(store, key):
+    """Key for a stored value in the bridge's value cache."""
+    return f"{store}/{key}"
+
+def queue_put(store, key, value, sync_key=None):
+    """
+    Queue a value to be written to IndexedDB.
+
+    A value queued again before it was sent replaces the queued one.
+
+    Parameters:
+    - store: Object store name (progress, reflections or completions)
+    - key: Key to store the value under
+    - value: JSON-serializable value
+    - sync_key: Sync ledger key to confirm for the browser copy once the
+      browser reports the write succeeded (value must then be an envelope)
+    """
+    state = _get_bridge_state()
+    state["pending"] = [
+        queued for queued in state["pending"]
+        if not (queued["op"] == "put" and queued["store"] == store and queued["key"] == key)
+    ]
+    state["pending"].append({"op": "put", "store": store, "key": key, "value": value, "sync_key": sync_key})
+    state["values"][_value_key(store, key)] = value
+    state["values"].pop(_value_key(store, "*"), None)
+    state["values"].pop("__dump__", None)
+
+def queue_get(store, key):
+    """
+    Queue a read from IndexedDB. The value is available through
+    get_stored_value once the browser has answered.
+    """
+    state = _get_bridge_state()
+    state["pending"].append({"op": "get", "store": store, "key": key})
+
+def queue_clear():
+    """Queue clearing every object store."""
+    state = _get_bridge_state()
+    state["pending"].append({"op": "clear"})
+    state["values"].clear()
+
+def queue_entries(store):
+    """
+    Queue reading every key and value of one object store. The result is
+    available through get_stored_entries once the browser has answered.
+    """
+    state = _get_bridge_state()
+    state["pending"].append({"op": "entries", "store": store})
+
+def queue_dump():
+    """Queue reading the contents of every object store."""
+    state = _get_bridge_state()
+    state["pending"].append({"op": "dump"})
+
+def is_value_known(store, key):
+    """Return True if the value for a key has been read or written in this session."""
+    return _value_key(store, key) in _get_bridge_state()["values"]
+
+def is_request_pending(op, store=None, key=None):
+    """Return True if a matching operation is queued or waiting for the browser."""
+    state = _get_bridge_state()
+    in_flight = state["in_flight"]["ops"] if state["in_flight"] else []
+    for queued in state["pending"] + in_flight:
+        if queued["op"] == op and queued.get("store") == store and queued.get("key") == key:
+            return True
+    return False
+
+def get_stored_value(store, key, default=None):
+    """Return the last known IndexedDB value for a key, or the default."""
+    return _get_bridge_state()["values"].get(_value_key(store, key), default)
+
+def get_stored_entries(store):
+    """Return the keys and values of an object store from the last read, or None."""
+    return _get_bridge_state()["values"].get(_value_key(store, "*"))
+
+def get_stored_contents():
+    """Return the contents of every object store from the last dump, or None."""
+    return _get_bridge_state()["values"].get("__dump__")
+
+def _apply_reply(state, reply):
+    """Record the results of the batch the browser has finished."""
+    batch = state["in_flight"]
+    state["in_flight"] = None
+
+    if reply.get("error"):
+        state["last_error"] = reply["error"]
+        # The transaction was rolled back: send the writes again with the next
+        # batch, unless a newer value for the same key is already queued
+        queued = {(op["store"], op["key"]) for op in state["pending"] if op["op"] == "put"}
+        retries = []
+        for op in batch["ops"]:
+            if op["op"] != "put" or (op["store"], op["key"]) in queued:
+                continue
+            attempts = op.get("attempts", 1)
+            if attempts < MAX_PUT_ATTEMPTS:
+                retries.append(dict(op, attempts=attempts + 1))
+        state["pending"] = retries + state["pending"]
+        return
+
+    ledger = get_sync_ledger()
+    for op, result in zip(batch["ops"], reply.get("results", [])):
+        if op["op"] == "put" and op.get("sync_key"):
+            # Only now does the browser copy hold this version
+            ledger.confirm(CLIENT, op["sync_key"], op["value"], size=encoded_size(op["value"]))
+        elif op["op"] == "get":
+            state["values"][_value_key(op["store"], op["key"])] = result
+        elif op["op"] == "entries":
+            state["values"][_value_key(op["store"], "*")] = result
+        elif op["op"] == "dump":
+            state["values"]["__dump__"] = result
+
+def render_browser_storage():
+    """
+    Mount the browser storage bridge for this run.
+
+    The bridge is one zero-height custom component with a persistent
+    IndexedDB connection. Operations queued since the last run are sent as a
+    single batch and run in one transaction; the browser's answer arrives as
+    the component value on the next run.
+    """
+    state = _get_bridge_state()
+
+    # Send everything queued so far as one batch
+    if state["in_flight"] is None and state["pending"]:
+        state["in_flight"] = {"id": state["next_id"], "ops": state["pending"]}
+        state["next_id"] += 1
+        state["pending"] = []
+
+    _bridge(
+        db_name=DB_NAME,
+        db_version=DB_VERSION,
+        stores=list(STORE_NAMES),
+        batch=state["in_flight"],
+        key=BRIDGE_KEY,
+        default=None
+    )
@@ -1,12 +1,15 @@
 import streamlit as st
 import os
-import re
-from utils.state_management import get_progress_percentage
+from utils.state_management import get_progress_percentage, is_lesson_completed
+from utils.lesson_index import get_lesson_index
 
 def render_course_navigation(all_pages, current_page, current_dir):
     """
     Render the course navigation in the right column.
     
+    The column is rebuilt on every rerun, so the lesson list it is built
+    from is cached across sessions to keep that cheap.
+    
     Parameters:
     - all_pages: List of available page filenames
     - current_page: Currently active page
@@ -38,7 +41,7 @@ def render_course_as_lesson(current_page):
     is_course_current = current_page == "app" or current_page.startswith("course_")
     
     # Check if course is completed (simple check if course_reflection is completed)
-    is_completed = "course_reflection" in st.session_state.get("completed_pages", set())
+    is_completed = is_lesson_completed("intro")
     
     # Choose icon based on status
     if is_completed:
@@ -89,44 +92,8 @@ def extract_lesson_info(all_pages, current_dir):
     Returns a dictionary where keys are lesson numbers and values are 
     dictionaries with 'title' and 'page' keys.
     """
-    lessons = {}
-    
-    # First pass: collect all lesson numbers from page filenames
-    for page in all_pages:
-        if page.startswith("lesson_"):
-            parts = page.split("_")
-            if len(parts) >= 3:
-                lesson_num = parts[1]
-                section = parts[2]
-                
-                # Initialize lesson entry if it doesn't exist
-                if lesson_num not in lessons:
-                    lessons[lesson_num] = {
-                        "title": f"Lesson {lesson_num}",
-                        "page": f"lesson_{lesson_num}_introduction",
-                        "sections": []
-                    }
-                
-                # Track available sections
-                if section not in lessons[lesson_num]["sections"]:
-                    lessons[lesson_num]["sections"].append(section)
-    
-    # Second pass: try to get descriptive titles from markdown files
-    for lesson_num in lessons:
-        # Get a more descriptive title from the Lessons directory if available
-        lesson_md_path = os.path.join(current_dir, "Lessons", f"Lesson {lesson_num}.md")
-        if os.path.exists(lesson_md_path):
-            try:
-                with open(lesson_md_path, 'r') as f:
-                    content = f.read()
-                    # Extract lesson title from the first line that looks like "**Lesson X: Title**"
-                    title_match = re.search(r'\*\*Lesson\s+\d+\s*:\s*([^\*]+)\*\*', content)
-                    if title_match:
-                        lessons[lesson_num]["title"] = f"Lesson {lesson_num}: {title_match.group(1).strip()}"
-            except Exception:
-                pass  # If can't read file, just use the default title
-    
-    return lessons
+    # Titles are cached across sessions and only re-read when a file changes
+    return get_lesson_index().lessons(all_pages, current_dir)
 
 def render_lesson_buttons(lessons_dict, current_page):
     """Render buttons for each lesson."""
@@ -143,10 +110,7 @@ def render_lesson_buttons(lessons_dict, current_page):
         is_lesson_current = current_page.startswith(f"lesson_{lesson_num}_")
         
         # Check if lesson is completed
-        is_completed = False
-        reflection_page = f"lesson_{lesson_num}_reflection"
-        if reflection_page in st.session_state.get("completed_pages", set()):
-            is_completed = True
+        is_completed = is_lesson_completed(lesson_num)
         
         # Choose icon based on status
         if is_completed:
@@ -1,7 +1,9 @@
 import streamlit as st
-import time
+from utils.course_manifest import get_course_manifest
+from utils.state_management import get_progress_state, save_visit_state
+from utils.progress_state import FIRST_VISIT_DELAY
 
-def show_first_visit_dialog(page_id, section, title, message):
+def show_first_visit_dialog(page_id, section, title=None, message=None):
     """
     Shows an informational popover the first time a user visits a page.
     Uses a simplified approach that works reliably after the page loads.
@@ -9,41 +11,42 @@ def show_first_visit_dialog(page_id, section, title, message):
     Parameters:
     - page_id: Unique identifier for the page
     - section: The current section (introduction, examples, etc.)
-    - title: Title of the dialog
-    - message: Message to display in the dialog
+    - title: Title of the dialog (defaults to the text in the course manifest)
+    - message: Message to display in the dialog (defaults to the course manifest)
     
     Returns:
     - True if dialog was shown, False if it was previously shown
     """
-    # Create session state keys for this specific page
-    dialog_key = f"first_visit_{page_id}"
-    delay_key = f"delay_complete_{page_id}"
+    # Fall back to the dialog text compiled into the course manifest
+    if title is None or message is None:
+        entry = get_course_manifest().get(page_id) or {}
+        dialog = entry.get("dialog") or {}
+        title = title if title is not None else dialog.get("title", "")
+        message = message if message is not None else dialog.get("message", "")
     
-    # Initialize keys if needed
-    if dialog_key not in st.session_state:
-        st.session_state[dialog_key] = True
+    # Visit and dismissal flags live in the session's progress bitsets
+    state = get_progress_state()
+    if state.record_visit(page_id):
+        save_visit_state()
     
-    if delay_key not in st.session_state:
-        st.session_state[delay_key] = False
-        st.session_state[f"{delay_key}_time"] = time.time()
-    
-    # Check if enough time has passed (2 seconds)
-    if not st.session_state[delay_key] and time.time() - st.session_state.get(f"{delay_key}_time", 0) > 2:
-        st.session_state[delay_key] = True
+    # Check if enough time has passed since the first visit (2 seconds)
+    elapsed = state.seconds_since_first_visit(page_id)
+    delay_complete = elapsed is None or elapsed > FIRST_VISIT_DELAY
     
     # Create a container for the popover that only shows after delay
     popover_container = st.empty()
     
     # Check if we should show the popover
-    if st.session_state[dialog_key] and st.session_state[delay_key]:
+    if not state.is_dismissed(page_id) and delay_complete:
         with popover_container:
             # Use standard parameters only
             with st.popover(f"📣 {title}"):
                 st.markdown(message)
                 
                 # Add a button to dismiss the dialog and prevent it from showing again
-                if st.button("Got it!", key=f"dismiss_{dialog_key}"):
-                    st.session_state[dialog_key] = False
+                if st.button("Got it!", key=f"dismiss_first_visit_{page_id}"):
+                    state.dismiss(page_id)
+                    save_visit_state()
                     # Force a rerun to remove the dialog completely
                     st.rerun()
         return True
@@ -1,6 +1,7 @@
 import streamlit as st
 import os
 from utils.navigation import get_next_page, get_prev_page
+from utils.course_manifest import get_course_manifest
 
 def render_lesson_navigator(page_info):
     """
@@ -159,15 +160,4 @@ def render_lesson_navigator(page_info):
 
 def get_all_pages():
     """Helper function to get all pages for progress tracking"""
-    import glob
-    import os
-    
-    pages = []
-    pattern = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'pages', '*.py')
-    for file in glob.glob(pattern):
-        # Extract the filename without extension
-        filename = os.path.basename(file)[:-3]
-        # Skip __init__.py and other special files
-        if not filename.startswith('__'):
-            pages.append(filename)
-    return sorted(pages) 
\ No newline at end of file
+    return list(get_course_manifest().page_ids)
@@ -0,0 +1,179 @@
+import streamlit as st
+import os
+import sys
+import time
+from utils.navigation import scroll_to_top, get_all_pages
+from utils.state_management import initialize_session_state, restore_drafts, autosave_drafts, finish_run
+from utils.page_config import set_standard_page_config
+from utils.course_manifest import APP_DIR
+from utils.router import router_owns_shell
+from utils.session_memory import get_session_memory
+from utils.response_cache import get_response_cache
+from utils.single_flight import get_request_coalescer
+from utils.llm_scheduler import get_llm_scheduler
+from components.breadcrumb_navigator import render_breadcrumb
+from components.top_navigator import render_top_navigator
+from components.bottom_navigator import render_bottom_navigator
+from components.course_navigation import render_course_navigation
+from components.first_visit_dialog import show_first_visit_dialog
+from components.page_header import render_page_header
+from components.progress_manager import render_teacher_controls_sidebar, sync_browser_progress
+from components.browser_storage import render_browser_storage
+
+# Footer shown at the bottom of every course page
+FOOTER_MARKDOWN = """
+**Prompt Engineering for Educators** | &copy; 2025 | A comprehensive course for teaching staff  
+ ***Presenting an [AIxponential](http://aixponential.org) experience***
+"""
+
+def get_page_id(page_info):
+    """
+    Get the page ID (filename without extension) for a page's PAGE_INFO.
+
+    Parameters:
+    - page_info: Dictionary with lesson and section keys
+
+    Returns:
+    - Page ID such as "lesson_2_examples" or "course_introduction"
+    """
+    lesson = page_info["lesson"]
+    section = page_info["section"]
+    if lesson == "intro":
+        return f"course_{section}"
+    return f"lesson_{lesson}_{section}"
+
+def render_page(page_info, body, page_title=None, first_visit=None, show_header=False, debug_info=None):
+    """
+    Render a course page inside the shared page shell.
+
+    The shell owns everything every page repeats: page config, session state,
+    the first-visit dialog, teacher controls, breadcrumb, top and bottom
+    navigators, footer, the course navigation column and the debug section.
+
+    Parameters:
+    - page_info: The page's PAGE_INFO dictionary (title, lesson, section, order)
+    - body: Function that renders the main content of the page
+    - page_title: Title for the browser tab (defaults to the PAGE_INFO title)
+    - first_visit: Optional dictionary with title and message keys for the first-visit dialog
+    - show_header: Whether to render the course header above the breadcrumb
+    - debug_info: Optional dictionary of extra values to show in the debug section
+    """
+    started_at = time.perf_counter()
+    page_id = get_page_id(page_info)
+    # In router mode the entrypoint initializes the session and finishes the run
+    routed = router_owns_shell()
+
+    try:
+        # Configure page
+        set_standard_page_config(page_title or page_info["title"])
+
+        # Initialize session state and record the current page
+        if not routed:
+            initialize_session_state()
+        st.session_state.current_page = page_id
+
+        # Scroll to top when page loads
+        scroll_to_top()
+
+        # Show the first visit dialog if this is the first time visiting this page
+        if first_visit:
+            show_first_visit_dialog(page_id, page_info["section"], first_visit["title"], first_visit["message"])
+
+        # Render the improved teacher controls in the sidebar
+        render_teacher_controls_sidebar()
+
+        # Create main layout with content area on the left and navigation on the right
+        content_col, nav_col = st.columns([4, 1])
+
+        with content_col:
+            if show_header:
+                render_page_header()
+        
+            render_breadcrumb(page_id)
+            render_top_navigator(page_info["lesson"], page_info["section"])
+
+            # Fill the page's text areas with any saved drafts
+            restore_drafts(page_id)
+
+            body_started_at = time.perf_counter()
+            body()
+            body_seconds = time.perf_counter() - body_started_at
+
+            autosave_drafts(page_id)
+
+            render_bottom_navigator(page_info)
+
+            # Footer
+            st.markdown("---")
+            st.markdown(FOOTER_MARKDOWN)
+
+        # Render course navigation in the right column
+        with nav_col:
+            render_course_navigation(get_all_pages(), page_id, APP_DIR)
+
+        # Reconcile with the progress saved in the browser (once per session)
+        sync_browser_progress()
+
+        # Send IndexedDB operations queued during this run to the browser
+        render_browser_storage()
+
+        # Debug section at the bottom, only built when debug mode is on
+        if st.session_state.get("show_debug", False):
+            shell_seconds = time.perf_counter() - started_at - body_seconds
+            render_debug_info(page_id, shell_seconds, body_seconds, debug_info)
+    finally:
+        # Persist progress changes from this rerun in one batch, even when the
+        # page navigates away with st.switch_page
+        if not routed:
+            finish_run()
+
+def render_debug_info(page_id, shell_seconds, body_seconds, debug_info=None):
+    """
+    Render the debug section for a page.
+
+    Parameters:
+    - page_id: ID of the current page
+    - shell_seconds: Time spent in the page shell during this run
+    - body_seconds: Time spent rendering the page content during this run
+    - debug_info: Optional dictionary of extra values to show
+    """
+    with st.expander("Debug Information", expanded=True):
+        st.write("### Debug Info")
+        st.write(f"Current Page: {page_id}")
+        st.write(f"Current Directory: {APP_DIR}")
+        st.write(f"Pages Directory: {os.path.join(APP_DIR, 'pages')}")
+        st.write(f"sys.path: {sys.path}")
+        st.write(f"Shell Time: {shell_seconds * 1000:.1f} ms")
+        st.write(f"Content Time: {body_seconds * 1000:.1f} ms")
+
+        queue = st.session_state.get("progress_queue")
+        if queue is not None:
+            st.write(f"Progress Writes: {queue.metrics}")
+
+        ledger = st.session_state.get("sync_ledger")
+        if ledger is not None:
+            st.write(f"Bytes Synced (last run): {ledger.last_run_bytes}")
+            st.write(f"Bytes Synced (session): {ledger.total_bytes}, unchanged writes skipped: {ledger.skipped}")
+
+        responses = st.session_state.get("response_store")
+        if responses is not None:
+            st.write(f"Example Responses: {len(responses)} stored, {responses.size_bytes} bytes, {responses.metrics}")
+
+        cache = get_response_cache()
+        if cache is not None:
+            st.write(f"Response Cache: {cache.memory_size()} in memory ({cache.memory_bytes()} bytes), {cache.metrics}")
+        st.write(f"Coalesced Requests: {get_request_coalescer().metrics}")
+        st.write(f"LLM Scheduler: {get_llm_scheduler().stats()}")
+
+        slot = st.session_state.get("session_slot")
+        if slot is not None:
+            st.write(f"Parked Session Values: {slot.footprint} bytes")
+            st.write(f"Session Memory: {get_session_memory().stats()}, {get_session_memory().metrics}")
+
+        for label, value in (debug_info or {}).items():
+            st.write(f"{label}: {value}")
+
+        # Serializing the whole session state is expensive, so only do it on request
+        if st.checkbox("Show Session State", value=False, key=f"debug_session_state_{page_id}"):
+            st.write(f"All Pages: {get_all_pages()}")
+            st.write(f"Session State: {dict(st.session_state)}")
@@ -3,170 +3,64 @@ import json
 import datetime
 from typing import Dict, Any, Optional, Tuple, List, Set
 import os
+from utils.course_manifest import get_course_manifest
+from utils.router import router_owns_shell
+from utils.state_management import mark_page_completed, clear_saved_progress, save_progress, get_sync_ledger
+from utils.delta_sync import CLIENT, as_envelope, is_newer, make_envelope
+from components.browser_storage import (
+    queue_put, queue_get, queue_clear, queue_entries, queue_dump, is_value_known, is_request_pending,
+    get_stored_value, get_stored_entries, get_stored_contents
+)
 
 def save_progress_to_indexed_db(data_key: str, data: Dict[str, Any], display_message: bool = True, category: str = "progress") -> None:
     """
     Save progress data to IndexedDB.
     
+    The value is stored with its version and update time, and only if the
+    browser does not already have the same content. The write is queued on
+    the browser storage bridge and sent together with the other writes from
+    this run in a single transaction; the browser copy counts as synced once
+    the browser reports the transaction succeeded.
+    
     Parameters:
     - data_key: Key to store the data under
     - data: Data to store
     - display_message: Whether to display a success message
     - category: Category of data (progress, reflections, completions)
     """
-    # Create JavaScript to save to IndexedDB
-    js_code = f"""
-    async function saveToIndexedDB() {{
-        return new Promise((resolve, reject) => {{
-            const request = indexedDB.open("PromptEngineeringCourse", 1);
-            
-            request.onupgradeneeded = function(event) {{
-                const db = event.target.result;
-                if (!db.objectStoreNames.contains("{category}")) {{
-                    db.createObjectStore("{category}");
-                }}
-            }};
-            
-            request.onsuccess = function(event) {{
-                const db = event.target.result;
-                const transaction = db.transaction(["{category}"], "readwrite");
-                const store = transaction.objectStore("{category}");
-                
-                const dataToStore = {json.dumps(data)};
-                const saveRequest = store.put(dataToStore, "{data_key}");
-                
-                saveRequest.onsuccess = function() {{
-                    resolve("Data saved successfully");
-                }};
-                
-                saveRequest.onerror = function(e) {{
-                    reject("Error saving data: " + e.target.error);
-                }};
-                
-                transaction.oncomplete = function() {{
-                    db.close();
-                }};
-            }};
-            
-            request.onerror = function(event) {{
-                reject("Error opening database: " + event.target.error);
-            }};
-        }});
-    }}
-    
-    saveToIndexedDB()
-        .then(message => {{
-            console.log(message);
-        }})
-        .catch(error => {{
-            console.error(error);
-        }});
-    """
-    
-    # Execute the JavaScript
-    st.components.v1.html(
-        f"""
-        <script>
-        {js_code}
-        </script>
-        """,
-        height=0,
-        width=0
-    )
+    ledger = get_sync_ledger()
+    ledger_key = f"{category}/{data_key}"
+    envelope = ledger.stage(CLIENT, ledger_key, data)
+    if envelope is not None:
+        queue_put(category, data_key, envelope, sync_key=ledger_key)
     
     # Display success message if requested
     if display_message:
         st.success(f"Your progress has been saved. You can safely exit and return later.")
 
-def load_progress_from_indexed_db(data_keys: list, callback_function: str, category: str = "progress") -> None:
+def load_progress_from_indexed_db(data_keys: list, category: str = "progress") -> Dict[str, Any]:
     """
     Load progress data from IndexedDB.
     
+    Keys that have not been read yet are requested from the browser; their
+    values are returned once the browser has answered, on a later run.
+    
     Parameters:
     - data_keys: List of keys to load
-    - callback_function: Name of JavaScript function to call with loaded data
     - category: Category of data (progress, reflections, completions)
-    """
-    # Create JavaScript to load from IndexedDB
-    js_code = f"""
-    async function loadFromIndexedDB() {{
-        return new Promise((resolve, reject) => {{
-            const request = indexedDB.open("PromptEngineeringCourse", 1);
-            
-            request.onupgradeneeded = function(event) {{
-                const db = event.target.result;
-                if (!db.objectStoreNames.contains("{category}")) {{
-                    db.createObjectStore("{category}");
-                }}
-            }};
-            
-            request.onsuccess = function(event) {{
-                const db = event.target.result;
-                const transaction = db.transaction(["{category}"], "readonly");
-                const store = transaction.objectStore("{category}");
-                
-                const dataKeys = {json.dumps(data_keys)};
-                const results = {{}};
-                
-                let remainingKeys = dataKeys.length;
-                
-                dataKeys.forEach(key => {{
-                    const getRequest = store.get(key);
-                    
-                    getRequest.onsuccess = function(event) {{
-                        if (event.target.result) {{
-                            results[key] = event.target.result;
-                        }}
-                        
-                        remainingKeys--;
-                        if (remainingKeys === 0) {{
-                            resolve(results);
-                        }}
-                    }};
-                    
-                    getRequest.onerror = function(e) {{
-                        console.error("Error retrieving data for key " + key + ": " + e.target.error);
-                        remainingKeys--;
-                        if (remainingKeys === 0) {{
-                            resolve(results);
-                        }}
-                    }};
-                }});
-                
-                transaction.oncomplete = function() {{
-                    db.close();
-                }};
-            }};
-            
-            request.onerror = function(event) {{
-                reject("Error opening database: " + event.target.error);
-            }};
-        }});
-    }}
-    
-    loadFromIndexedDB()
-        .then(data => {{
-            if (typeof {callback_function} === 'function') {{
-                {callback_function}(data);
-            }} else {{
-                console.error("Callback function {callback_function} not found");
-            }}
-        }})
-        .catch(error => {{
-            console.error(error);
-        }});
-    """
     
-    # Execute the JavaScript
-    st.components.v1.html(
-        f"""
-        <script>
-        {js_code}
-        </script>
-        """,
-        height=0,
-        width=0
-    )
+    Returns:
+    - Dictionary of the keys whose values are known so far
+    """
+    results = {}
+    for key in data_keys:
+        if is_value_known(category, key):
+            value = get_stored_value(category, key)
+            if value is not None:
+                results[key] = as_envelope(value)["value"]
+        elif not is_request_pending("get", category, key):
+            queue_get(category, key)
+    return results
 
 def get_next_lesson_id(current_lesson: str) -> Optional[str]:
     """
@@ -178,21 +72,9 @@ def get_next_lesson_id(current_lesson: str) -> Optional[str]:
     Returns:
     - Next lesson ID, or None if there are no more lessons
     """
-    # For course introduction, the next lesson is 1
-    if current_lesson == "intro":
-        return "1"
-    
-    # For numeric lessons, increment
-    try:
-        lesson_num = int(current_lesson)
-        # Hardcoded maximum lesson number - update as needed
-        if lesson_num < 18:  # Assuming there are 18 lessons total
-            return str(lesson_num + 1)
-        else:
-            return None  # No more lessons
-    except ValueError:
-        # Not a numeric lesson ID
-        return None
+    # Lessons come from the course manifest in course order, starting with
+    # the course introduction ("intro"), so there is no hard-coded count
+    return get_course_manifest().next_lesson(current_lesson)
 
 def get_next_lesson_path(next_lesson_id: str) -> str:
     """
@@ -261,9 +143,10 @@ def save_reflection_and_navigate(current_lesson: str, reflection_data: dict) ->
     st.session_state.setdefault("reflections", {})
     st.session_state["reflections"][current_lesson] = reflection_data
     
-    # Save reflection to IndexedDB
+    # Save reflection to IndexedDB and the server
+    save_progress()
     save_progress_to_indexed_db(
-        f"reflection_{current_lesson}", 
+        current_lesson, 
         reflection_data, 
         display_message=False,
         category="reflections"
@@ -273,9 +156,7 @@ def save_reflection_and_navigate(current_lesson: str, reflection_data: dict) ->
     success, next_lesson = save_lesson_completion(current_lesson)
     
     # Mark the page as completed in session state
-    st.session_state.setdefault("completed_pages", set())
-    # Use add() for sets instead of append() which is for lists
-    st.session_state["completed_pages"].add(page_name)
+    mark_page_completed(page_name)
     
     # Save completed pages to IndexedDB
     save_completed_pages_to_indexeddb()
@@ -298,222 +179,119 @@ def save_reflection_and_navigate(current_lesson: str, reflection_data: dict) ->
 
 def save_completed_pages_to_indexeddb() -> None:
     """
-    Save the set of completed pages to IndexedDB for persistence.
+    Save completed pages to IndexedDB for persistence.
+    Each page is its own key, so only pages the browser does not have yet are sent.
     """
-    if "completed_pages" in st.session_state:
-        # Convert set to list for JSON serialization
-        completed_pages_list = list(st.session_state["completed_pages"])
-        
-        # Save to IndexedDB
-        save_progress_to_indexed_db(
-            "completed_pages",
-            {"pages": completed_pages_list},
-            display_message=False,
-            category="completions"
-        )
+    for page_id in st.session_state.get("completed_pages", ()):
+        save_progress_to_indexed_db(f"page:{page_id}", True, display_message=False, category="completions")
 
 def load_completed_pages_from_indexeddb() -> None:
     """
-    Load the set of completed pages from IndexedDB and store in session state.
+    Load the completed pages from IndexedDB and merge them into session state.
+    A page completed in either place stays completed.
     """
-    # JavaScript callback function to process loaded data
-    js_callback = """
-    function processCompletedPages(data) {
-        if (data && data.completed_pages && data.completed_pages.pages) {
-            const completedPages = data.completed_pages.pages;
-            window.parent.postMessage({
-                type: "streamlit:setComponentValue",
-                value: {"completed_pages": completedPages}
-            }, "*");
-        }
-    }
+    entries = get_stored_entries("completions")
+    if entries is None:
+        if not is_request_pending("entries", "completions"):
+            queue_entries("completions")
+        return
+    
+    ledger = get_sync_ledger()
+    for key, stored in entries.items():
+        if key.startswith("page:"):
+            ledger.confirm(CLIENT, f"completions/{key}", as_envelope(stored))
+            page_ids = [key[len("page:"):]]
+        elif key == "completed_pages":
+            # List saved before completed pages were stored one key per page
+            page_ids = as_envelope(stored)["value"].get("pages", [])
+        else:
+            continue
+        
+        for page_id in page_ids:
+            if page_id not in st.session_state.get("completed_pages", ()):
+                mark_page_completed(page_id)
+
+def sync_browser_progress() -> None:
     """
+    Reconcile the browser's copy of the learner's progress with the session.
     
-    # Execute JavaScript to load data
-    st.components.v1.html(
-        f"""
-        <script>
-        {js_callback}
-        </script>
-        """,
-        height=0,
-        width=0
-    )
-    
-    # Load from IndexedDB
-    load_progress_from_indexed_db(
-        ["completed_pages"],
-        "processCompletedPages",
-        category="completions"
-    )
+    Runs once per session, as soon as the browser has sent its stored
+    completions and reflections. Completed pages are merged, and each
+    reflection keeps whichever copy was updated last. Each copy is then
+    sent only the keys it is missing or holds an older version of.
+    """
+    if st.session_state.get("browser_progress_synced", False):
+        return
+    
+    load_completed_pages_from_indexeddb()
+    stored_reflections = get_stored_entries("reflections")
+    if stored_reflections is None:
+        if not is_request_pending("entries", "reflections"):
+            queue_entries("reflections")
+        return
+    if get_stored_entries("completions") is None:
+        return
+    st.session_state.browser_progress_synced = True
+    
+    # Pages completed on the server but not yet in this browser
+    save_completed_pages_to_indexeddb()
     
-    # Handle the loaded data from JavaScript via Streamlit callback
-    if "completed_pages" not in st.session_state:
-        st.session_state["completed_pages"] = set()
-    elif isinstance(st.session_state["completed_pages"], list):
-        # Convert from list (from JS) to set
-        st.session_state["completed_pages"] = set(st.session_state["completed_pages"])
+    ledger = get_sync_ledger()
+    reflections = st.session_state.setdefault("reflections", {})
+    browser_newer = False
+    for key, stored in stored_reflections.items():
+        # Keys saved before versioning were prefixed with "reflection_"
+        lesson = key[len("reflection_"):] if key.startswith("reflection_") else key
+        envelope = as_envelope(stored)
+        version, updated_at = ledger.current(f"reflections/{lesson}")
+        known = make_envelope(reflections.get(lesson), version, updated_at)
+        if key == lesson:
+            ledger.confirm(CLIENT, f"reflections/{lesson}", envelope)
+        if lesson not in reflections or is_newer(envelope, known):
+            reflections[lesson] = envelope["value"]
+            browser_newer = True
+    
+    # Send the browser the reflections it lacks, and the server the newer browser copies
+    for lesson, reflection_data in reflections.items():
+        save_progress_to_indexed_db(lesson, reflection_data, display_message=False, category="reflections")
+    if browser_newer:
+        save_progress()
 
 def clear_indexed_db() -> None:
     """
     Clear all data from IndexedDB for the course.
     """
-    # JavaScript to clear IndexedDB
-    js_code = """
-    async function clearIndexedDB() {
-        return new Promise((resolve, reject) => {
-            const request = indexedDB.deleteDatabase("PromptEngineeringCourse");
-            
-            request.onsuccess = function() {
-                resolve("Database deleted successfully");
-            };
-            
-            request.onerror = function(event) {
-                reject("Error deleting database: " + event.target.error);
-            };
-            
-            request.onblocked = function() {
-                // This event is triggered if the database is still open elsewhere
-                console.warn("Database deletion blocked");
-                resolve("Database deletion blocked, will be deleted when all connections are closed");
-            };
-        });
-    }
-    
-    clearIndexedDB()
-        .then(message => {
-            console.log(message);
-            // Reload the page to reinitialize everything
-            setTimeout(() => window.location.reload(), 500);
-        })
-        .catch(error => {
-            console.error(error);
-        });
-    """
-    
-    # Execute the JavaScript
-    st.components.v1.html(
-        f"""
-        <script>
-        {js_code}
-        </script>
-        """,
-        height=0,
-        width=0
-    )
+    # Clear every object store in one transaction on the bridge's open connection
+    queue_clear()
+    st.session_state["browser_progress_synced"] = True
     
     # Clear session state as well
     if "completed_pages" in st.session_state:
         st.session_state["completed_pages"] = set()
+    # Drops the completion, first-visit and dismissed bitsets and the saved copy
+    st.session_state.pop("progress_state", None)
+    clear_saved_progress()
     if "completed_lessons" in st.session_state:
         st.session_state["completed_lessons"] = {}
     if "reflections" in st.session_state:
         st.session_state["reflections"] = {}
     
     # Show success message
-    st.success("Course progress data has been cleared. The page will reload shortly.")
+    st.success("Course progress data has been cleared.")
 
 def get_indexed_db_contents() -> None:
     """
-    Retrieve and display the contents of IndexedDB for debugging.
-    This function retrieves all data from all stores in IndexedDB
-    and sets it in session state for display.
-    """
-    # JavaScript to get all contents from IndexedDB
-    js_code = """
-    async function getAllIndexedDBContents() {
-        return new Promise((resolve, reject) => {
-            const request = indexedDB.open("PromptEngineeringCourse", 1);
-            
-            request.onupgradeneeded = function(event) {
-                const db = event.target.result;
-                // Create stores if they don't exist
-                if (!db.objectStoreNames.contains("progress")) {
-                    db.createObjectStore("progress");
-                }
-                if (!db.objectStoreNames.contains("reflections")) {
-                    db.createObjectStore("reflections");
-                }
-                if (!db.objectStoreNames.contains("completions")) {
-                    db.createObjectStore("completions");
-                }
-            };
-            
-            request.onsuccess = function(event) {
-                const db = event.target.result;
-                const storeNames = Array.from(db.objectStoreNames);
-                const allData = {};
-                let pendingStores = storeNames.length;
-                
-                if (pendingStores === 0) {
-                    resolve({});
-                    return;
-                }
-                
-                storeNames.forEach(storeName => {
-                    const storeData = {};
-                    const transaction = db.transaction([storeName], "readonly");
-                    const store = transaction.objectStore(storeName);
-                    const request = store.openCursor();
-                    
-                    request.onsuccess = function(event) {
-                        const cursor = event.target.result;
-                        if (cursor) {
-                            storeData[cursor.key] = cursor.value;
-                            cursor.continue();
-                        } else {
-                            allData[storeName] = storeData;
-                            pendingStores--;
-                            if (pendingStores === 0) {
-                                resolve(allData);
-                                db.close();
-                            }
-                        }
-                    };
-                    
-                    request.onerror = function(event) {
-                        console.error("Error reading store " + storeName + ": " + event.target.error);
-                        pendingStores--;
-                        if (pendingStores === 0) {
-                            resolve(allData);
-                            db.close();
-                        }
-                    };
-                });
-            };
-            
-            request.onerror = function(event) {
-                reject("Error opening database: " + event.target.error);
-            };
-        });
-    }
-    
-    getAllIndexedDBContents()
-        .then(data => {
-            window.parent.postMessage({
-                type: "streamlit:setComponentValue",
-                value: {"indexed_db_contents": JSON.stringify(data, null, 2)}
-            }, "*");
-        })
-        .catch(error => {
-            console.error(error);
-            window.parent.postMessage({
-                type: "streamlit:setComponentValue",
-                value: {"indexed_db_contents": JSON.stringify({error: error}, null, 2)}
-            }, "*");
-        });
+    Retrieve the contents of IndexedDB for debugging.
+    This requests all data from all stores in IndexedDB once, and again
+    after the data changes, and sets it in session state for display.
     """
-    
-    # Execute the JavaScript
-    st.components.v1.html(
-        f"""
-        <script>
-        {js_code}
-        </script>
-        """,
-        height=0,
-        width=0
-    )
+    contents = get_stored_contents()
+    if contents is None:
+        if not is_request_pending("dump"):
+            queue_dump()
+        st.session_state.pop("indexed_db_contents", None)
+    else:
+        st.session_state["indexed_db_contents"] = json.dumps(contents, indent=2)
 
 def render_teacher_controls_sidebar() -> None:
     """
@@ -522,6 +300,19 @@ def render_teacher_controls_sidebar() -> None:
     - Toggle for debug info
     - Button to clear IndexedDB
     - Toggle for IndexedDB contents
+    
+    In router mode the entrypoint has already rendered the controls for this
+    run, so pages calling this function do nothing.
+    """
+    if router_owns_shell():
+        return
+    
+    render_shared_teacher_controls()
+
+def render_shared_teacher_controls() -> None:
+    """
+    Render the teacher controls unconditionally.
+    Used by the router to build the shared shell once per run.
     """
     st.sidebar.title("Teacher Controls")
     st.sidebar.markdown("---")
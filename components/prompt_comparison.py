@@ -0,0 +1,47 @@
+import streamlit as st
+from utils.state_management import save_example_response, get_example_response
+
+def render_prompt_comparison(client, page_id, variants, key, button_label="▶️ Run all variants side by side"):
+    """
+    Render a control that runs several prompt variants at once and shows
+    the responses side by side.
+
+    All variants are sent together, so the comparison takes as long as the
+    slowest one; each column fills in as soon as its response arrives. The
+    responses are saved like those of the individual example buttons.
+
+    Parameters:
+    - client: TeacherClient used to send the prompts
+    - page_id: ID of the page showing the examples
+    - variants: List of dictionaries with example, variant, label and prompt keys
+    - key: Unique key for the button
+    - button_label: Label of the button
+    """
+    run = st.button(button_label, key=key)
+
+    columns = st.columns(len(variants))
+    placeholders = {}
+    for column, item in zip(columns, variants):
+        with column:
+            st.markdown(f"**{item['label']}**")
+            st.caption(item["prompt"])
+            placeholders[(item["example"], item["variant"])] = st.empty()
+
+    if run:
+        for placeholder in placeholders.values():
+            placeholder.info("Getting response from AI...")
+
+        prompts = {(item["example"], item["variant"]): item["prompt"] for item in variants}
+        for (example_id, variant), response in client.compare_prompts(prompts):
+            placeholder = placeholders[(example_id, variant)]
+            if "error" in response:
+                placeholder.error(f"Error: {response['error']}")
+                continue
+            save_example_response(page_id, example_id, variant, response["response"])
+            placeholder.markdown(response["response"])
+    else:
+        # Show responses from earlier runs
+        for (example_id, variant), placeholder in placeholders.items():
+            saved = get_example_response(page_id, example_id, variant)
+            if saved:
+                placeholder.markdown(saved)
@@ -1,5 +1,5 @@
 import streamlit as st
-from utils.state_management import initialize_session_state, get_progress_percentage
+from utils.state_management import initialize_session_state, get_progress_percentage, get_lesson_completion
 import os
 import traceback
 
@@ -73,7 +73,7 @@ def render_sidebar(all_pages, current_page):
         lesson = lessons[lesson_key]
         
         is_current = lesson_key == current_lesson
-        is_completed = False  # Could be improved to check if all pages in lesson are completed
+        is_completed = get_lesson_completion(lesson_key) >= 1.0
         
         # Add icon based on status
         if is_completed:
@@ -1,5 +1,13 @@
 import streamlit as st
 
+# Sections and their labels, shared with the bottom navigator
+SECTIONS = [
+    ("introduction", "🌟 Introduction"),
+    ("examples", "🔍 Examples"),
+    ("activities", "🎯 Activities"),
+    ("reflection", "💭 Reflection")
+]
+
 def render_top_navigator(lesson_num, current_section):
     """
     Render a horizontal navigation bar at the top of the page for section navigation.
@@ -8,13 +16,7 @@ def render_top_navigator(lesson_num, current_section):
     - lesson_num: Lesson number (as string)
     - current_section: Current section (introduction, examples, activities, reflection)
     """
-    # Define sections and their icons
-    sections = [
-        ("introduction", "🌟 Introduction"),
-        ("examples", "🔍 Examples"),
-        ("activities", "🎯 Activities"),
-        ("reflection", "💭 Reflection")
-    ]
+    sections = SECTIONS
     
     # Create columns for each section
     cols = st.columns(len(sections))
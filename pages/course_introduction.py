@@ -1,22 +1,6 @@
 import streamlit as st
-import os
-import sys
-from utils.navigation import scroll_to_top
-from utils.state_management import initialize_session_state, mark_page_completed
-from utils.page_config import set_standard_page_config
-from components.breadcrumb_navigator import render_breadcrumb
-from components.bottom_navigator import render_bottom_navigator
-from components.course_navigation import render_course_navigation
-from components.top_navigator import render_top_navigator
-from components.page_header import render_page_header
-
-# Configure page
-set_standard_page_config("Prompt Engineering Course Introduction")
-
-# Get the current directory and add to path if needed
-current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if current_dir not in sys.path:
-    sys.path.insert(0, current_dir)
+from utils.state_management import mark_page_completed
+from components.page_shell import render_page
 
 # Page metadata
 PAGE_INFO = {
@@ -26,56 +10,11 @@ PAGE_INFO = {
     "order": 0
 }
 
-# Initialize session state variables
-initialize_session_state()
-
-# Set current page in session state
+# Page identifier used by the content below
 current_page = "course_introduction"
-st.session_state.current_page = current_page
-
-# Get all available pages for navigation
-try:
-    from utils.navigation import get_all_pages
-    all_pages = get_all_pages()
-except Exception as e:
-    st.error(f"Error loading pages: {str(e)}")
-    all_pages = []
-
-# Scroll to top when page loads
-scroll_to_top()
-
-# Render teacher controls in the sidebar
-st.sidebar.title("Teacher Controls")
-st.sidebar.markdown("---")
-
-# Teacher/Student toggle
-st.sidebar.checkbox(
-    "Show Teacher Content",
-    value=st.session_state.show_teacher_content,
-    key="toggle_teacher_content"
-)
-
-# Debug toggle in sidebar - Note the unique key
-st.sidebar.checkbox(
-    "Show Debug Info",
-    value=st.session_state.get("show_debug", False),
-    key="toggle_debug_intro"
-)
-
-# Create main layout with content on the left and navigation on the right
-content_col, nav_col = st.columns([4, 1])
 
-# Render the main content area
-with content_col:
-    # Render the standard header
-    render_page_header()
-    
-    # Render breadcrumb navigation at the top
-    render_breadcrumb(current_page)
-    
-    # Render navigation links for Course Intro and its sections
-    render_top_navigator("intro", "introduction")
-    
+def render_body():
+    """Render the main content of the page."""
     # Course content starts immediately
     st.markdown("""
     This course will teach you how to effectively use Large Language Models (LLMs) in your 
@@ -174,40 +113,7 @@ with content_col:
     </div>
     """, unsafe_allow_html=True)
     
-    # Add bottom navigator - mirrors the top navigator
-    render_bottom_navigator(PAGE_INFO)
-    
     # Mark this page as viewed
     mark_page_completed(current_page)
-    
-    # Footer
-    st.markdown("---")
-    st.markdown("""
-    **Prompt Engineering for Educators** | &copy; 2025 | A comprehensive course for teaching staff  
-     ***Presenting an [AIxponential](http://aixponential.org) experience***            
-    """)
 
-# Render course navigation in the right column
-with nav_col:
-    render_course_navigation(all_pages, current_page, current_dir)
-
-# Debug section at the bottom
-if st.session_state.get("show_debug", False):
-    with st.expander("Debug Information", expanded=True):
-        st.write("### Debug Info")
-        st.write(f"Current Page: {current_page}")
-        st.write(f"Current Directory: {current_dir}")
-        st.write(f"Pages Directory: {os.path.join(current_dir, 'pages')}")
-        st.write(f"sys.path: {sys.path}")
-        st.write(f"All Pages: {all_pages}")
-        st.write(f"Session State: {dict(st.session_state)}")
-        
-        # Check if specific key files exist
-        lesson_files = {
-            "Course Intro": os.path.exists(os.path.join(current_dir, "pages", "course_introduction.py")),
-            "Course Examples": os.path.exists(os.path.join(current_dir, "pages", "course_examples.py")),
-            "Course Activities": os.path.exists(os.path.join(current_dir, "pages", "course_activities.py")),
-            "Course Reflection": os.path.exists(os.path.join(current_dir, "pages", "course_reflection.py")),
-            "Lesson 1 Intro": os.path.exists(os.path.join(current_dir, "pages", "lesson_1_introduction.py")),
-        }
-        st.write("File check:", lesson_files)
\ No newline at end of file
+render_page(PAGE_INFO, render_body, page_title="Prompt Engineering Course Introduction", show_header=True)
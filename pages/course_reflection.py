@@ -1,27 +1,8 @@
 import streamlit as st
-import os
-import sys
-from utils.navigation import scroll_to_top
-from utils.state_management import initialize_session_state, mark_page_completed
-from components.breadcrumb_navigator import render_breadcrumb
-from components.bottom_navigator import render_bottom_navigator
-from components.course_navigation import render_course_navigation
-from components.top_navigator import render_top_navigator
+from utils.state_management import mark_page_completed
 from components.teacher_notes import render_teacher_notes
 from components.progress_manager import save_reflection_and_navigate, get_next_lesson_id, get_next_lesson_path
-
-# Configure page
-st.set_page_config(
-    page_title="Course Reflection",
-    page_icon="images/favicon_io/favicon.ico",
-    layout="wide",
-    initial_sidebar_state="collapsed"
-)
-
-# Get the current directory and add to path if needed
-current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if current_dir not in sys.path:
-    sys.path.insert(0, current_dir)
+from components.page_shell import render_page
 
 # Page metadata
 PAGE_INFO = {
@@ -31,54 +12,11 @@ PAGE_INFO = {
     "order": 3
 }
 
-# Initialize session state
-initialize_session_state()
-
-# Set current page in session state
+# Page identifier used by the content below
 current_page = "course_reflection"
-st.session_state.current_page = current_page
-
-# Get all available pages for navigation
-try:
-    from utils.navigation import get_all_pages
-    all_pages = get_all_pages()
-except Exception as e:
-    st.error(f"Error loading pages: {str(e)}")
-    all_pages = []
-
-# Scroll to top when page loads
-scroll_to_top()
-
-# Render teacher controls in the sidebar
-st.sidebar.title("Teacher Controls")
-st.sidebar.markdown("---")
-
-# Teacher/Student toggle
-st.sidebar.checkbox(
-    "Show Teacher Content",
-    value=st.session_state.show_teacher_content,
-    key="toggle_teacher_content"
-)
-
-# Debug toggle in sidebar - Note the unique key
-debug_key = f"toggle_debug_{PAGE_INFO['lesson']}_{PAGE_INFO['section']}"
-st.sidebar.checkbox(
-    "Show Debug Info",
-    value=st.session_state.get("show_debug", False),
-    key=debug_key
-)
-
-# Create main layout with content on the left and navigation on the right
-content_col, nav_col = st.columns([4, 1])
 
-# Render the main content area
-with content_col:
-    # Render breadcrumb navigation at the top
-    render_breadcrumb(current_page)
-    
-    # Render section navigation at the top
-    render_top_navigator(PAGE_INFO["lesson"], PAGE_INFO["section"])
-    
+def render_body():
+    """Render the main content of the page."""
     # Main content
     st.title("Course Reflection ✨")
     
@@ -176,9 +114,6 @@ with content_col:
             else:
                 st.warning("Please fill in at least one of the reflection fields.")
     
-    # Add bottom navigator - mirrors the top navigator
-    render_bottom_navigator(PAGE_INFO)
-    
     # Teacher-specific notes
     render_teacher_notes("""
     **Facilitation Notes:**
@@ -195,38 +130,5 @@ with content_col:
     * Setting clear goals at the beginning helps learners measure their progress
     * The reflection data can be valuable for course facilitators to understand learner needs
     """)
-    
-    # Footer
-    st.markdown("---")
-    st.markdown("""
-    **Prompt Engineering for Educators** | &copy; 2025 | A comprehensive course for teaching staff  
-     ***Presenting an [AIxponential](http://aixponential.org) experience***            
-    """)
-
-# Render course navigation in the right column
-with nav_col:
-    render_course_navigation(all_pages, current_page, current_dir)
 
-# Debug section at the bottom
-if st.session_state.get("show_debug", False):
-    with st.expander("Debug Information", expanded=True):
-        st.write("### Debug Info")
-        st.write(f"Current Page: {current_page}")
-        st.write(f"Current Directory: {current_dir}")
-        st.write(f"Pages Directory: {os.path.join(current_dir, 'pages')}")
-        st.write(f"sys.path: {sys.path}")
-        st.write(f"All Pages: {all_pages}")
-        st.write(f"Next Lesson Path: {next_lesson_path}")
-        st.write(f"Already Completed: {already_completed}")
-        st.write(f"Has Content: {has_content}")
-        st.write(f"Session State: {dict(st.session_state)}")
-        st.write(f"Completed Pages: {st.session_state.get('completed_pages', [])}")
-        st.write(f"Path Check: {'pages/lesson_1_introduction.py' in all_pages}")
-        
-        # Check if specific page exists
-        page_path = os.path.join(current_dir, "pages", "lesson_1_introduction.py")
-        st.write(f"Lesson 1 Intro Exists: {os.path.exists(page_path)}")
-        st.write(f"Absolute Path: {os.path.abspath(page_path)}")
-        
-        # Check unlocked lessons
-        st.write(f"Unlocked Lessons: {st.session_state.get('unlocked_lessons', [])}") 
\ No newline at end of file
+render_page(PAGE_INFO, render_body, page_title="Course Reflection")
@@ -1,28 +1,8 @@
 import streamlit as st
-import os
-import sys
-from utils.navigation import scroll_to_top, get_all_pages
-from utils.state_management import initialize_session_state, mark_page_completed
+from utils.state_management import mark_page_completed
 from components.teacher_notes import render_teacher_notes
-from components.bottom_navigator import render_bottom_navigator
-from components.breadcrumb_navigator import render_breadcrumb
-from components.course_navigation import render_course_navigation
-from components.top_navigator import render_top_navigator
-from components.first_visit_dialog import show_first_visit_dialog
-from components.progress_manager import render_teacher_controls_sidebar, save_reflection_and_navigate, get_next_lesson_id, get_next_lesson_path
-
-# Configure page
-st.set_page_config(
-    page_title="Lesson 17: Reflection",
-    page_icon="images/favicon_io/favicon.ico",
-    layout="wide",
-    initial_sidebar_state="collapsed"
-)
-
-# Get the current directory and add to path if needed
-current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if current_dir not in sys.path:
-    sys.path.insert(0, current_dir)
+from components.progress_manager import save_reflection_and_navigate, get_next_lesson_id, get_next_lesson_path
+from components.page_shell import render_page
 
 # Page metadata
 PAGE_INFO = {
@@ -32,29 +12,23 @@ PAGE_INFO = {
     "order": 4
 }
 
-# Initialize session state
-initialize_session_state()
-
-# Set current page in session state
+# Page identifier used by the content below
 current_page = "lesson_17_reflection"
-st.session_state.current_page = current_page
 
-# Get all available pages for navigation
-try:
-    all_pages = get_all_pages()
-except Exception as e:
-    st.error(f"Error loading pages: {str(e)}")
-    all_pages = []
+# Calculate the next lesson path for direct navigation
+next_lesson_id = get_next_lesson_id(PAGE_INFO["lesson"])  # Should return "18"
 
-# Scroll to top when page loads
-scroll_to_top()
+next_lesson_path = get_next_lesson_path(next_lesson_id)
 
-# Show the first visit dialog if this is the first time visiting this page
-show_first_visit_dialog(
-    "lesson_17_reflection",
-    "reflection",
-    "Lesson 17: Reflection",
-    """
+# Create a session state flag for showing the completion page
+# This will be used in Lesson 18's reflection page, but we keep it here for compatibility
+if "show_completion_page" not in st.session_state:
+    st.session_state.show_completion_page = False
+
+# First visit dialog shown the first time this page is opened
+FIRST_VISIT_DIALOG = {
+    "title": "Lesson 17: Reflection",
+    "message": """
     **This is where you reflect on what you've learned about personalized learning pathways.**
     
     ✨ **Important:** Completing this reflection by saving your responses will:
@@ -65,31 +39,10 @@ show_first_visit_dialog(
     Take a moment to consider how you can apply prompt engineering to enhance personalized learning
     in your teaching practice.
     """
-)
-
-# Calculate the next lesson path for direct navigation
-next_lesson_id = get_next_lesson_id(PAGE_INFO["lesson"])  # Should return "18"
-next_lesson_path = get_next_lesson_path(next_lesson_id)
-
-# Create a session state flag for showing the completion page
-# This will be used in Lesson 18's reflection page, but we keep it here for compatibility
-if "show_completion_page" not in st.session_state:
-    st.session_state.show_completion_page = False
-
-# Render the teacher controls in the sidebar
-render_teacher_controls_sidebar()
-
-# Create main layout with content area on the left and navigation on the right
-content_col, nav_col = st.columns([4, 1])
+}
 
-# Render the main content area
-with content_col:
-    # Render breadcrumb navigation at the top
-    render_breadcrumb(current_page)
-    
-    # Render section navigation at the top
-    render_top_navigator(PAGE_INFO["lesson"], PAGE_INFO["section"])
-    
+def render_body():
+    """Render the main content of the page."""
     # Main content
     st.markdown("## Reflection: Personalized Learning Pathways")
     
@@ -240,9 +193,6 @@ with content_col:
     # Mark this page as viewed (completion is handled by save_reflection_and_navigate)
     mark_page_completed(current_page)
     
-    # Add horizontal bottom navigator 
-    render_bottom_navigator(PAGE_INFO)
-    
     # Teacher-specific notes
     render_teacher_notes("""
     **Discussion Prompts:**
@@ -266,28 +216,14 @@ with content_col:
     - Thoughtful analysis of implementation challenges and potential solutions
     - Application of the PCTFR framework to specific teaching scenarios
     """)
-    
-    # Footer
-    st.markdown("---")
-    st.markdown("""
-    **Prompt Engineering for Educators** | &copy; 2025 | A comprehensive course for teaching staff  
-     ***Presenting an [AIxponential](http://aixponential.org) experience***            
-    """)
-
-# Render course navigation in the right column
-with nav_col:
-    render_course_navigation(all_pages, current_page, current_dir)
 
-# Debug section at the bottom
-if st.session_state.get("show_debug", False):
-    with st.expander("Debug Information", expanded=True):
-        st.write("### Debug Info")
-        st.write(f"Current Page: {current_page}")
-        st.write(f"Current Directory: {current_dir}")
-        st.write(f"Pages Directory: {os.path.join(current_dir, 'pages')}")
-        st.write(f"sys.path: {sys.path}")
-        st.write(f"All Pages: {all_pages}")
-        st.write(f"Session State: {dict(st.session_state)}")
-        st.write(f"Next Lesson ID: {next_lesson_id}")
-        st.write(f"Next Lesson Path: {next_lesson_path}")
-        st.write(f"Already Completed: {already_completed}") 
\ No newline at end of file
+render_page(
+    PAGE_INFO,
+    render_body,
+    page_title="Lesson 17: Reflection",
+    first_visit=FIRST_VISIT_DIALOG,
+    debug_info={
+        "Next Lesson ID": next_lesson_id,
+        "Next Lesson Path": next_lesson_path
+    }
+)
@@ -1,36 +1,13 @@
 import streamlit as st
-import os
-import sys
-import json
-import datetime
-import pandas as pd
-from utils.navigation import scroll_to_top, get_all_pages
-from utils.state_management import initialize_session_state, mark_page_completed
+from utils.state_management import mark_page_completed
 from utils.teacher_client import TeacherClient
-from components.breadcrumb_navigator import render_breadcrumb
-from components.bottom_navigator import render_bottom_navigator
-from components.course_navigation import render_course_navigation
-from components.top_navigator import render_top_navigator
 from components.teacher_notes import render_teacher_notes
 from components.progress_manager import save_progress_to_indexed_db
-from components.first_visit_dialog import show_first_visit_dialog
+from components.page_shell import render_page
 
 # Initialize the TeacherClient
 client = TeacherClient()
 
-# Configure page
-st.set_page_config(
-    page_title="Lesson 1: Activities",
-    page_icon="images/favicon_io/favicon.ico",
-    layout="wide",
-    initial_sidebar_state="collapsed"
-)
-
-# Get the current directory and add to path if needed
-current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if current_dir not in sys.path:
-    sys.path.insert(0, current_dir)
-
 # Page metadata
 PAGE_INFO = {
     "title": "Quick Start Guide: Activities",
@@ -39,12 +16,8 @@ PAGE_INFO = {
     "order": 3
 }
 
-# Initialize session state
-initialize_session_state()
-
-# Set current page in session state
+# Page identifier used by the content below
 current_page = "lesson_1_activities"
-st.session_state.current_page = current_page
 
 # Helper function for tooltips
 def render_tooltip(tooltip_id, tooltip_text, icon="ℹ️"):
@@ -65,22 +38,10 @@ def render_tooltip(tooltip_id, tooltip_text, icon="ℹ️"):
 # Mock mode detection
 MOCK_MODE = not hasattr(client, "is_connected") or not client.is_connected()
 
-# Get all available pages for navigation
-try:
-    all_pages = get_all_pages()
-except Exception as e:
-    st.error(f"Error loading pages: {str(e)}")
-    all_pages = []
-
-# Scroll to top when page loads
-scroll_to_top()
-
-# Show the first visit dialog if this is the first time visiting this page
-show_first_visit_dialog(
-    "lesson_1_activities",
-    "activities",
-    "Lesson 1 Activities",
-    """
+# First visit dialog shown the first time this page is opened
+FIRST_VISIT_DIALOG = {
+    "title": "Lesson 1 Activities",
+    "message": """
     **This section provides hands-on practice with basic prompting.**
     
     You'll:
@@ -91,38 +52,10 @@ show_first_visit_dialog(
     Complete these activities to strengthen your understanding before 
     moving to the reflection.
     """
-)
-
-# Render teacher controls in the sidebar
-st.sidebar.title("Teacher Controls")
-st.sidebar.markdown("---")
-
-# Teacher/Student toggle
-st.sidebar.checkbox(
-    "Show Teacher Content",
-    value=st.session_state.show_teacher_content,
-    key="toggle_teacher_content"
-)
-
-# Debug toggle in sidebar - Note the unique key
-debug_key = f"toggle_debug_{PAGE_INFO['lesson']}_{PAGE_INFO['section']}"
-st.sidebar.checkbox(
-    "Show Debug Info",
-    value=st.session_state.get("show_debug", False),
-    key=debug_key
-)
-
-# Create main layout with content area on the left and navigation on the right
-content_col, nav_col = st.columns([4, 1])
+}
 
-# Render the main content area
-with content_col:
-    # Render breadcrumb navigation at the top
-    render_breadcrumb(current_page)
-    
-    # Render section navigation at the top
-    render_top_navigator(PAGE_INFO["lesson"], PAGE_INFO["section"])
-    
+def render_body():
+    """Render the main content of the page."""
     # Main content
     st.markdown(f"# Activities: {PAGE_INFO['title']}")
     
@@ -238,10 +171,6 @@ with content_col:
     # Mark this page as completed when viewed
     mark_page_completed(current_page)
     
-    # Add horizontal bottom navigator
-    st.markdown("---")
-    render_bottom_navigator(PAGE_INFO)
-    
     # Teacher-specific notes
     render_teacher_notes("""
     **Teaching Tips:**
@@ -260,27 +189,5 @@ with content_col:
     - Some may include too many instructions - discuss the balance between guidance and overcomplication
     - Context may be missing educational relevance - remind them to think about learner needs
     """)
-    
-    # Footer
-    st.markdown("---")
-    st.markdown("""
-    **Prompt Engineering for Educators** | &copy; 2025 | A comprehensive course for teaching staff  
-     ***Presenting an [AIxponential](http://aixponential.org) experience***            
-    """)
-
-# Render course navigation in the right column
-with nav_col:
-    render_course_navigation(all_pages, current_page, current_dir)
 
-# Debug section at the bottom
-if st.session_state.get("show_debug", False):
-    with st.expander("Debug Information", expanded=True):
-        st.write("### Debug Info")
-        st.write(f"Current Page: {current_page}")
-        st.write(f"Current Directory: {current_dir}")
-        st.write(f"Pages Directory: {os.path.join(current_dir, 'pages')}")
-        st.write(f"sys.path: {sys.path}")
-        st.write(f"All Pages: {all_pages}")
-        st.write(f"Session State: {dict(st.session_state)}")
-        st.write(f"Mock Mode: {MOCK_MODE}")
-        st.write(f"Saved Activities: {st.session_state.get('activities', {})}")
+render_page(PAGE_INFO, render_body, page_title="Lesson 1: Activities", first_visit=FIRST_VISIT_DIALOG)
@@ -1,26 +1,7 @@
 import streamlit as st
-import os
-import sys
-from utils.navigation import scroll_to_top
-from utils.state_management import initialize_session_state, mark_page_completed
-from components.breadcrumb_navigator import render_breadcrumb
-from components.bottom_navigator import render_bottom_navigator
-from components.course_navigation import render_course_navigation
-from components.top_navigator import render_top_navigator
+from utils.state_management import mark_page_completed
 from components.teacher_notes import render_teacher_notes
-
-# Configure page
-st.set_page_config(
-    page_title="Lesson 1 Introduction",
-    page_icon="images/favicon_io/favicon.ico",
-    layout="wide",
-    initial_sidebar_state="collapsed"
-)
-
-# Get the current directory and add to path if needed
-current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if current_dir not in sys.path:
-    sys.path.insert(0, current_dir)
+from components.page_shell import render_page
 
 # Page metadata
 PAGE_INFO = {
@@ -30,54 +11,11 @@ PAGE_INFO = {
     "order": 1
 }
 
-# Initialize session state
-initialize_session_state()
-
-# Set current page in session state
+# Page identifier used by the content below
 current_page = f"lesson_{PAGE_INFO['lesson']}_{PAGE_INFO['section']}"
-st.session_state.current_page = current_page
-
-# Get all available pages for navigation
-try:
-    from utils.navigation import get_all_pages
-    all_pages = get_all_pages()
-except Exception as e:
-    st.error(f"Error loading pages: {str(e)}")
-    all_pages = []
-
-# Scroll to top when page loads
-scroll_to_top()
-
-# Render teacher controls in the sidebar
-st.sidebar.title("Teacher Controls")
-st.sidebar.markdown("---")
-
-# Teacher/Student toggle
-st.sidebar.checkbox(
-    "Show Teacher Content",
-    value=st.session_state.show_teacher_content,
-    key="toggle_teacher_content"
-)
-
-# Debug toggle in sidebar - Note the unique key
-debug_key = f"toggle_debug_{PAGE_INFO['lesson']}_{PAGE_INFO['section']}"
-st.sidebar.checkbox(
-    "Show Debug Info",
-    value=st.session_state.get("show_debug", False),
-    key=debug_key
-)
 
-# Create main layout with content on the left and navigation on the right
-content_col, nav_col = st.columns([4, 1])
-
-# Render the main content area
-with content_col:
-    # Render breadcrumb navigation at the top
-    render_breadcrumb(current_page)
-    
-    # Render section navigation at the top
-    render_top_navigator(PAGE_INFO["lesson"], PAGE_INFO["section"])
-    
+def render_body():
+    """Render the main content of the page."""
     # Main content
     st.title(PAGE_INFO["title"])
     
@@ -128,10 +66,6 @@ with content_col:
     elements in more detail as we progress through the curriculum.
     """)
     
-    # Add horizontal bottom navigator
-    st.markdown("---")
-    render_bottom_navigator(PAGE_INFO)
-    
     # Mark this page as completed when viewed
     mark_page_completed(current_page)
     
@@ -150,39 +84,5 @@ with content_col:
     * Others may want to jump ahead to advanced techniques - acknowledge their enthusiasm while emphasizing the importance of fundamentals
     * Technical terminology can be a barrier - continue using everyday language and analogies
     """)
-    
-    # Footer
-    st.markdown("---")
-    st.markdown("""
-    **Prompt Engineering for Educators** | &copy; 2025 | A comprehensive course for teaching staff  
-     ***Presenting an [AIxponential](http://aixponential.org) experience***            
-    """)
-
-# Render course navigation in the right column
-with nav_col:
-    render_course_navigation(all_pages, current_page, current_dir)
 
-# Debug section at the bottom
-if st.session_state.get("show_debug", False):
-    with st.expander("Debug Information", expanded=True):
-        st.write("### Debug Info")
-        st.write(f"Current Page: {current_page}")
-        st.write(f"Current Directory: {current_dir}")
-        st.write(f"Pages Directory: {os.path.join(current_dir, 'pages')}")
-        st.write(f"sys.path: {sys.path}")
-        st.write(f"All Pages: {all_pages}")
-        st.write(f"Session State: {dict(st.session_state)}")
-        
-        # Check for lesson files
-        lesson_md_path = os.path.join(current_dir, "Lessons", "Lesson 1.md")
-        st.write(f"Lesson 1 MD exists: {os.path.exists(lesson_md_path)}")
-        if os.path.exists(lesson_md_path):
-            try:
-                with open(lesson_md_path, 'r') as f:
-                    content = f.read()
-                    import re
-                    title_match = re.search(r'\*\*Lesson\s+\d+\s*:\s*([^\*]+)\*\*', content)
-                    if title_match:
-                        st.write(f"Extracted title: {title_match.group(1).strip()}")
-            except Exception as e:
-                st.write(f"Error reading lesson file: {str(e)}")
+render_page(PAGE_INFO, render_body, page_title="Lesson 1 Introduction")
@@ -1,33 +1,14 @@
 import streamlit as st
-import os
-import sys
-from utils.navigation import scroll_to_top, get_all_pages
-from utils.state_management import initialize_session_state, mark_page_completed
+from utils.state_management import mark_page_completed, save_example_response, get_example_response
 from utils.teacher_client import TeacherClient
 from components.teacher_notes import render_teacher_notes
-from components.bottom_navigator import render_bottom_navigator
-from components.breadcrumb_navigator import render_breadcrumb
-from components.course_navigation import render_course_navigation
-from components.top_navigator import render_top_navigator
-from components.first_visit_dialog import show_first_visit_dialog
-from components.progress_manager import render_teacher_controls_sidebar
+from components.page_shell import render_page
+from components.prompt_comparison import render_prompt_comparison
+from components.ai_response import stream_ai_response
 
 # Initialize the TeacherClient
 client = TeacherClient()
 
-# Configure page
-st.set_page_config(
-    page_title="Lesson 2: Examples",
-    page_icon="images/favicon_io/favicon.ico",
-    layout="wide",
-    initial_sidebar_state="collapsed"
-)
-
-# Get the current directory and add to path if needed
-current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if current_dir not in sys.path:
-    sys.path.insert(0, current_dir)
-
 # Page metadata
 PAGE_INFO = {
     "title": "The Power of Context: Examples",
@@ -36,29 +17,13 @@ PAGE_INFO = {
     "order": 2
 }
 
-# Initialize session state
-initialize_session_state()
-
-# Set current page in session state
+# Page identifier used by the content below
 current_page = "lesson_2_examples"
-st.session_state.current_page = current_page
-
-# Get all available pages for navigation
-try:
-    all_pages = get_all_pages()
-except Exception as e:
-    st.error(f"Error loading pages: {str(e)}")
-    all_pages = []
-
-# Scroll to top when page loads
-scroll_to_top()
 
-# Show the first visit dialog if this is the first time visiting this page
-show_first_visit_dialog(
-    "lesson_2_examples",
-    "examples",
-    "Lesson 2: Examples of Context",
-    """
+# First visit dialog shown the first time this page is opened
+FIRST_VISIT_DIALOG = {
+    "title": "Lesson 2: Examples of Context",
+    "message": """
     **This section demonstrates how context transforms AI responses.**
     
     You'll see:
@@ -69,22 +34,23 @@ show_first_visit_dialog(
     Look through these examples to understand how context helps 
     generate more relevant and useful responses.
     """
-)
-
-# Render the improved teacher controls in the sidebar
-render_teacher_controls_sidebar()
+}
 
-# Create main layout with content area on the left and navigation on the right
-content_col, nav_col = st.columns([4, 1])
+# Prompt variants of the general examples, also run together by the comparison control
+GENERAL_EXAMPLE_VARIANTS = [
+    {"example": "example1", "variant": "no_context", "label": "Example 1: No Context",
+     "prompt": "Write a story about a dog."},
+    {"example": "example1", "variant": "with_context", "label": "Example 1: With Context",
+     "prompt": "Write a short story about a mischievous golden retriever puppy named Sunny who loves to chase squirrels in the park."},
+    {"example": "example2", "variant": "no_context", "label": "Example 2: No Context",
+     "prompt": "Explain photosynthesis."},
+    {"example": "example2", "variant": "with_context", "label": "Example 2: With Context",
+     "prompt": "Explain photosynthesis in a way that is easy for 5th-grade students to understand. Use simple language and analogies."}
+]
+GENERAL_EXAMPLE_PROMPTS = {(item["example"], item["variant"]): item["prompt"] for item in GENERAL_EXAMPLE_VARIANTS}
 
-# Render the main content area
-with content_col:
-    # Render breadcrumb navigation at the top
-    render_breadcrumb(current_page)
-    
-    # Render section navigation at the top
-    render_top_navigator(PAGE_INFO["lesson"], PAGE_INFO["section"])
-    
+def render_body():
+    """Render the main content of the page."""
     # Main content
     st.markdown("## Relevant and Accessible Examples")
     
@@ -109,16 +75,18 @@ with content_col:
             
             if st.button("Try without context", key="example1_no_context"):
                 try:
-                    with st.spinner("Getting response from AI..."):
-                        prompt = "Write a story about a dog."
-                        response = client.send_prompt(prompt)
-                        st.session_state.example1_response_no_context = response['response']
+                    prompt = GENERAL_EXAMPLE_PROMPTS[("example1", "no_context")]
+                    st.markdown("### AI Response (No Context):")
+                    # Show the response as it is generated, or the queue position while waiting
+                    response_text = stream_ai_response(client, prompt)
+                    save_example_response(current_page, "example1", "no_context", response_text)
                 except Exception as e:
                     st.error(f"Error: {str(e)}")
-            
-            if "example1_response_no_context" in st.session_state and st.session_state.example1_response_no_context:
-                st.markdown("### AI Response (No Context):")
-                st.markdown(st.session_state.example1_response_no_context)
+            else:
+                example1_no_context = get_example_response(current_page, "example1", "no_context")
+                if example1_no_context:
+                    st.markdown("### AI Response (No Context):")
+                    st.markdown(example1_no_context)
             
             st.markdown("---")
             
@@ -128,16 +96,18 @@ with content_col:
             
             if st.button("Try with context", key="example1_with_context"):
                 try:
-                    with st.spinner("Getting response from AI..."):
-                        prompt = "Write a short story about a mischievous golden retriever puppy named Sunny who loves to chase squirrels in the park."
-                        response = client.send_prompt(prompt)
-                        st.session_state.example1_response_with_context = response['response']
+                    prompt = GENERAL_EXAMPLE_PROMPTS[("example1", "with_context")]
+                    st.markdown("### AI Response (With Context):")
+                    # Show the response as it is generated, or the queue position while waiting
+                    response_text = stream_ai_response(client, prompt)
+                    save_example_response(current_page, "example1", "with_context", response_text)
                 except Exception as e:
                     st.error(f"Error: {str(e)}")
-            
-            if "example1_response_with_context" in st.session_state and st.session_state.example1_response_with_context:
-                st.markdown("### AI Response (With Context):")
-                st.markdown(st.session_state.example1_response_with_context)
+            else:
+                example1_with_context = get_example_response(current_page, "example1", "with_context")
+                if example1_with_context:
+                    st.markdown("### AI Response (With Context):")
+                    st.markdown(example1_with_context)
     
     with col_b:
         with st.popover("🧠 Example 2: Educational Explanation", use_container_width=True):
@@ -149,16 +119,18 @@ with content_col:
             
             if st.button("Try without context", key="example2_no_context"):
                 try:
-                    with st.spinner("Getting response from AI..."):
-                        prompt = "Explain photosynthesis."
-                        response = client.send_prompt(prompt)
-                        st.session_state.example2_response_no_context = response['response']
+                    prompt = GENERAL_EXAMPLE_PROMPTS[("example2", "no_context")]
+                    st.markdown("### AI Response (No Context):")
+                    # Show the response as it is generated, or the queue position while waiting
+                    response_text = stream_ai_response(client, prompt)
+                    save_example_response(current_page, "example2", "no_context", response_text)
                 except Exception as e:
                     st.error(f"Error: {str(e)}")
-            
-            if "example2_response_no_context" in st.session_state and st.session_state.example2_response_no_context:
-                st.markdown("### AI Response (No Context):")
-                st.markdown(st.session_state.example2_response_no_context)
+            else:
+                example2_no_context = get_example_response(current_page, "example2", "no_context")
+                if example2_no_context:
+                    st.markdown("### AI Response (No Context):")
+                    st.markdown(example2_no_context)
             
             st.markdown("---")
             
@@ -168,16 +140,22 @@ with content_col:
             
             if st.button("Try with context", key="example2_with_context"):
                 try:
-                    with st.spinner("Getting response from AI..."):
-                        prompt = "Explain photosynthesis in a way that is easy for 5th-grade students to understand. Use simple language and analogies."
-                        response = client.send_prompt(prompt)
-                        st.session_state.example2_response_with_context = response['response']
+                    prompt = GENERAL_EXAMPLE_PROMPTS[("example2", "with_context")]
+                    st.markdown("### AI Response (With Context):")
+                    # Show the response as it is generated, or the queue position while waiting
+                    response_text = stream_ai_response(client, prompt)
+                    save_example_response(current_page, "example2", "with_context", response_text)
                 except Exception as e:
                     st.error(f"Error: {str(e)}")
-            
-            if "example2_response_with_context" in st.session_state and st.session_state.example2_response_with_context:
-                st.markdown("### AI Response (With Context):")
-                st.markdown(st.session_state.example2_response_with_context)
+            else:
+                example2_with_context = get_example_response(current_page, "example2", "with_context")
+                if example2_with_context:
+                    st.markdown("### AI Response (With Context):")
+                    st.markdown(example2_with_context)
+    
+    # Run all four prompts at once and compare them side by side
+    st.markdown("#### Compare All Variants")
+    render_prompt_comparison(client, current_page, GENERAL_EXAMPLE_VARIANTS, key="general_examples_compare")
     
     # Side-by-side comparison
     st.markdown("## Context Impact Analysis")
@@ -267,10 +245,6 @@ with content_col:
     # Mark this page as completed when viewed
     mark_page_completed(current_page)
     
-    # Add horizontal bottom navigator
-    st.markdown("---")
-    render_bottom_navigator(PAGE_INFO)
-    
     # Teacher-specific guidance
     render_teacher_notes("""
     **Key Points to Emphasize:**
@@ -291,25 +265,5 @@ with content_col:
     
     When using these examples in a workshop setting, consider having pre-generated responses ready to show, as live API calls may vary in their exact outputs.
     """)
-    
-    # Footer
-    st.markdown("---")
-    st.markdown("""
-    **Prompt Engineering for Educators** | &copy; 2025 | A comprehensive course for teaching staff  
-     ***Presenting an [AIxponential](http://aixponential.org) experience***            
-    """)
-
-# Render course navigation in the right column
-with nav_col:
-    render_course_navigation(all_pages, current_page, current_dir)
 
-# Debug section at the bottom
-if st.session_state.get("show_debug", False):
-    with st.expander("Debug Information", expanded=True):
-        st.write("### Debug Info")
-        st.write(f"Current Page: {current_page}")
-        st.write(f"Current Directory: {current_dir}")
-        st.write(f"Pages Directory: {os.path.join(current_dir, 'pages')}")
-        st.write(f"sys.path: {sys.path}")
-        st.write(f"All Pages: {all_pages}")
-        st.write(f"Session State: {dict(st.session_state)}") 
\ No newline at end of file
+render_page(PAGE_INFO, render_body, page_title="Lesson 2: Examples", first_visit=FIRST_VISIT_DIALOG)
@@ -3,15 +3,11 @@ import os
 import sys
 from utils.navigation import scroll_to_top, get_all_pages
 from utils.state_management import initialize_session_state
+from utils.page_config import set_standard_page_config
 from components.course_navigation import render_course_navigation
 
 # Configure page
-st.set_page_config(
-    page_title="Course Completion",
-    page_icon="🎓",
-    layout="wide",
-    initial_sidebar_state="collapsed"
-)
+set_standard_page_config("Course Completion", "🎓")
 
 # Get the current directory and add to path if needed
 current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,60 @@
+import pytest
+
+pytest.importorskip("streamlit")
+
+from components import browser_storage
+from utils.delta_sync import CLIENT, SyncLedger
+
+@pytest.fixture
+def ledger(monkeypatch):
+    ledger = SyncLedger()
+    monkeypatch.setattr(browser_storage, "get_sync_ledger", lambda: ledger)
+    return ledger
+
+def bridge_state(ops, pending=()):
+    """Bridge bookkeeping with one batch in flight."""
+    return {
+        "next_id": 2,
+        "pending": list(pending),
+        "in_flight": {"id": 1, "ops": ops},
+        "values": {},
+        "last_error": None
+    }
+
+def put_op(ledger, key, text, attempts=None):
+    """A queued put of a staged envelope, as progress_manager queues it."""
+    envelope = ledger.stage(CLIENT, key, text, now=100)
+    op = {"op": "put", "store": "reflections", "key": key, "value": envelope, "sync_key": key}
+    if attempts is not None:
+        op["attempts"] = attempts
+    return op
+
+def test_successful_put_confirms_the_browser_copy(ledger):
+    state = bridge_state([put_op(ledger, "lesson_1", "text")])
+    browser_storage._apply_reply(state, {"id": 1, "results": [True]})
+
+    assert ledger.stage(CLIENT, "lesson_1", "text") is None
+    assert ledger.run_bytes[CLIENT] > 0
+    assert state["pending"] == []
+
+def test_failed_put_is_not_confirmed_and_is_retried(ledger):
+    op = put_op(ledger, "lesson_1", "text")
+    state = bridge_state([op])
+    browser_storage._apply_reply(state, {"id": 1, "error": "QuotaExceededError"})
+
+    assert ledger.stage(CLIENT, "lesson_1", "text") is not None
+    assert state["last_error"] == "QuotaExceededError"
+    assert state["pending"] == [dict(op, attempts=2)]
+
+def test_failed_put_is_dropped_after_the_last_attempt(ledger):
+    state = bridge_state([put_op(ledger, "lesson_1", "text", attempts=browser_storage.MAX_PUT_ATTEMPTS)])
+    browser_storage._apply_reply(state, {"id": 1, "error": "QuotaExceededError"})
+
+    assert state["pending"] == []
+
+def test_failed_put_is_not_retried_over_a_newer_queued_value(ledger):
+    newer = put_op(ledger, "lesson_1", "newer text")
+    state = bridge_state([put_op(ledger, "lesson_1", "text")], pending=[newer])
+    browser_storage._apply_reply(state, {"id": 1, "error": "AbortError"})
+
+    assert state["pending"] == [newer]
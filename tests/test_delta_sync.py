@@ -0,0 +1,85 @@
+from utils.delta_sync import CLIENT, SERVER, SyncLedger, as_envelope, is_newer, make_envelope
+
+def test_unchanged_value_is_not_sent_again():
+    ledger = SyncLedger()
+    envelope = ledger.stage(SERVER, "reflections/lesson_1", "text", now=100)
+    assert envelope == make_envelope("text", 1, 100)
+    ledger.confirm(SERVER, "reflections/lesson_1", envelope, size=10)
+
+    assert ledger.stage(SERVER, "reflections/lesson_1", "text", now=200) is None
+    assert ledger.skipped == 1
+    assert ledger.run_bytes[SERVER] == 10
+
+def test_copies_are_tracked_separately():
+    ledger = SyncLedger()
+    envelope = ledger.stage(SERVER, "key", "text", now=100)
+    ledger.confirm(SERVER, "key", envelope)
+
+    # The browser copy has not been confirmed, so it still gets the same version
+    assert ledger.stage(CLIENT, "key", "text", now=200) == envelope
+
+def test_unconfirmed_write_is_sent_again():
+    ledger = SyncLedger()
+    first = ledger.stage(CLIENT, "key", "text", now=100)
+    assert ledger.stage(CLIENT, "key", "text", now=200) == first
+
+def test_changed_value_gets_a_new_version():
+    ledger = SyncLedger()
+    ledger.confirm(SERVER, "key", ledger.stage(SERVER, "key", "one", now=100))
+    envelope = ledger.stage(SERVER, "key", "two", now=200)
+
+    assert (envelope["version"], envelope["updated_at"]) == (2, 200)
+    assert ledger.current("key") == (2, 200)
+
+def test_confirming_an_older_envelope_keeps_the_newer_version():
+    ledger = SyncLedger()
+    ledger.stage(SERVER, "key", "new", now=300)
+    ledger.confirm(CLIENT, "key", make_envelope("old", 1, 100))
+
+    assert ledger.current("key") == (1, 300)
+
+def test_loading_a_newer_envelope_adopts_its_version():
+    ledger = SyncLedger()
+    ledger.stage(SERVER, "key", "local", now=100)
+    ledger.confirm(SERVER, "key", make_envelope("remote", 5, 200))
+
+    assert ledger.current("key") == (5, 200)
+    assert ledger.stage(SERVER, "key", "remote", now=300) is None
+
+def test_forget_sends_everything_again():
+    ledger = SyncLedger()
+    ledger.confirm(CLIENT, "key", ledger.stage(CLIENT, "key", "text", now=100))
+    ledger.forget(CLIENT)
+
+    assert ledger.stage(CLIENT, "key", "text", now=200) is not None
+
+def test_last_writer_wins_by_update_time_then_version():
+    assert is_newer(make_envelope("b", 1, 200), make_envelope("a", 5, 100))
+    assert not is_newer(make_envelope("a", 5, 100), make_envelope("b", 1, 200))
+    assert is_newer(make_envelope("b", 2, 100), make_envelope("a", 1, 100))
+    assert not is_newer(make_envelope("a", 1, 100), make_envelope("a", 1, 100))
+    assert is_newer(make_envelope("a", 1, 100), None)
+    assert not is_newer(None, make_envelope("a", 1, 100))
+
+def test_values_saved_before_versioning_count_as_oldest():
+    assert as_envelope("plain text") == make_envelope("plain text", 0, 0)
+    assert is_newer(make_envelope("new", 1, 1), as_envelope("plain text"))
+
+def test_note_write_tracks_whether_the_copy_is_current():
+    ledger = SyncLedger()
+    ledger.revision = 4
+    ledger.note_write(5)
+    assert ledger.revision == 5
+
+    # Another writer got in between
+    ledger.note_write(7)
+    assert ledger.revision is None
+
+def test_end_run_resets_the_byte_counters():
+    ledger = SyncLedger()
+    ledger.confirm(CLIENT, "key", make_envelope("text", 1, 100), size=12)
+    ledger.end_run()
+
+    assert ledger.last_run_bytes[CLIENT] == 12
+    assert ledger.run_bytes[CLIENT] == 0
+    assert ledger.total_bytes[CLIENT] == 12
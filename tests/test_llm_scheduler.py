@@ -0,0 +1,110 @@
+import threading
+import time
+import pytest
+from utils.llm_backend import LLMError
+from utils.llm_scheduler import BULK, INTERACTIVE, LLMScheduler, TokenBucket
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = TokenBucket(60)
+    start = bucket._updated
+    bucket.take(60)
+
+    assert bucket.delay(1, now=start) == pytest.approx(1.0)
+    assert bucket.delay(1, now=start + 1) == pytest.approx(0.0)
+    assert bucket.delay(10, now=start + 4) == pytest.approx(6.0)
+
+def test_request_larger_than_the_bucket_only_needs_a_full_bucket():
+    bucket = TokenBucket(60, capacity=10)
+    assert bucket.delay(100, now=bucket._updated) == 0.0
+
+def test_unlimited_bucket_never_waits():
+    bucket = TokenBucket(0)
+    bucket.take(1000)
+    assert bucket.delay(1000) == 0.0
+
+def wait_for_depth(scheduler, lane, depth):
+    """Wait until a lane has the given number of waiting calls."""
+    deadline = time.monotonic() + 5
+    while scheduler.stats()["depth"][lane] != depth:
+        assert time.monotonic() < deadline, "calls did not queue up"
+        time.sleep(0.001)
+
+def queue_calls(scheduler, calls):
+    """
+    Queue (session_id, lane) calls one after the other behind a held slot,
+    then free the slot and return the order they were admitted in.
+    """
+    held = scheduler.acquire("holder")
+    order = []
+    threads = []
+    depth = {"interactive": 0, "bulk": 0}
+
+    def call(session_id, lane):
+        ticket = scheduler.acquire(session_id, lane, timeout=5)
+        order.append(session_id)
+        scheduler.release(ticket)
+
+    for session_id, lane in calls:
+        thread = threading.Thread(target=call, args=(session_id, lane))
+        thread.start()
+        threads.append(thread)
+        lane_name = "interactive" if lane == INTERACTIVE else "bulk"
+        depth[lane_name] += 1
+        wait_for_depth(scheduler, lane_name, depth[lane_name])
+
+    scheduler.release(held)
+    for thread in threads:
+        thread.join()
+    return order
+
+def test_sessions_take_turns_within_a_lane():
+    scheduler = LLMScheduler(max_concurrency=1)
+    order = queue_calls(scheduler, [("a", INTERACTIVE)] * 3 + [("b", INTERACTIVE), ("c", INTERACTIVE)])
+    assert order == ["a", "b", "c", "a", "a"]
+
+def test_interactive_calls_go_before_bulk_calls():
+    scheduler = LLMScheduler(max_concurrency=1)
+    order = queue_calls(scheduler, [("build", BULK), ("build", BULK), ("learner", INTERACTIVE)])
+    assert order == ["learner", "build", "build"]
+    assert scheduler.metrics["dispatched"] == {"interactive": 2, "bulk": 2}
+
+def test_waiting_call_is_told_its_position():
+    scheduler = LLMScheduler(max_concurrency=1)
+    held = scheduler.acquire("holder")
+    positions = []
+
+    def call():
+        scheduler.release(scheduler.acquire("learner", on_wait=positions.append, timeout=5))
+
+    thread = threading.Thread(target=call)
+    thread.start()
+    wait_for_depth(scheduler, "interactive", 1)
+    scheduler.release(held)
+    thread.join()
+
+    assert positions[0] == 1
+
+def test_call_gives_up_after_the_queue_timeout():
+    scheduler = LLMScheduler(max_concurrency=1)
+    held = scheduler.acquire("holder")
+
+    with pytest.raises(LLMError):
+        scheduler.acquire("learner", timeout=0.05)
+    assert scheduler.metrics["timeouts"] == 1
+    assert scheduler.stats()["depth"] == {"interactive": 0, "bulk": 0}
+    scheduler.release(held)
+
+def test_request_rate_limit_delays_the_next_call():
+    scheduler = LLMScheduler(requests_per_minute=60)
+    scheduler.request_bucket.tokens = 1
+    scheduler.release(scheduler.acquire("learner"))
+
+    started = time.monotonic()
+    scheduler.release(scheduler.acquire("learner", timeout=5))
+    assert time.monotonic() - started >= 0.5
+
+def test_actual_token_use_corrects_the_estimate():
+    scheduler = LLMScheduler(tokens_per_minute=1000)
+    with scheduler.slot("learner", tokens=100) as ticket:
+        ticket.used_tokens = 300
+    assert scheduler.token_bucket.tokens == pytest.approx(700, abs=5)
@@ -0,0 +1,86 @@
+import pytest
+from utils.course_manifest import CourseManifest
+from utils.progress_state import ProgressState
+
+def make_manifest(page_ids):
+    """Build a manifest of lesson pages from page IDs like "lesson_1_introduction"."""
+    entries = []
+    for page_id in page_ids:
+        _, lesson, section = page_id.split("_", 2)
+        entries.append({"id": page_id, "lesson": lesson, "section": section})
+    return CourseManifest(entries)
+
+PAGES = [
+    "lesson_1_introduction",
+    "lesson_1_examples",
+    "lesson_1_activities",
+    "lesson_1_reflection",
+    "lesson_2_introduction",
+    "lesson_2_examples"
+]
+
+def test_completed_pages_behave_like_a_set():
+    state = ProgressState(make_manifest(PAGES))
+    state.completed.add("lesson_1_examples")
+    state.completed.add("lesson_1_examples")
+    state.completed.add("not_a_page")
+
+    assert "lesson_1_examples" in state.completed
+    assert "lesson_1_introduction" not in state.completed
+    assert "not_a_page" in state.completed
+    assert len(state.completed) == 2
+
+    state.completed.discard("lesson_1_examples")
+    state.completed.discard("lesson_1_examples")
+    assert set(state.completed) == {"not_a_page"}
+
+def test_round_trip_keeps_bitsets_and_timestamps():
+    state = ProgressState(make_manifest(PAGES))
+    state.completed.add("lesson_1_introduction")
+    state.completed.add("lesson_2_examples")
+    assert state.record_visit("lesson_1_examples", now=1000)
+    assert not state.record_visit("lesson_1_examples", now=2000)
+    state.dismiss("lesson_1_examples")
+
+    restored = ProgressState.from_bytes(make_manifest(PAGES), state.to_bytes(include_timestamps=True))
+
+    assert set(restored.completed) == {"lesson_1_introduction", "lesson_2_examples"}
+    assert restored.seconds_since_first_visit("lesson_1_examples", now=1500) == 500
+    assert restored.is_dismissed("lesson_1_examples")
+    assert not restored.is_dismissed("lesson_2_examples")
+
+def test_round_trip_without_timestamps_is_a_few_bytes():
+    state = ProgressState(make_manifest(PAGES))
+    state.completed.add("lesson_1_reflection")
+    data = state.to_bytes()
+
+    restored = ProgressState.from_bytes(make_manifest(PAGES), data)
+    assert set(restored.completed) == {"lesson_1_reflection"}
+    assert len(data) < 20
+
+def test_from_bytes_rejects_another_page_order():
+    data = ProgressState(make_manifest(PAGES)).to_bytes()
+    with pytest.raises(ValueError):
+        ProgressState.from_bytes(make_manifest(PAGES + ["lesson_3_introduction"]), data)
+
+def test_from_bytes_rejects_truncated_data():
+    data = ProgressState(make_manifest(PAGES)).to_bytes()
+    with pytest.raises(ValueError):
+        ProgressState.from_bytes(make_manifest(PAGES), data[:-1])
+
+def test_remapped_moves_bits_to_the_new_page_indices():
+    state = ProgressState(make_manifest(PAGES))
+    state.completed.add("lesson_2_introduction")
+    state.completed.add("lesson_1_reflection")
+    state.record_visit("lesson_2_examples", now=1234)
+    state.dismiss("lesson_2_examples")
+
+    # Pages added before the completed ones shift their bit positions; a removed page is kept by ID
+    manifest = make_manifest(["lesson_0_introduction", "lesson_0_examples"] + PAGES[:3] + PAGES[4:])
+    remapped = state.remapped(manifest)
+
+    assert remapped.index_of("lesson_2_introduction") != state.index_of("lesson_2_introduction")
+    assert set(remapped.completed) == {"lesson_2_introduction", "lesson_1_reflection"}
+    assert remapped.seconds_since_first_visit("lesson_2_examples", now=1300) == 66
+    assert remapped.is_dismissed("lesson_2_examples")
+    assert ProgressState.from_bytes(manifest, remapped.to_bytes()).completed.bits == remapped.completed.bits
@@ -0,0 +1,108 @@
+import multiprocessing
+import threading
+import pytest
+from utils import progress_store
+from utils.delta_sync import make_envelope
+from utils.progress_store import FileProgressStore, SQLiteProgressStore
+
+LEARNER = "a" * 32
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    store = SQLiteProgressStore(str(tmp_path / "progress.db"), pool_size=2)
+    yield store
+    store.close()
+
+def test_every_write_and_clear_bumps_the_revision(sqlite_store):
+    assert sqlite_store.revision(LEARNER) == 0
+    assert sqlite_store.write_batch(LEARNER, [("completion", "lesson_1_examples", 100)]) == 1
+    assert sqlite_store.write_batch(LEARNER, [("progress", None, b"\x01\x02")]) == 2
+    sqlite_store.clear(LEARNER)
+
+    assert sqlite_store.revision(LEARNER) == 3
+    assert sqlite_store.load(LEARNER)["completions"] == {}
+
+def test_revisions_are_kept_per_learner(sqlite_store):
+    sqlite_store.write_batch(LEARNER, [("completion", "lesson_1_examples", 100)])
+    assert sqlite_store.revision("b" * 32) == 0
+
+def test_load_returns_what_was_written(sqlite_store):
+    sqlite_store.write_batch(LEARNER, [
+        ("progress", None, b"\x01\x02"),
+        ("completion", "lesson_1_examples", 100),
+        ("reflections", "lesson_1", make_envelope("My reflection", 1, 500))
+    ])
+    progress = sqlite_store.load(LEARNER)
+
+    assert progress["revision"] == 1
+    assert progress["progress"] == b"\x01\x02"
+    assert progress["completions"] == {"lesson_1_examples": 100}
+    assert progress["reflections"] == {"lesson_1": "My reflection"}
+    assert progress["updated_at"] == {"reflections/lesson_1": 500}
+
+def test_older_response_does_not_replace_a_newer_one(sqlite_store):
+    sqlite_store.write_batch(LEARNER, [("reflections", "lesson_1", make_envelope("newer", 2, 600))])
+    sqlite_store.write_batch(LEARNER, [("reflections", "lesson_1", make_envelope("older", 1, 500))])
+
+    assert sqlite_store.load(LEARNER)["reflections"] == {"lesson_1": "newer"}
+
+def test_concurrent_writers_get_distinct_revisions(sqlite_store):
+    revisions = []
+    lock = threading.Lock()
+
+    def write(index):
+        revision = sqlite_store.write_batch(LEARNER, [("completion", f"page_{index}", index)])
+        with lock:
+            revisions.append(revision)
+
+    threads = [threading.Thread(target=write, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(revisions) == list(range(1, 9))
+    assert len(sqlite_store.load(LEARNER)["completions"]) == 8
+
+@pytest.fixture
+def file_store(tmp_path):
+    return FileProgressStore(str(tmp_path / "progress_data"))
+
+def test_file_store_merges_batches_and_bumps_the_revision(file_store):
+    file_store.write_batch(LEARNER, [("completion", "lesson_1_examples", 100)])
+    file_store.write_batch(LEARNER, [
+        ("progress", None, b"\x01\x02"),
+        ("reflections", "lesson_1", make_envelope("newer", 2, 600))
+    ])
+    assert file_store.write_batch(LEARNER, [("reflections", "lesson_1", make_envelope("older", 1, 500))]) == 3
+
+    progress = file_store.load(LEARNER)
+    assert progress["completions"] == {"lesson_1_examples": 100}
+    assert progress["progress"] == b"\x01\x02"
+    assert progress["reflections"] == {"lesson_1": "newer"}
+
+    file_store.clear(LEARNER)
+    assert file_store.revision(LEARNER) == 4
+    assert file_store.load(LEARNER)["completions"] == {}
+
+def _write_pages(directory, worker, count):
+    """Write completions from a separate process, one batch per page."""
+    store = FileProgressStore(directory)
+    for index in range(count):
+        store.write_batch(LEARNER, [("completion", f"page_{worker}_{index}", index)])
+
+@pytest.mark.skipif(progress_store.fcntl is None, reason="flock is not available")
+def test_file_store_merges_writes_from_several_processes(file_store):
+    processes = [
+        multiprocessing.Process(target=_write_pages, args=(file_store.directory, worker, 25))
+        for worker in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    progress = file_store.load(LEARNER)
+    assert len(progress["completions"]) == 100
+    assert progress["revision"] == 100
@@ -0,0 +1,87 @@
+import sqlite3
+from utils import response_cache
+from utils.response_cache import ResponseCache, cache_key, get_response_cache
+
+IDENTITY = {"backend": "openai", "model": "test-model"}
+
+def disk_totals(path):
+    """Return the summed response sizes and the running total kept by the triggers."""
+    db = sqlite3.connect(path)
+    try:
+        summed = db.execute("SELECT COALESCE(SUM(size), 0) FROM response_cache").fetchone()[0]
+        total = db.execute("SELECT size FROM response_cache_total").fetchone()[0]
+        return summed, total
+    finally:
+        db.close()
+
+def test_cache_key_ignores_whitespace_but_not_the_backend():
+    assert cache_key("Write  a poem\n", IDENTITY) == cache_key("Write a poem", IDENTITY)
+    assert cache_key("Write a poem", IDENTITY) != cache_key("Write a poem", dict(IDENTITY, model="other"))
+
+def test_disk_tier_serves_responses_evicted_from_memory(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), memory_entries=1)
+    cache.put("a", "first", now=100)
+    cache.put("b", "second", now=101)
+
+    assert cache.memory_size() == 1
+    assert cache.get("a", now=102) == "first"
+    assert cache.metrics["disk_hits"] == 1
+    assert cache.get("a", now=103) == "first"
+    assert cache.metrics["memory_hits"] == 1
+
+def test_expired_responses_are_misses():
+    cache = ResponseCache(ttl=10)
+    cache.put("a", "text", now=100)
+    assert cache.get("a", now=111) is None
+    assert cache.metrics["expired"] == 1
+
+def test_memory_tier_is_bounded_by_bytes():
+    cache = ResponseCache(memory_entries=100, memory_max_bytes=250)
+    for index in range(5):
+        cache.put(f"k{index}", "x" * 100, now=100 + index)
+
+    assert cache.memory_size() == 2
+    assert cache.memory_bytes() == 200
+    cache.put("k4", "y" * 50, now=200)
+    assert cache.memory_bytes() == 150
+
+    # A response larger than the whole tier is not kept in memory
+    cache.put("big", "z" * 300, now=300)
+    assert cache.get("big", now=301) is None
+
+def test_disk_total_follows_writes_replacements_and_evictions(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(path, disk_max_bytes=350)
+    for index in range(5):
+        cache.put(f"k{index}", "x" * 100, now=100 + index)
+    assert disk_totals(path) == (300, 300)
+    assert cache.metrics["disk_evictions"] == 2
+
+    cache.put("k4", "y" * 50, now=200)
+    assert disk_totals(path) == (250, 250)
+
+    cache.clear()
+    assert disk_totals(path) == (0, 0)
+
+def test_disk_total_is_seeded_from_an_existing_database(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(path)
+    cache.put("a", "x" * 100, now=100)
+    db = sqlite3.connect(path)
+    db.executescript("DROP TABLE response_cache_total; DROP TRIGGER response_cache_total_insert;")
+    db.close()
+
+    ResponseCache(path)
+    assert disk_totals(path) == (100, 100)
+
+def test_unwritable_database_falls_back_to_memory(tmp_path, monkeypatch):
+    blocker = tmp_path / "not_a_directory"
+    blocker.write_text("")
+    monkeypatch.setenv("PROMPTENG_RESPONSE_CACHE_DB", str(blocker / "cache.db"))
+    monkeypatch.delenv("PROMPTENG_RESPONSE_CACHE", raising=False)
+    monkeypatch.setattr(response_cache, "_cache", None)
+
+    cache = get_response_cache()
+    cache.put("a", "text")
+    assert cache.get("a") == "text"
+    assert cache.metrics["disk_errors"] == 1
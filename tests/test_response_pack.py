@@ -0,0 +1,104 @@
+import os
+import pytest
+from utils import llm_backend, response_pack
+from utils.llm_backend import DemoBackend, LLMBackend
+from utils.response_pack import ResponsePack, build_pack, get_response_pack, write_pack
+
+IDENTITY = {"backend": "openai", "url": "http://localhost:8000/v1", "model": "test-model", "temperature": None}
+
+class RecordedBackend(LLMBackend):
+    """Backend that answers every prompt with a fixed text."""
+
+    name = "openai"
+    scheduled = False
+
+    def __init__(self, identity=IDENTITY):
+        self.identity = identity
+
+    def cache_identity(self):
+        return self.identity
+
+    def complete(self, prompt_text):
+        return f"Answer to {prompt_text}"
+
+@pytest.fixture
+def pack_path(tmp_path, monkeypatch):
+    """Point the app at a pack file in a temporary directory and forget any loaded pack."""
+    path = str(tmp_path / "response_pack.bin")
+    monkeypatch.setenv("PROMPTENG_RESPONSE_PACK_FILE", path)
+    monkeypatch.delenv("PROMPTENG_RESPONSE_PACK", raising=False)
+    monkeypatch.setattr(response_pack, "_pack", None)
+    monkeypatch.setattr(response_pack, "_pack_mtime", None)
+    monkeypatch.setattr(response_pack, "_pack_loaded", False)
+    monkeypatch.setattr(llm_backend, "get_llm_backend", lambda: RecordedBackend())
+    return path
+
+def test_pack_lookup_ignores_whitespace(tmp_path):
+    path = str(tmp_path / "pack.bin")
+    assert write_pack({"Write a  poem\n": "A poem", "Summarize": "A summary"}, path, {"backend": IDENTITY}) == 2
+
+    pack = ResponsePack(path)
+    assert pack.get("Write a poem") == "A poem"
+    assert pack.get("  Summarize ") == "A summary"
+    assert pack.get("Something else") is None
+    assert pack.metadata["backend"] == IDENTITY
+
+def test_pack_of_another_format_is_rejected(tmp_path):
+    path = tmp_path / "pack.bin"
+    path.write_bytes(b"not a pack at all")
+    with pytest.raises(ValueError):
+        ResponsePack(str(path))
+
+def test_pack_is_served_for_the_backend_it_was_built_with(pack_path):
+    write_pack({"Write a poem": "A poem"}, pack_path, {"backend": IDENTITY})
+    assert get_response_pack().get("Write a poem") == "A poem"
+
+def test_pack_from_another_model_is_not_served(pack_path):
+    write_pack({"Write a poem": "A poem"}, pack_path, {"backend": dict(IDENTITY, model="other-model")})
+    assert get_response_pack() is None
+
+def test_rebuilt_pack_is_reloaded(pack_path):
+    write_pack({"Write a poem": "Old poem"}, pack_path, {"backend": IDENTITY})
+    assert get_response_pack().get("Write a poem") == "Old poem"
+
+    write_pack({"Write a poem": "New poem"}, pack_path, {"backend": IDENTITY})
+    # Make sure the modification time differs even on coarse-grained file systems
+    stat = os.stat(pack_path)
+    os.utime(pack_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert get_response_pack().get("Write a poem") == "New poem"
+
+def test_removed_pack_is_no_longer_served(pack_path):
+    write_pack({"Write a poem": "A poem"}, pack_path, {"backend": IDENTITY})
+    assert get_response_pack() is not None
+    os.remove(pack_path)
+    assert get_response_pack() is None
+
+def test_pack_can_be_turned_off(pack_path, monkeypatch):
+    write_pack({"Write a poem": "A poem"}, pack_path, {"backend": IDENTITY})
+    monkeypatch.setenv("PROMPTENG_RESPONSE_PACK", "0")
+    assert get_response_pack() is None
+
+@pytest.fixture
+def pages_dir(tmp_path):
+    directory = tmp_path / "pages"
+    directory.mkdir()
+    (directory / "lesson_1_examples.py").write_text(
+        'client.send_prompt("Write a poem")\nexample = {"prompt": "Summarize"}\n', encoding="utf-8"
+    )
+    return str(directory)
+
+def test_build_pack_records_the_backend_identity(pages_dir, tmp_path):
+    output = str(tmp_path / "pack.bin")
+    assert build_pack(pages_dir, output=output, backend=RecordedBackend()) == (output, 2)
+
+    pack = ResponsePack(output)
+    assert pack.get("Summarize") == "Answer to Summarize"
+    assert pack.metadata["backend"] == IDENTITY
+
+def test_build_pack_refuses_the_demo_backend(pages_dir, tmp_path):
+    output = str(tmp_path / "pack.bin")
+    with pytest.raises(ValueError):
+        build_pack(pages_dir, output=output, backend=DemoBackend())
+    assert not os.path.exists(output)
+
+    assert build_pack(pages_dir, output=output, backend=DemoBackend(), allow_demo=True) == (output, 2)
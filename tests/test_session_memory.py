@@ -0,0 +1,54 @@
+import time
+from utils.session_memory import SessionMemoryManager, is_spillable_key
+
+def make_manager(tmp_path, **options):
+    options.setdefault("idle_ttl", 1800.0)
+    options.setdefault("sweep_interval", 3600.0)
+    return SessionMemoryManager(directory=str(tmp_path), **options)
+
+def test_only_the_response_store_is_spillable():
+    assert is_spillable_key("response_store")
+    assert not is_spillable_key("completed_pages")
+
+def test_idle_slot_is_spilled_and_read_back(tmp_path):
+    manager = make_manager(tmp_path)
+    slot = manager.new_slot()
+    manager.park(slot, {"response_store": "x" * 100})
+
+    assert manager.sweep(now=slot.last_seen + 1) == 0
+    assert manager.sweep(now=slot.last_seen + 1801) == 1
+    assert manager.stats()["spilled"] == 1
+    assert manager.take(slot) == {"response_store": "x" * 100}
+    assert manager.metrics["rehydrations"] == 1
+
+def test_spilled_slot_is_evicted_after_the_eviction_ttl(tmp_path):
+    manager = make_manager(tmp_path, evict_ttl=3600.0)
+    slot = manager.new_slot()
+    manager.park(slot, {"response_store": "x" * 100})
+    manager.sweep(now=slot.last_seen + 1801)
+    manager.sweep(now=slot.last_seen + 3601)
+
+    assert manager.metrics["evictions"] == 1
+    assert manager.take(slot) == {}
+
+def test_least_recently_seen_slots_are_spilled_beyond_the_budget(tmp_path):
+    manager = make_manager(tmp_path, memory_budget=250)
+    slots = [manager.new_slot() for _ in range(3)]
+    now = time.monotonic()
+    for index, slot in enumerate(slots):
+        manager.park(slot, {"response_store": "x" * 100})
+        slot.last_seen = now - 10 + index
+
+    assert manager.maybe_sweep() == 1
+    assert [slot.spilled for slot in slots] == [True, False, False]
+    assert manager.stats()["resident_bytes"] == 200
+    assert manager.metrics["budget_spills"] == 1
+
+def test_no_budget_keeps_every_slot_resident(tmp_path):
+    manager = make_manager(tmp_path)
+    slots = [manager.new_slot() for _ in range(3)]
+    for slot in slots:
+        manager.park(slot, {"response_store": "x" * 100000})
+
+    assert manager.maybe_sweep() == 0
+    assert manager.stats()["resident"] == 3
@@ -0,0 +1,47 @@
+import pytest
+from utils.simulated_responses import (
+    CORPUS_VERSION, DEFAULT_CORPUS_PATH, PhraseMatcher, ResponseSimulator, load_corpus
+)
+
+def make_corpus(*entries, default="No match for $prompt"):
+    return {"version": CORPUS_VERSION, "default": default, "responses": list(entries)}
+
+def test_matcher_finds_overlapping_and_nested_phrases():
+    matcher = PhraseMatcher([("he", 1), ("she", 2), ("his", 3), ("hers", 4)])
+    assert sorted(matcher.find("ushers")) == [("he", 1), ("hers", 4), ("she", 2)]
+
+def test_matcher_ignores_case_and_reports_every_occurrence():
+    matcher = PhraseMatcher([("Lesson Plan", "plan")])
+    assert list(matcher.find("A LESSON PLAN and another lesson plan")) == [("lesson plan", "plan")] * 2
+    assert list(matcher.find("lesson planning")) == [("lesson plan", "plan")]
+    assert list(matcher.find("lesson")) == []
+
+def test_highest_priority_entry_wins_wherever_it_matches():
+    simulator = ResponseSimulator(make_corpus(
+        {"id": "email", "triggers": ["email"], "priority": 10, "response": "Email"},
+        {"id": "quiz", "triggers": ["quiz", "assessment"], "priority": 30, "response": "Quiz about $trigger"}
+    ))
+    assert simulator.match("Write an email with a quiz") == ("quiz", "quiz")
+    assert simulator.respond("Draft an email about the assessment") == "Quiz about assessment"
+
+def test_earlier_entry_wins_a_priority_tie():
+    simulator = ResponseSimulator(make_corpus(
+        {"id": "first", "triggers": ["poem"], "response": "First"},
+        {"id": "second", "triggers": ["story"], "response": "Second"}
+    ))
+    assert simulator.match("A story and a poem") == ("first", "poem")
+
+def test_default_response_when_nothing_matches():
+    simulator = ResponseSimulator(make_corpus({"id": "quiz", "triggers": ["quiz"], "response": "Quiz"}))
+    assert simulator.match("Hello") == (None, None)
+    assert simulator.respond("Hello") == "No match for Hello"
+
+def test_malformed_corpus_is_rejected():
+    with pytest.raises(ValueError):
+        ResponseSimulator({"version": CORPUS_VERSION + 1, "responses": []})
+    with pytest.raises(ValueError):
+        ResponseSimulator(make_corpus({"id": "empty", "triggers": [], "response": "Nothing"}))
+
+def test_shipped_corpus_compiles():
+    simulator = ResponseSimulator(load_corpus(DEFAULT_CORPUS_PATH))
+    assert simulator.match("Suggest a restaurant near Times Square")[0] == "restaurants"
@@ -0,0 +1,73 @@
+import threading
+import time
+import pytest
+from utils.llm_backend import LLMError
+from utils.single_flight import SingleFlight
+
+def start_leader(flights, key, release, result="response"):
+    """Start a leader call that blocks until release is set, and wait until it is in flight."""
+    outcome = {}
+
+    def call():
+        release.wait(5)
+        return result
+
+    def run():
+        outcome["value"] = flights.run(key, call)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    while not flights.in_flight():
+        time.sleep(0.001)
+    return thread, outcome
+
+def test_concurrent_callers_share_the_leaders_result():
+    flights = SingleFlight(wait_timeout=5)
+    release = threading.Event()
+    leader, outcome = start_leader(flights, "prompt", release)
+
+    flight, is_leader = flights.begin("prompt")
+    assert not is_leader
+    release.set()
+    leader.join()
+
+    assert flights.wait(flight) == "response"
+    assert outcome["value"] == ("response", False)
+    assert flights.metrics["leaders"] == 1
+    assert flights.metrics["shared"] == 1
+    assert flights.in_flight() == 0
+
+def test_waiter_times_out_while_the_leader_is_slow():
+    flights = SingleFlight(wait_timeout=0.05)
+    release = threading.Event()
+    leader, _ = start_leader(flights, "prompt", release)
+    try:
+        with pytest.raises(LLMError):
+            flights.run("prompt", lambda: "not called")
+        assert flights.metrics["timeouts"] == 1
+    finally:
+        release.set()
+        leader.join()
+
+def test_leader_error_reaches_the_waiters():
+    flights = SingleFlight(wait_timeout=5)
+    flight, is_leader = flights.begin("prompt")
+    waiter, _ = flights.begin("prompt")
+    assert is_leader and waiter is flight
+
+    flights.finish("prompt", flight, error=ValueError("upstream failed"))
+
+    with pytest.raises(LLMError, match="upstream failed"):
+        flights.wait(flight)
+    assert flights.metrics["errors"] == 1
+    assert flights.metrics["timeouts"] == 0
+
+def test_failed_call_is_not_remembered():
+    flights = SingleFlight()
+
+    def fail():
+        raise LLMError("boom")
+
+    with pytest.raises(LLMError):
+        flights.run("prompt", fail)
+    assert flights.run("prompt", lambda: "retried") == ("retried", False)
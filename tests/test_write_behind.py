@@ -0,0 +1,75 @@
+import gc
+import pytest
+from utils.write_behind import WriteBehindQueue
+
+class RecordingWriter:
+    """Writer that records every batch and can be told to fail."""
+
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+
+    def __call__(self, batch):
+        if self.fail:
+            raise OSError("store unavailable")
+        self.batches.append(batch)
+
+def test_writes_to_the_same_key_are_coalesced():
+    writer = RecordingWriter()
+    queue = WriteBehindQueue(writer)
+    queue.put("completion", "lesson_1_examples", 1)
+    queue.put("reflections", "lesson_1", "first")
+    queue.put("reflections", "lesson_1", "second")
+
+    assert queue.pending_count() == 2
+    assert queue.flush() == 2
+    assert writer.batches == [[("completion", "lesson_1_examples", 1), ("reflections", "lesson_1", "second")]]
+    assert queue.metrics["coalesced"] == 1
+    assert not queue.is_dirty()
+    assert queue.flush() == 0
+    queue.discard()
+
+def test_reaching_the_limit_forces_a_flush():
+    writer = RecordingWriter()
+    queue = WriteBehindQueue(writer, max_pending=2)
+    queue.put("completion", "a", 1)
+    assert writer.batches == []
+    queue.put("completion", "b", 2)
+
+    assert len(writer.batches) == 1
+    assert queue.metrics["forced_flushes"] == 1
+    queue.discard()
+
+def test_failed_flush_keeps_entries_and_newer_values_win():
+    writer = RecordingWriter()
+    queue = WriteBehindQueue(writer)
+    queue.put("reflections", "lesson_1", "old")
+    writer.fail = True
+    with pytest.raises(OSError):
+        queue.flush()
+    assert queue.pending_count() == 1
+
+    queue.put("reflections", "lesson_1", "new")
+    writer.fail = False
+    queue.flush()
+    assert writer.batches == [[("reflections", "lesson_1", "new")]]
+    queue.discard()
+
+def test_pending_writes_are_flushed_when_the_queue_is_dropped():
+    writer = RecordingWriter()
+    queue = WriteBehindQueue(writer)
+    queue.put("progress", None, b"state")
+    del queue
+    gc.collect()
+
+    assert writer.batches == [[("progress", None, b"state")]]
+
+def test_discard_drops_pending_writes():
+    writer = RecordingWriter()
+    queue = WriteBehindQueue(writer)
+    queue.put("progress", None, b"state")
+    queue.discard()
+    del queue
+    gc.collect()
+
+    assert writer.batches == []
@@ -0,0 +1,174 @@
+import os
+import threading
+
+# Order of the sections inside every lesson
+SECTION_ORDER = ["introduction", "examples", "activities", "reflection"]
+
+# Root directory of the application and the pages it serves
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES_DIR = os.path.join(APP_DIR, "pages")
+
+def parse_page_id(page_id):
+    """
+    Derive lesson and section information from a page filename.
+
+    Parameters:
+    - page_id: Page filename without extension (e.g. "lesson_2_examples")
+
+    Returns:
+    - Tuple of (lesson, section), where lesson is "intro" for the course
+      introduction pages and section is "" when it cannot be determined
+    """
+    if page_id.startswith("course_"):
+        return "intro", page_id[len("course_"):]
+
+    if page_id.startswith("lesson_"):
+        parts = page_id.split("_")
+        if len(parts) >= 3:
+            return parts[1], parts[2]
+
+    return "", ""
+
+def _course_sort_key(entry):
+    """
+    Sort pages in course order: introduction, numbered lessons, then everything
+    else. Within a lesson, pages follow their section and then the order
+    declared in PAGE_INFO, with the page ID as the last tiebreak.
+    """
+    lesson = entry["lesson"]
+    section = entry["section"]
+    section_rank = SECTION_ORDER.index(section) if section in SECTION_ORDER else len(SECTION_ORDER)
+    order = entry.get("order")
+    order = order if isinstance(order, (int, float)) else 0
+
+    if lesson == "intro":
+        return (0, 0, section_rank, order, entry["id"])
+    if lesson.isdigit():
+        return (1, int(lesson), section_rank, order, entry["id"])
+    return (2, 0, section_rank, order, entry["id"])
+
+class CourseManifest:
+    """
+    Ordered page graph for the whole course.
+
+    Each page entry is a dictionary with the keys id, lesson, section, order,
+    title, page_title, dialog, text_fields, index, prev and next. Lookups and
+    neighbor queries are dictionary accesses, so callers can use them freely
+    on every rerun.
+    """
+
+    def __init__(self, entries, mtime=None):
+        """
+        Build the manifest from a list of page entries.
+
+        Parameters:
+        - entries: List of dictionaries with at least id, lesson and section keys
+        - mtime: Modification time of the pages directory the entries came from
+        """
+        self.mtime = mtime
+        self.pages = sorted(entries, key=_course_sort_key)
+        self._by_id = {}
+        self._lessons = {}
+
+        for index, entry in enumerate(self.pages):
+            entry["index"] = index
+            entry["prev"] = self.pages[index - 1]["id"] if index > 0 else None
+            entry["next"] = self.pages[index + 1]["id"] if index < len(self.pages) - 1 else None
+            self._by_id[entry["id"]] = entry
+            if entry["lesson"]:
+                self._lessons.setdefault(entry["lesson"], []).append(entry["id"])
+
+        # Alphabetical list kept for callers that expect get_all_pages() ordering
+        self.page_ids = sorted(self._by_id)
+
+        # Pages that count towards course progress (numbered lessons only)
+        self.lesson_page_ids = frozenset(
+            entry["id"] for entry in self.pages if entry["lesson"].isdigit()
+        )
+
+    def __contains__(self, page_id):
+        return page_id in self._by_id
+
+    def __len__(self):
+        return len(self.pages)
+
+    def get(self, page_id):
+        """Return the entry for a page, or None if the page does not exist."""
+        return self._by_id.get(page_id)
+
+    def next_page(self, page_id):
+        """Return the ID of the page after page_id in course order, or None."""
+        entry = self._by_id.get(page_id)
+        return entry["next"] if entry else None
+
+    def prev_page(self, page_id):
+        """Return the ID of the page before page_id in course order, or None."""
+        entry = self._by_id.get(page_id)
+        return entry["prev"] if entry else None
+
+    def lessons(self):
+        """Return the lesson identifiers in course order."""
+        return list(self._lessons)
+
+    def next_lesson(self, lesson):
+        """Return the lesson after the given one, or None if it is the last."""
+        lessons = list(self._lessons)
+        try:
+            index = lessons.index(lesson)
+        except ValueError:
+            return None
+        return lessons[index + 1] if index < len(lessons) - 1 else None
+
+    def lesson_pages(self, lesson):
+        """Return the page IDs of a lesson in section order."""
+        return list(self._lessons.get(lesson, []))
+
+def default_title(lesson, section, page_id):
+    """Build a readable title for a page from its lesson and section."""
+    if lesson == "intro":
+        return f"Course Introduction: {section.title()}"
+    if lesson.isdigit() and section:
+        return f"Lesson {lesson}: {section.title()}"
+    return page_id.replace("_", " ").title()
+
+def load_page_entries():
+    """
+    Load the page entries from the compiled manifest.
+
+    Uses the files written by utils.manifest_compiler when they are up to
+    date, and otherwise compiles the manifest in memory from the page sources.
+    """
+    # Import locally to avoid circular imports
+    from utils.manifest_compiler import compile_manifest, load_compiled_manifest
+
+    data = load_compiled_manifest() or compile_manifest()
+    return data["pages"]
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+def get_course_manifest():
+    """
+    Return the process-wide course manifest.
+
+    The manifest is built once and shared by every session. It is rebuilt
+    only when the modification time of the pages directory changes, so the
+    cost per call is a single stat() instead of a directory scan.
+    """
+    global _manifest
+
+    try:
+        mtime = os.stat(PAGES_DIR).st_mtime_ns
+    except OSError:
+        mtime = None
+
+    manifest = _manifest
+    if manifest is not None and manifest.mtime == mtime:
+        return manifest
+
+    with _manifest_lock:
+        # Another thread may have rebuilt it while we waited for the lock
+        if _manifest is None or _manifest.mtime != mtime:
+            entries = load_page_entries() if mtime is not None else []
+            _manifest = CourseManifest(entries, mtime)
+        return _manifest
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import threading
+import time
+
+# Copies of the learner's data that are kept in sync with session state
+CLIENT = "client"
+SERVER = "server"
+
+def digest(value):
+    """Return a short content hash of a JSON-serializable value or of bytes."""
+    if isinstance(value, (bytes, bytearray)):
+        encoded = bytes(value)
+    else:
+        encoded = json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=12).hexdigest()
+
+def encoded_size(value):
+    """Return the number of bytes a value takes when synced."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return len(json.dumps(value, default=str).encode("utf-8"))
+
+def make_envelope(value, version, updated_at):
+    """Wrap a value with the version information stored next to it."""
+    return {"value": value, "version": version, "updated_at": updated_at}
+
+def as_envelope(stored):
+    """Return a stored value as an envelope; values saved before versioning count as oldest."""
+    if isinstance(stored, dict) and "value" in stored and "updated_at" in stored:
+        return stored
+    return make_envelope(stored, 0, 0)
+
+def is_newer(a, b):
+    """
+    Last-writer-wins comparison of two envelopes.
+
+    Returns:
+    - True if envelope a should replace envelope b
+    """
+    if b is None:
+        return a is not None
+    if a is None:
+        return False
+    return (a.get("updated_at", 0), a.get("version", 0)) > (b.get("updated_at", 0), b.get("version", 0))
+
+class SyncLedger:
+    """
+    Per-key versions for one learner's data.
+
+    For every key the ledger remembers the current version, when it last
+    changed and the content hash last sent to each copy (the browser's
+    IndexedDB and the server store). Writers ask the ledger which keys
+    changed and send only those, and count the bytes they send so each
+    rerun can report how much was synced.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._synced = {CLIENT: {}, SERVER: {}}
+        self.run_bytes = {CLIENT: 0, SERVER: 0}
+        self.last_run_bytes = {CLIENT: 0, SERVER: 0}
+        self.total_bytes = {CLIENT: 0, SERVER: 0}
+        self.skipped = 0
+        # Server revision this session's copy matches, or None if unknown
+        self.revision = None
+
+    def stage(self, target, key, value, now=None):
+        """
+        Prepare a key for sending to one copy.
+
+        Parameters:
+        - target: CLIENT or SERVER
+        - key: Key of the value
+        - value: Current value
+
+        Returns:
+        - Envelope to send, or None if that copy already has this content
+        """
+        value_digest = digest(value)
+        with self._lock:
+            if self._synced[target].get(key) == value_digest:
+                self.skipped += 1
+                return None
+
+            version, updated_at, current_digest = self._versions.get(key, (0, 0, None))
+            if current_digest != value_digest:
+                version += 1
+                updated_at = int(now if now is not None else time.time())
+                self._versions[key] = (version, updated_at, value_digest)
+            return make_envelope(value, version, updated_at)
+
+    def confirm(self, target, key, envelope, size=None):
+        """
+        Record that a copy now holds an envelope.
+
+        Parameters:
+        - target: CLIENT or SERVER
+        - key: Key of the value
+        - envelope: Envelope that was sent or loaded
+        - size: Bytes sent, or None when the envelope was loaded rather than sent
+        """
+        value_digest = digest(envelope["value"])
+        with self._lock:
+            self._synced[target][key] = value_digest
+            version, updated_at, _ = self._versions.get(key, (0, 0, None))
+            if (envelope.get("updated_at", 0), envelope.get("version", 0)) >= (updated_at, version):
+                self._versions[key] = (envelope.get("version", 0), envelope.get("updated_at", 0), value_digest)
+            if size is not None:
+                self.run_bytes[target] += size
+                self.total_bytes[target] += size
+
+    def current(self, key):
+        """Return the (version, updated_at) of a key, or (0, 0) if it is unknown."""
+        version, updated_at, _ = self._versions.get(key, (0, 0, None))
+        return version, updated_at
+
+    def forget(self, target=None):
+        """Forget what a copy holds (or every copy), so everything is sent again."""
+        with self._lock:
+            for name in ([target] if target else list(self._synced)):
+                self._synced[name].clear()
+
+    def note_write(self, revision):
+        """
+        Record the server revision returned by one of this session's writes.
+
+        The session's copy stays current only if no other writer got in
+        between, i.e. the revision moved on by exactly one.
+        """
+        with self._lock:
+            if revision is None or self.revision is None or revision != self.revision + 1:
+                self.revision = None
+            else:
+                self.revision = revision
+
+    def end_run(self):
+        """Close the byte counters for this rerun."""
+        with self._lock:
+            self.last_run_bytes = dict(self.run_bytes)
+            self.run_bytes = {CLIENT: 0, SERVER: 0}
@@ -0,0 +1,70 @@
+from utils.delta_sync import digest
+from utils.write_behind import WriteBehindQueue
+
+# Sections whose text areas are autosaved as drafts
+DRAFT_SECTIONS = ("activities", "reflection")
+
+def draft_key(page_id, field):
+    """Key under which a text field's draft is saved."""
+    return f"{page_id}/{field}"
+
+class DraftAutosaver:
+    """
+    Autosave of one learner's free-text drafts.
+
+    Each text field is hashed when it is checked, so unchanged text is never
+    written again. The fields changed during a rerun are queued and written
+    together in one batch at the end of it.
+    """
+
+    def __init__(self, writer, max_pending=256):
+        """
+        Parameters:
+        - writer: Callable that receives a list of ("drafts", key, text) tuples
+        - max_pending: Number of changed fields that forces an immediate write
+        """
+        self.drafts = {}
+        self._digests = {}
+        self.queue = WriteBehindQueue(writer, max_pending=max_pending)
+        self.skipped = 0
+
+    def load(self, drafts):
+        """Remember drafts restored from storage without writing them back."""
+        for key, text in drafts.items():
+            self.drafts[key] = text
+            self._digests[key] = digest(text)
+
+    def get(self, page_id, field, default=None):
+        """Return the saved draft of a text field, or the default."""
+        return self.drafts.get(draft_key(page_id, field), default)
+
+    def update(self, page_id, field, text):
+        """
+        Record the current text of a field.
+
+        Returns:
+        - True if the text changed and was queued for saving
+        """
+        key = draft_key(page_id, field)
+        if not text and key not in self.drafts:
+            # An empty field that never had a draft
+            return False
+
+        text_digest = digest(text)
+        if self._digests.get(key) == text_digest:
+            self.skipped += 1
+            return False
+
+        self._digests[key] = text_digest
+        self.drafts[key] = text
+        self.queue.put("drafts", key, text)
+        return True
+
+    def flush(self):
+        """
+        Write the changed drafts.
+
+        Returns:
+        - Number of drafts written
+        """
+        return self.queue.flush()
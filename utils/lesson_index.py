@@ -0,0 +1,123 @@
+import os
+import re
+import threading
+import time
+
+# Matches the first "**Lesson X: Title**" line of a lesson markdown file
+LESSON_TITLE_PATTERN = re.compile(r'\*\*Lesson\s+\d+\s*:\s*([^\*]+)\*\*')
+
+# Seconds a built lesson list is reused before the title files are checked again
+RECHECK_INTERVAL = 5.0
+
+class LessonTitleIndex:
+    """
+    Process-wide cache of lesson titles parsed from Lessons/Lesson N.md.
+
+    Entries are keyed by file path and remember the modification time they
+    were parsed at, so only files that changed since the last lookup are
+    read again. The index is shared by every session.
+    """
+
+    def __init__(self):
+        self._titles = {}
+        self._structure = (None, {})
+        self._lessons = (None, 0.0, {})
+        self._lock = threading.Lock()
+
+    def title_for(self, path):
+        """
+        Return the title parsed from a lesson markdown file.
+
+        Parameters:
+        - path: Path to the markdown file
+
+        Returns:
+        - The title text, or None if the file is missing or has no title line
+        """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self._titles.pop(path, None)
+            return None
+
+        cached = self._titles.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        title = None
+        try:
+            with open(path, 'r') as f:
+                title_match = LESSON_TITLE_PATTERN.search(f.read())
+                if title_match:
+                    title = title_match.group(1).strip()
+        except Exception:
+            pass  # If can't read file, just use the default title
+
+        with self._lock:
+            self._titles[path] = (mtime, title)
+        return title
+
+    def lessons(self, all_pages, current_dir):
+        """
+        Return lesson information for the given pages.
+
+        The lesson and section structure is computed once per page list and
+        reused. The result is shared by every session and rebuilt at most
+        every RECHECK_INTERVAL seconds, when the titles are revalidated
+        against their files; callers must not modify it.
+
+        Parameters:
+        - all_pages: List of available page filenames
+        - current_dir: Root directory of the application
+
+        Returns:
+        - Dictionary keyed by lesson number with title, page and sections keys
+        """
+        key = (tuple(all_pages), current_dir)
+        now = time.monotonic()
+        lessons_key, checked_at, lessons = self._lessons
+        if lessons_key == key and now - checked_at < RECHECK_INTERVAL:
+            return lessons
+
+        cached_key, structure = self._structure
+        if cached_key != key:
+            structure = _build_lesson_structure(all_pages, current_dir)
+            with self._lock:
+                self._structure = (key, structure)
+
+        lessons = {}
+        for lesson_num, (md_path, page, sections) in structure.items():
+            title = self.title_for(md_path)
+            lessons[lesson_num] = {
+                "title": f"Lesson {lesson_num}: {title}" if title else f"Lesson {lesson_num}",
+                "page": page,
+                "sections": sections
+            }
+
+        with self._lock:
+            self._lessons = (key, now, lessons)
+        return lessons
+
+def _build_lesson_structure(all_pages, current_dir):
+    """Group page filenames by lesson number, keeping the sections in page order."""
+    structure = {}
+    for page in all_pages:
+        if page.startswith("lesson_"):
+            parts = page.split("_")
+            if len(parts) >= 3:
+                lesson_num = parts[1]
+                section = parts[2]
+
+                if lesson_num not in structure:
+                    md_path = os.path.join(current_dir, "Lessons", f"Lesson {lesson_num}.md")
+                    structure[lesson_num] = (md_path, f"lesson_{lesson_num}_introduction", [])
+
+                if section not in structure[lesson_num][2]:
+                    structure[lesson_num][2].append(section)
+    return structure
+
+_index = LessonTitleIndex()
+
+def get_lesson_index():
+    """Return the lesson title index shared by all sessions."""
+    return _index
@@ -0,0 +1,256 @@
+"""
+LLM backends used by TeacherClient.
+
+One backend is shared by every session in the process. The default "demo"
+backend returns canned responses; the "openai" backend talks to any
+OpenAI-compatible chat completions API (OpenAI itself, a proxy, or a local
+server) through a pooled keep-alive HTTP session, so clicks on "Try it"
+buttons reuse open connections instead of setting up new ones. The backend
+is selected with PROMPTENG_LLM_BACKEND; other backends can be added with
+register_llm_backend().
+"""
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from utils.settings import get_setting, get_int_setting, get_float_setting
+from utils.simulated_responses import simulate_response
+
+class LLMError(Exception):
+    """Raised when a backend cannot produce a response."""
+
+class LLMBackend:
+    """Interface of an LLM backend."""
+
+    name = "base"
+    # Whether responses may be served from the response cache
+    cacheable = True
+    # Whether calls wait their turn in the LLM scheduler
+    scheduled = True
+
+    def cache_identity(self):
+        """Return what besides the prompt determines a response: backend, model and parameters."""
+        return {"backend": self.name}
+
+    def complete(self, prompt_text):
+        """
+        Generate a response to a prompt.
+
+        Parameters:
+        - prompt_text: The prompt text
+
+        Returns:
+        - Response text
+
+        Raises:
+        - LLMError if no response could be generated
+        """
+        raise NotImplementedError
+
+    def stream(self, prompt_text):
+        """
+        Generate a response to a prompt as it is produced.
+
+        Backends that cannot stream yield the complete response as one chunk.
+
+        Parameters:
+        - prompt_text: The prompt text
+
+        Yields:
+        - Pieces of the response text
+
+        Raises:
+        - LLMError if no response could be generated
+        """
+        yield self.complete(prompt_text)
+
+class DemoBackend(LLMBackend):
+    """Backend that returns canned responses, for running the course without an API."""
+
+    name = "demo"
+    # Canned responses are cheaper than a cache lookup and need no rate limiting
+    cacheable = False
+    scheduled = False
+
+    def complete(self, prompt_text):
+        return simulate_response(prompt_text)["response"]
+
+    def stream(self, prompt_text):
+        # One word (with its trailing whitespace) at a time, like a model would
+        for chunk in re.findall(r"\s*\S+\s*", self.complete(prompt_text)):
+            yield chunk
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Backend for OpenAI-compatible chat completions APIs."""
+
+    name = "openai"
+
+    def __init__(self, base_url, model, api_key=None, session=None, timeout=(5.0, 60.0), temperature=None):
+        """
+        Parameters:
+        - base_url: API base URL, e.g. "https://api.openai.com/v1" or "http://localhost:8000/v1"
+        - model: Model name sent with every request
+        - api_key: Bearer token, or None for servers that need none
+        - session: requests.Session to send requests with (defaults to the shared pooled session)
+        - timeout: (connect, read) timeouts in seconds
+        - temperature: Sampling temperature, or None for the server's default
+        """
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.model = model
+        self.api_key = api_key
+        self.session = session or get_http_session()
+        self.timeout = timeout
+        self.temperature = temperature
+
+    def cache_identity(self):
+        return {"backend": self.name, "url": self.url, "model": self.model, "temperature": self.temperature}
+
+    def _build_request(self, prompt_text, stream=False):
+        """Return the headers and JSON body for a prompt."""
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        body = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt_text}]
+        }
+        if self.temperature is not None:
+            body["temperature"] = self.temperature
+        if stream:
+            body["stream"] = True
+        return headers, body
+
+    def _post(self, prompt_text, stream=False):
+        """Send a prompt and return the HTTP response, raising LLMError on failure."""
+        headers, body = self._build_request(prompt_text, stream)
+        try:
+            response = self.session.post(self.url, json=body, headers=headers, timeout=self.timeout, stream=stream)
+        except requests.RequestException as e:
+            raise LLMError(f"Could not reach the AI service: {e}") from e
+
+        if response.status_code != 200:
+            message = response.text[:200]
+            response.close()
+            raise LLMError(f"AI service returned HTTP {response.status_code}: {message}")
+        return response
+
+    def complete(self, prompt_text):
+        response = self._post(prompt_text)
+        try:
+            return response.json()["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise LLMError("AI service returned an unexpected response") from e
+
+    def stream(self, prompt_text):
+        # Server-sent events: one "data: {json}" line per chunk, then "data: [DONE]"
+        with self._post(prompt_text, stream=True) as response:
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        return
+                    try:
+                        content = json.loads(data)["choices"][0]["delta"].get("content")
+                    except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+                        raise LLMError("AI service returned an unexpected response") from e
+                    if content:
+                        yield content
+            except requests.RequestException as e:
+                raise LLMError(f"Connection to the AI service was lost: {e}") from e
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_http_session():
+    """
+    Return the keep-alive HTTP session shared by every backend in this process.
+
+    The connection pool size and retry count come from PROMPTENG_LLM_POOL_SIZE
+    and PROMPTENG_LLM_MAX_RETRIES.
+    """
+    global _session
+
+    if _session is not None:
+        return _session
+
+    with _session_lock:
+        if _session is None:
+            pool_size = max(1, get_int_setting("LLM_POOL_SIZE", 10))
+            # Retries only cover failed connections, never a request the server received
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                                  max_retries=max(0, get_int_setting("LLM_MAX_RETRIES", 1)))
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+    return _session
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_llm_executor():
+    """
+    Return the thread pool used to send several prompts at once.
+
+    The pool has PROMPTENG_LLM_MAX_WORKERS threads, by default as many as
+    there are pooled HTTP connections.
+    """
+    global _executor
+
+    if _executor is not None:
+        return _executor
+
+    with _executor_lock:
+        if _executor is None:
+            workers = get_int_setting("LLM_MAX_WORKERS", get_int_setting("LLM_POOL_SIZE", 10))
+            _executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="llm")
+    return _executor
+
+def _create_openai_backend():
+    """Create the OpenAI-compatible backend from the PROMPTENG_LLM_* settings."""
+    return OpenAICompatibleBackend(
+        base_url=get_setting("LLM_BASE_URL", "https://api.openai.com/v1"),
+        model=get_setting("LLM_MODEL", "gpt-4o-mini"),
+        api_key=get_setting("LLM_API_KEY", os.environ.get("OPENAI_API_KEY")),
+        timeout=(get_float_setting("LLM_CONNECT_TIMEOUT", 5.0), get_float_setting("LLM_READ_TIMEOUT", 60.0)),
+        temperature=get_float_setting("LLM_TEMPERATURE", None)
+    )
+
+# Backend factories by name, selected with PROMPTENG_LLM_BACKEND
+_backend_factories = {
+    "demo": DemoBackend,
+    "openai": _create_openai_backend
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def register_llm_backend(name, factory):
+    """
+    Register an LLM backend.
+
+    Parameters:
+    - name: Name used in PROMPTENG_LLM_BACKEND
+    - factory: Callable that returns an LLMBackend
+    """
+    _backend_factories[name] = factory
+
+def get_llm_backend():
+    """Return the LLM backend shared by every session in this process."""
+    global _backend
+
+    if _backend is not None:
+        return _backend
+
+    with _backend_lock:
+        if _backend is None:
+            name = get_setting("LLM_BACKEND", "demo").strip().lower()
+            if name not in _backend_factories:
+                raise ValueError(f"Unknown LLM backend: {name}")
+            _backend = _backend_factories[name]()
+    return _backend
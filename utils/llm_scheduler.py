@@ -0,0 +1,291 @@
+"""
+Process-wide scheduler for LLM calls.
+
+Every call to a rate-limited backend waits here for its turn. The scheduler
+keeps the provider's limits with two token buckets, one for requests per
+minute and one for tokens per minute, and bounds the number of calls in
+progress. Waiting calls are queued in priority lanes (interactive clicks
+before bulk jobs); within a lane, sessions take turns, so one learner or
+cohort firing many prompts cannot starve the others. Callers can be told
+their position in the queue while they wait.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from utils.llm_backend import LLMError
+from utils.settings import get_int_setting, get_float_setting
+
+# Priority lanes, served in this order
+INTERACTIVE = 0
+BULK = 1
+LANES = (INTERACTIVE, BULK)
+LANE_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+# How often waiting callers are told their queue position, in seconds
+POSITION_INTERVAL = 0.5
+
+def estimate_tokens(text):
+    """Rough token count of a text (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+# Completion length assumed when admitting a request, corrected once it is done
+EXPECTED_COMPLETION_TOKENS = 300
+
+def estimate_request_tokens(prompt_text):
+    """Tokens a request is expected to use: its prompt plus a typical completion."""
+    return estimate_tokens(prompt_text) + EXPECTED_COMPLETION_TOKENS
+
+class TokenBucket:
+    """Token bucket refilled continuously at a rate per minute. A rate of 0 means unlimited."""
+
+    def __init__(self, per_minute, capacity=None):
+        """
+        Parameters:
+        - per_minute: Tokens added per minute
+        - capacity: Maximum tokens held, i.e. the largest burst (defaults to one minute's worth)
+        """
+        self.per_minute = max(0.0, per_minute)
+        self.capacity = float(capacity if capacity is not None else self.per_minute)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.per_minute / 60.0)
+        self._updated = now
+
+    def delay(self, amount, now=None):
+        """Return the seconds until amount tokens are available (0 if they are now)."""
+        if not self.per_minute:
+            return 0.0
+        self._refill(time.monotonic() if now is None else now)
+        # A request larger than the bucket only needs a full bucket
+        missing = min(amount, self.capacity) - self.tokens
+        return 0.0 if missing <= 0 else missing * 60.0 / self.per_minute
+
+    def take(self, amount):
+        """Remove tokens; the balance may go negative when a request used more than estimated."""
+        if self.per_minute:
+            self.tokens -= amount
+
+class Ticket:
+    """A call waiting for, or holding, a place in the scheduler."""
+
+    def __init__(self, session_id, lane, tokens):
+        self.id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.lane = lane
+        self.tokens = tokens
+        self.enqueued_at = time.monotonic()
+        self.wait_seconds = 0.0
+
+class LLMScheduler:
+    """Rate-limited, fair, prioritized admission of LLM calls."""
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, max_concurrency=0, queue_timeout=120.0):
+        """
+        Parameters:
+        - requests_per_minute: Request rate limit (0 is unlimited)
+        - tokens_per_minute: Token rate limit (0 is unlimited)
+        - max_concurrency: Maximum calls in progress at once (0 is unlimited)
+        - queue_timeout: Maximum seconds a call waits before giving up
+        """
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max(0, max_concurrency)
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        # Lane -> session -> waiting tickets; the first session in each lane is served next
+        self._queues = {lane: OrderedDict() for lane in LANES}
+        self._depth = 0
+        self._active = 0
+        self.metrics = {
+            "queued": 0,
+            "max_queued": 0,
+            "active": 0,
+            "dispatched": {LANE_NAMES[lane]: 0 for lane in LANES},
+            "timeouts": 0,
+            "last_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+            "total_wait_ms": 0.0
+        }
+
+    def _enqueue(self, ticket):
+        self._queues[ticket.lane].setdefault(ticket.session_id, deque()).append(ticket)
+        self._depth += 1
+        self.metrics["queued"] = self._depth
+        self.metrics["max_queued"] = max(self.metrics["max_queued"], self._depth)
+
+    def _dequeue(self, ticket):
+        """Remove a ticket; the session goes to the back of its lane if it has more waiting."""
+        sessions = self._queues[ticket.lane]
+        waiting = sessions.get(ticket.session_id)
+        if not waiting or ticket not in waiting:
+            return
+        served_first = waiting[0] is ticket
+        waiting.remove(ticket)
+        if not waiting:
+            del sessions[ticket.session_id]
+        elif served_first:
+            sessions.move_to_end(ticket.session_id)
+        self._depth -= 1
+        self.metrics["queued"] = self._depth
+
+    def _head(self):
+        """Return the ticket to be served next, or None."""
+        for lane in LANES:
+            for waiting in self._queues[lane].values():
+                return waiting[0]
+        return None
+
+    def _position(self, ticket):
+        """Return the 1-based position of a ticket in the order the queue would be served."""
+        position = 0
+        for lane in LANES:
+            queues = [list(waiting) for waiting in self._queues[lane].values()]
+            # Sessions take turns: the first ticket of each, then the second of each, ...
+            for turn in range(max((len(waiting) for waiting in queues), default=0)):
+                for waiting in queues:
+                    if turn < len(waiting):
+                        position += 1
+                        if waiting[turn] is ticket:
+                            return position
+        return position
+
+    def _admit_delay(self, ticket):
+        """Return 0 if the head ticket may start now, otherwise the seconds to wait."""
+        if self.max_concurrency and self._active >= self.max_concurrency:
+            return POSITION_INTERVAL
+        return max(self.request_bucket.delay(1), self.token_bucket.delay(ticket.tokens))
+
+    def acquire(self, session_id, lane=INTERACTIVE, tokens=1, on_wait=None, timeout=None):
+        """
+        Wait for a turn to call the backend.
+
+        Parameters:
+        - session_id: ID of the session making the call, for fair queuing
+        - lane: INTERACTIVE or BULK
+        - tokens: Estimated tokens the call will use
+        - on_wait: Optional callable receiving the queue position while the call waits
+        - timeout: Maximum seconds to wait (defaults to the scheduler's queue timeout)
+
+        Returns:
+        - The admitted Ticket; pass it to release() when the call is done
+
+        Raises:
+        - LLMError if the call waited longer than the timeout
+        """
+        ticket = Ticket(session_id, lane, tokens)
+        timeout = self.queue_timeout if timeout is None else timeout
+        deadline = ticket.enqueued_at + timeout
+        last_position = None
+
+        self._cond.acquire()
+        try:
+            self._enqueue(ticket)
+            while True:
+                if self._head() is ticket:
+                    delay = self._admit_delay(ticket)
+                    if delay <= 0:
+                        break
+                else:
+                    delay = POSITION_INTERVAL
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.metrics["timeouts"] += 1
+                    raise LLMError("The AI service is busy right now. Please try again in a moment.")
+
+                if on_wait is not None:
+                    position = self._position(ticket)
+                    if position != last_position:
+                        last_position = position
+                        # Call back without holding the lock
+                        self._cond.release()
+                        try:
+                            on_wait(position)
+                        finally:
+                            self._cond.acquire()
+                        continue
+                self._cond.wait(min(delay, remaining, POSITION_INTERVAL))
+
+            # Admitted: take the rate-limit tokens and a concurrency slot
+            self._dequeue(ticket)
+            self.request_bucket.take(1)
+            self.token_bucket.take(ticket.tokens)
+            self._active += 1
+            self.metrics["active"] = self._active
+
+            ticket.wait_seconds = time.monotonic() - ticket.enqueued_at
+            wait_ms = ticket.wait_seconds * 1000
+            self.metrics["dispatched"][LANE_NAMES[lane]] += 1
+            self.metrics["last_wait_ms"] = wait_ms
+            self.metrics["max_wait_ms"] = max(self.metrics["max_wait_ms"], wait_ms)
+            self.metrics["total_wait_ms"] += wait_ms
+            return ticket
+        except BaseException:
+            self._dequeue(ticket)
+            raise
+        finally:
+            # The next ticket may be able to start now
+            self._cond.notify_all()
+            self._cond.release()
+
+    def release(self, ticket, used_tokens=None):
+        """
+        Free a call's concurrency slot.
+
+        Parameters:
+        - ticket: Ticket returned by acquire()
+        - used_tokens: Tokens the call actually used, to correct the estimate
+        """
+        with self._cond:
+            self._active -= 1
+            self.metrics["active"] = self._active
+            if used_tokens is not None:
+                self.token_bucket.take(used_tokens - ticket.tokens)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, session_id, lane=INTERACTIVE, tokens=1, on_wait=None):
+        """Context manager around acquire() and release(); sets ticket.used_tokens to correct the estimate."""
+        ticket = self.acquire(session_id, lane, tokens, on_wait)
+        ticket.used_tokens = None
+        try:
+            yield ticket
+        finally:
+            self.release(ticket, ticket.used_tokens)
+
+    def stats(self):
+        """Return the queue depth per lane and the scheduler metrics."""
+        with self._cond:
+            depth = {LANE_NAMES[lane]: sum(len(waiting) for waiting in self._queues[lane].values()) for lane in LANES}
+            return dict(self.metrics, depth=depth)
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_llm_scheduler():
+    """
+    Return the scheduler shared by every session in this process.
+
+    Limits come from PROMPTENG_LLM_RPM, PROMPTENG_LLM_TPM and
+    PROMPTENG_LLM_MAX_CONCURRENCY (0 means unlimited; concurrency defaults
+    to the connection pool size), and calls give up after
+    PROMPTENG_LLM_QUEUE_TIMEOUT seconds in the queue.
+    """
+    global _scheduler
+
+    if _scheduler is not None:
+        return _scheduler
+
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(
+                requests_per_minute=get_float_setting("LLM_RPM", 0.0),
+                tokens_per_minute=get_float_setting("LLM_TPM", 0.0),
+                max_concurrency=get_int_setting("LLM_MAX_CONCURRENCY", get_int_setting("LLM_POOL_SIZE", 10)),
+                queue_timeout=get_float_setting("LLM_QUEUE_TIMEOUT", 120.0)
+            )
+    return _scheduler
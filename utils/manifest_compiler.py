@@ -0,0 +1,254 @@
+"""
+Static course-manifest compiler.
+
+Reads every page script in pages/ with the ast module - without importing or
+executing it - and collects its PAGE_INFO, browser title, first-visit
+dialog text (FIRST_VISIT_DIALOG, or a literal show_first_visit_dialog call) and the keys of
+its text areas. The result is written as JSON, which utils.course_manifest
+loads at startup.
+
+Usage:
+    python -m utils.manifest_compiler [--pages-dir DIR] [--output-dir DIR]
+"""
+import argparse
+import ast
+import json
+import os
+import sys
+
+from utils.course_manifest import (
+    APP_DIR,
+    PAGES_DIR,
+    SECTION_ORDER,
+    default_title,
+    parse_page_id,
+)
+
+MANIFEST_VERSION = 3
+MANIFEST_JSON = "course_manifest.json"
+
+# Module holding the shared first-visit descriptions used by the course pages
+DIALOG_DESCRIPTIONS_PATH = os.path.join(APP_DIR, "components", "first_visit_dialog.py")
+
+def _literal(node):
+    """Return the literal value of an AST node, or None if it is not a literal."""
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError):
+        return None
+
+def _call_name(call):
+    """Return the simple or attribute name of a called function."""
+    if isinstance(call.func, ast.Name):
+        return call.func.id
+    if isinstance(call.func, ast.Attribute):
+        return call.func.attr
+    return None
+
+def _call_argument(call, position, keyword):
+    """Return the literal value of a call argument given by position or keyword."""
+    if len(call.args) > position:
+        return _literal(call.args[position])
+    for kw in call.keywords:
+        if kw.arg == keyword:
+            return _literal(kw.value)
+    return None
+
+def _has_default_text(call):
+    """Return True if a text_area call passes default text other than an empty string."""
+    value = call.args[1] if len(call.args) > 1 else None
+    for kw in call.keywords:
+        if kw.arg == "value":
+            value = kw.value
+    if value is None:
+        return False
+    if isinstance(value, ast.Constant):
+        return value.value not in ("", None)
+    # Text computed at run time
+    return True
+
+def parse_page_source(source, page_id):
+    """
+    Extract page metadata from the source code of a page script.
+
+    Parameters:
+    - source: Python source of the page
+    - page_id: Page filename without extension
+
+    Returns:
+    - Dictionary with page_info, page_title and dialog keys (each may be None)
+      and text_fields, the literal keys of the page's text areas that start
+      out empty (a text area with its own default text cannot also be
+      filled from session state)
+    """
+    tree = ast.parse(source, filename=f"{page_id}.py")
+    result = {"page_info": None, "page_title": None, "dialog": None, "text_fields": []}
+
+    for node in tree.body:
+        if not isinstance(node, ast.Assign):
+            continue
+        names = {target.id for target in node.targets if isinstance(target, ast.Name)}
+        if "PAGE_INFO" in names:
+            value = _literal(node.value)
+            if isinstance(value, dict):
+                result["page_info"] = value
+        elif "FIRST_VISIT_DIALOG" in names:
+            value = _literal(node.value)
+            if isinstance(value, dict) and "title" in value and "message" in value:
+                result["dialog"] = {"title": value["title"], "message": value["message"]}
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+
+        name = _call_name(node)
+        if name in ("set_page_config", "set_standard_page_config") and result["page_title"] is None:
+            keyword = "page_title" if name == "set_page_config" else "title"
+            result["page_title"] = _call_argument(node, 0, keyword)
+        elif name == "render_page" and result["page_title"] is None:
+            result["page_title"] = _call_argument(node, 2, "page_title")
+        elif name == "text_area":
+            key = _call_argument(node, len(node.args), "key")
+            if _has_default_text(node):
+                continue
+            if isinstance(key, str) and key not in result["text_fields"]:
+                result["text_fields"].append(key)
+        elif name == "show_first_visit_dialog" and result["dialog"] is None:
+            title = _call_argument(node, 2, "title")
+            message = _call_argument(node, 3, "message")
+            if isinstance(title, str) and isinstance(message, str):
+                result["dialog"] = {"title": title, "message": message}
+
+    return result
+
+def load_dialog_descriptions(path=DIALOG_DESCRIPTIONS_PATH):
+    """Read the PAGE_DESCRIPTIONS dictionary from the first-visit dialog module."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError):
+        return {}
+
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == "PAGE_DESCRIPTIONS" for target in node.targets
+        ):
+            value = _literal(node.value)
+            if isinstance(value, dict):
+                return value
+    return {}
+
+def source_mtime(pages_dir=PAGES_DIR):
+    """
+    Return the newest modification time of the pages directory and its scripts.
+
+    A compiled manifest is only trusted when this value matches the one it
+    was built from.
+    """
+    newest = max(os.stat(pages_dir).st_mtime_ns, os.stat(DIALOG_DESCRIPTIONS_PATH).st_mtime_ns)
+    with os.scandir(pages_dir) as it:
+        for entry in it:
+            if entry.name.endswith(".py"):
+                newest = max(newest, entry.stat().st_mtime_ns)
+    return newest
+
+def compile_manifest(pages_dir=PAGES_DIR):
+    """
+    Build the manifest data for every page script in pages_dir.
+
+    Parameters:
+    - pages_dir: Directory containing the page scripts
+
+    Returns:
+    - Dictionary with version, source_mtime, sections and pages keys
+    """
+    descriptions = load_dialog_descriptions()
+    pages = []
+
+    for filename in sorted(os.listdir(pages_dir)):
+        if not filename.endswith(".py") or filename.startswith("__"):
+            continue
+
+        page_id = filename[:-3]
+        with open(os.path.join(pages_dir, filename), "r", encoding="utf-8") as f:
+            parsed = parse_page_source(f.read(), page_id)
+
+        # Fall back to the filename for pages that do not declare PAGE_INFO
+        lesson, section = parse_page_id(page_id)
+        page_info = parsed["page_info"] or {}
+        lesson = str(page_info.get("lesson", lesson))
+        section = page_info.get("section", section)
+        order = page_info.get("order", SECTION_ORDER.index(section) + 1 if section in SECTION_ORDER else 0)
+
+        pages.append({
+            "id": page_id,
+            "lesson": lesson,
+            "section": section,
+            "order": order,
+            "title": page_info.get("title") or default_title(lesson, section, page_id),
+            "page_title": parsed["page_title"],
+            "dialog": parsed["dialog"] or descriptions.get(page_id),
+            "text_fields": parsed["text_fields"]
+        })
+
+    return {
+        "version": MANIFEST_VERSION,
+        "source_mtime": source_mtime(pages_dir),
+        "sections": list(SECTION_ORDER),
+        "pages": pages
+    }
+
+def write_manifest(data, output_dir=APP_DIR):
+    """
+    Write the manifest as JSON.
+
+    Returns:
+    - Path of the written file
+    """
+    json_path = os.path.join(output_dir, MANIFEST_JSON)
+
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"), ensure_ascii=False)
+
+    return json_path
+
+def load_compiled_manifest(pages_dir=PAGES_DIR, output_dir=APP_DIR):
+    """
+    Load a previously compiled manifest if it is still current.
+
+    Returns None when no manifest exists or it is out of date.
+    """
+    json_path = os.path.join(output_dir, MANIFEST_JSON)
+
+    try:
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return None
+    try:
+        if data.get("source_mtime") != source_mtime(pages_dir):
+            return None
+    except OSError:
+        return None
+    return data
+
+def main(argv=None):
+    """Command-line entry point for compiling the course manifest."""
+    parser = argparse.ArgumentParser(description="Compile the course manifest from the page scripts.")
+    parser.add_argument("--pages-dir", default=PAGES_DIR, help="Directory containing the page scripts")
+    parser.add_argument("--output-dir", default=APP_DIR, help="Directory to write the manifest files to")
+    args = parser.parse_args(argv)
+
+    data = compile_manifest(args.pages_dir)
+    json_path = write_manifest(data, args.output_dir)
+
+    lessons = {page["lesson"] for page in data["pages"] if page["lesson"]}
+    print(f"Compiled {len(data['pages'])} pages in {len(lessons)} lessons")
+    print(f"  {json_path} ({os.path.getsize(json_path)} bytes)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import streamlit as st
+from utils.router import router_owns_shell
 
 def set_standard_page_config(title="Prompt Engineering Course", icon_path="images/favicon_io/favicon.ico"):
     """
@@ -11,6 +12,10 @@ def set_standard_page_config(title="Prompt Engineering Course", icon_path="image
     Returns:
     None
     """
+    # In router mode the entrypoint has already configured the page
+    if router_owns_shell():
+        return
+    
     st.set_page_config(
         page_title=title,
         page_icon=icon_path,
@@ -0,0 +1,113 @@
+class ProgressTracker:
+    """
+    Incremental course progress for one learner.
+
+    Keeps per-lesson and per-section counters that are updated as pages are
+    marked completed, so progress queries never rescan the completed pages.
+    The set of pages that count towards progress comes from the course
+    manifest (every page of a numbered lesson), not from a fixed constant.
+    """
+
+    def __init__(self, manifest, completed=None):
+        """
+        Build a tracker for the given manifest.
+
+        Parameters:
+        - manifest: CourseManifest describing the course pages
+        - completed: Set of completed page IDs to track (shared, not copied)
+        """
+        self.manifest = manifest
+        self.completed = completed if completed is not None else set()
+
+        self._lessons = manifest.lessons()
+        self._lesson_totals = {lesson: len(manifest.lesson_pages(lesson)) for lesson in self._lessons}
+        self._lesson_counts = dict.fromkeys(self._lessons, 0)
+        self._section_totals = {}
+        self._section_counts = {}
+        for entry in manifest.pages:
+            if entry["id"] in manifest.lesson_page_ids:
+                self._section_totals[entry["section"]] = self._section_totals.get(entry["section"], 0) + 1
+                self._section_counts.setdefault(entry["section"], 0)
+        self._course_total = len(manifest.lesson_page_ids)
+        self._course_count = 0
+        self._frontier = 0
+        self._tracked = 0
+
+        for page_id in self.completed:
+            self._count(page_id)
+        self._tracked = len(self.completed)
+        self._advance_frontier()
+
+    def _count(self, page_id):
+        """Update the counters for a newly completed page."""
+        entry = self.manifest.get(page_id)
+        if entry is None:
+            return
+
+        if entry["lesson"] in self._lesson_counts:
+            self._lesson_counts[entry["lesson"]] += 1
+        if page_id in self.manifest.lesson_page_ids:
+            self._course_count += 1
+            self._section_counts[entry["section"]] += 1
+
+    def _advance_frontier(self):
+        """Move the unlocked-lesson pointer past every lesson whose reflection is done."""
+        while self._frontier < len(self._lessons) and self.is_lesson_complete(self._lessons[self._frontier]):
+            self._frontier += 1
+
+    def is_in_sync(self):
+        """Return False if the completed set was changed without going through mark()."""
+        return self._tracked == len(self.completed)
+
+    def mark(self, page_id):
+        """
+        Mark a page as completed.
+
+        Returns:
+        - True if the page was not completed before
+        """
+        if page_id in self.completed:
+            return False
+
+        self.completed.add(page_id)
+        self._tracked += 1
+        self._count(page_id)
+        self._advance_frontier()
+        return True
+
+    def percent(self):
+        """Return the overall course completion as an integer percentage."""
+        if self._course_total == 0:
+            return 0
+        return int((self._course_count / self._course_total) * 100)
+
+    def lesson_completion(self, lesson):
+        """Return the fraction (0.0 - 1.0) of a lesson's pages that are completed."""
+        total = self._lesson_totals.get(lesson, 0)
+        if total == 0:
+            return 0.0
+        return self._lesson_counts[lesson] / total
+
+    def section_completion(self, section):
+        """Return the fraction (0.0 - 1.0) of a section type's pages completed across all lessons."""
+        total = self._section_totals.get(section, 0)
+        if total == 0:
+            return 0.0
+        return self._section_counts[section] / total
+
+    def is_lesson_complete(self, lesson):
+        """A lesson is complete once its reflection page is completed."""
+        if lesson == "intro":
+            return "course_reflection" in self.completed
+        return f"lesson_{lesson}_reflection" in self.completed
+
+    def next_unlocked_lesson(self):
+        """
+        Return the first lesson that is unlocked but not yet completed.
+
+        Returns:
+        - Lesson identifier ("intro", "1", ...), or None once every lesson is complete
+        """
+        if self._frontier < len(self._lessons):
+            return self._lessons[self._frontier]
+        return None
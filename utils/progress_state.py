@@ -0,0 +1,252 @@
+import struct
+import sys
+import time
+import zlib
+from array import array
+from collections.abc import MutableSet
+
+# Serialized layout: magic, format version, flags, page count, page order checksum
+_HEADER = struct.Struct("<2sBBHI")
+_MAGIC = b"PP"
+FORMAT_VERSION = 1
+
+# Header flag set when the visit timestamps are included
+_FLAG_TIMESTAMPS = 1
+
+# Seconds a page must be open before its first-visit dialog appears
+FIRST_VISIT_DELAY = 2
+
+def page_order_checksum(page_ids):
+    """
+    Checksum of the ordered page list.
+
+    Bit positions are only meaningful for the page order they were written
+    with, so serialized progress carries this checksum.
+    """
+    return zlib.crc32("\n".join(page_ids).encode("utf-8"))
+
+def _bitset_size(page_count):
+    """Number of bytes needed to store one bit per page."""
+    return (page_count + 7) // 8
+
+class CompletedPages(MutableSet):
+    """
+    Set of completed page IDs stored as one bit per course page.
+
+    Behaves like the set it replaces in session state, so existing code can
+    keep using "in", add() and iteration. Page IDs that are not part of the
+    course manifest are kept in a small regular set.
+    """
+
+    def __init__(self, state, page_ids=()):
+        """
+        Parameters:
+        - state: ProgressState that owns the bit positions
+        - page_ids: Initial completed page IDs
+        """
+        self._state = state
+        self.bits = 0
+        self._count = 0
+        self._extra = set()
+        for page_id in page_ids:
+            self.add(page_id)
+
+    def __contains__(self, page_id):
+        index = self._state.index_of(page_id)
+        if index is None:
+            return page_id in self._extra
+        return (self.bits >> index) & 1 == 1
+
+    def __iter__(self):
+        bits = self.bits
+        page_ids = self._state.page_ids
+        while bits:
+            low = bits & -bits
+            yield page_ids[low.bit_length() - 1]
+            bits ^= low
+        yield from self._extra
+
+    def __len__(self):
+        return self._count + len(self._extra)
+
+    def __repr__(self):
+        return f"CompletedPages({sorted(self)!r})"
+
+    def add(self, page_id):
+        index = self._state.index_of(page_id)
+        if index is None:
+            self._extra.add(page_id)
+        elif not (self.bits >> index) & 1:
+            self.bits |= 1 << index
+            self._count += 1
+
+    def discard(self, page_id):
+        index = self._state.index_of(page_id)
+        if index is None:
+            self._extra.discard(page_id)
+        elif (self.bits >> index) & 1:
+            self.bits &= ~(1 << index)
+            self._count -= 1
+
+    def set_bits(self, bits):
+        """Replace the completed pages with a raw bitset."""
+        self.bits = bits
+        self._count = bin(bits).count("1")
+        self._extra.clear()
+
+class ProgressState:
+    """
+    Compact per-learner progress and visit state.
+
+    Every page in the course manifest gets a fixed index from the ordered
+    page list. Completion, first visits and dismissed first-visit dialogs are
+    bitsets over those indices, and the time of each first visit is kept in
+    an array of whole seconds. The whole state serializes to a few dozen
+    bytes with to_bytes().
+    """
+
+    def __init__(self, manifest):
+        """
+        Build an empty state for the given manifest.
+
+        Parameters:
+        - manifest: CourseManifest that defines the page order
+        """
+        self.manifest = manifest
+        self.page_ids = [entry["id"] for entry in manifest.pages]
+        self.checksum = page_order_checksum(self.page_ids)
+        self.completed = CompletedPages(self)
+        self.visited = 0
+        self.dismissed = 0
+        self.visit_times = array("I", bytes(4 * len(self.page_ids)))
+
+    def index_of(self, page_id):
+        """Return the bit index of a page, or None if it is not in the manifest."""
+        entry = self.manifest.get(page_id)
+        return entry["index"] if entry is not None else None
+
+    def record_visit(self, page_id, now=None):
+        """
+        Record a visit to a page, remembering when the first visit happened.
+
+        Returns:
+        - True if this was the first visit, False otherwise (or for unknown pages)
+        """
+        index = self.index_of(page_id)
+        if index is None or (self.visited >> index) & 1:
+            return False
+
+        self.visited |= 1 << index
+        self.visit_times[index] = int(now if now is not None else time.time())
+        return True
+
+    def seconds_since_first_visit(self, page_id, now=None):
+        """Return the seconds since the first visit to a page, or None if it was never visited."""
+        index = self.index_of(page_id)
+        if index is None or not (self.visited >> index) & 1:
+            return None
+        return int(now if now is not None else time.time()) - self.visit_times[index]
+
+    def is_dismissed(self, page_id):
+        """Return True if the first-visit dialog for a page was dismissed."""
+        index = self.index_of(page_id)
+        return index is not None and (self.dismissed >> index) & 1 == 1
+
+    def dismiss(self, page_id):
+        """Remember that the first-visit dialog for a page was dismissed."""
+        index = self.index_of(page_id)
+        if index is not None:
+            self.dismissed |= 1 << index
+
+    def to_bytes(self, include_timestamps=False):
+        """
+        Serialize the state.
+
+        Parameters:
+        - include_timestamps: Also write the first-visit times (4 bytes per page)
+
+        Returns:
+        - Bytes with the header followed by the completed, visited and dismissed bitsets
+        """
+        size = _bitset_size(len(self.page_ids))
+        flags = _FLAG_TIMESTAMPS if include_timestamps else 0
+        parts = [
+            _HEADER.pack(_MAGIC, FORMAT_VERSION, flags, len(self.page_ids), self.checksum),
+            self.completed.bits.to_bytes(size, "little"),
+            self.visited.to_bytes(size, "little"),
+            self.dismissed.to_bytes(size, "little")
+        ]
+        if include_timestamps:
+            times = array("I", self.visit_times)
+            if sys.byteorder != "little":
+                times.byteswap()
+            parts.append(times.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, manifest, data):
+        """
+        Restore a state serialized with to_bytes().
+
+        Parameters:
+        - manifest: Current CourseManifest
+        - data: Serialized state
+
+        Returns:
+        - ProgressState
+
+        Raises:
+        - ValueError if the data is malformed or was written for a different page order
+        """
+        if len(data) < _HEADER.size:
+            raise ValueError("Progress data is too short")
+
+        magic, version, flags, page_count, checksum = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != FORMAT_VERSION:
+            raise ValueError("Unsupported progress data format")
+
+        state = cls(manifest)
+        if page_count != len(state.page_ids) or checksum != state.checksum:
+            raise ValueError("Progress data was written for a different set of pages")
+
+        size = _bitset_size(page_count)
+        expected = _HEADER.size + 3 * size + (4 * page_count if flags & _FLAG_TIMESTAMPS else 0)
+        if len(data) != expected:
+            raise ValueError("Progress data has the wrong length")
+
+        offset = _HEADER.size
+        state.completed.set_bits(int.from_bytes(data[offset:offset + size], "little"))
+        offset += size
+        state.visited = int.from_bytes(data[offset:offset + size], "little")
+        offset += size
+        state.dismissed = int.from_bytes(data[offset:offset + size], "little")
+        offset += size
+
+        if flags & _FLAG_TIMESTAMPS:
+            times = array("I")
+            times.frombytes(data[offset:])
+            if sys.byteorder != "little":
+                times.byteswap()
+            state.visit_times = times
+
+        return state
+
+    def remapped(self, manifest):
+        """
+        Return a copy of this state for a different manifest.
+
+        Used when pages are added or removed and the bit indices change.
+        """
+        state = ProgressState(manifest)
+        for page_id in self.completed:
+            state.completed.add(page_id)
+        for index, page_id in enumerate(self.page_ids):
+            new_index = state.index_of(page_id)
+            if new_index is None:
+                continue
+            if (self.visited >> index) & 1:
+                state.visited |= 1 << new_index
+                state.visit_times[new_index] = self.visit_times[index]
+            if (self.dismissed >> index) & 1:
+                state.dismissed |= 1 << new_index
+        return state
@@ -0,0 +1,440 @@
+"""
+Server-side progress storage.
+
+Progress written by the write-behind queue ends up in a ProgressStore. The
+default store is an embedded SQLite database in WAL mode shared by every
+session in the process; a directory of JSON files is also available. Other
+backends can be added with register_progress_store and selected with
+PROMPTENG_PROGRESS_STORE.
+"""
+import base64
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from utils.course_manifest import APP_DIR
+from utils.settings import get_setting, get_int_setting
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where the file store only locks within one process
+    fcntl = None
+
+# Statements are kept as constants so sqlite3 reuses its prepared statements
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress_state (
+    learner_id TEXT PRIMARY KEY,
+    state BLOB NOT NULL,
+    updated_at INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS completions (
+    learner_id TEXT NOT NULL,
+    page_id TEXT NOT NULL,
+    completed_at INTEGER NOT NULL,
+    PRIMARY KEY (learner_id, page_id)
+);
+CREATE TABLE IF NOT EXISTS learner_revisions (
+    learner_id TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS responses (
+    learner_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    response_key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated_at INTEGER NOT NULL,
+    PRIMARY KEY (learner_id, kind, response_key)
+);
+"""
+
+_UPSERT_STATE = """
+INSERT INTO progress_state (learner_id, state, updated_at) VALUES (?, ?, ?)
+ON CONFLICT (learner_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at
+"""
+
+_UPSERT_COMPLETION = """
+INSERT INTO completions (learner_id, page_id, completed_at) VALUES (?, ?, ?)
+ON CONFLICT (learner_id, page_id) DO NOTHING
+"""
+
+_UPSERT_RESPONSE = """
+INSERT INTO responses (learner_id, kind, response_key, value, updated_at) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (learner_id, kind, response_key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+WHERE excluded.updated_at >= responses.updated_at
+"""
+
+_BUMP_REVISION = """
+INSERT INTO learner_revisions (learner_id, revision) VALUES (?, 1)
+ON CONFLICT (learner_id) DO UPDATE SET revision = revision + 1
+"""
+
+_SELECT_REVISION = "SELECT revision FROM learner_revisions WHERE learner_id = ?"
+_SELECT_STATE = "SELECT state FROM progress_state WHERE learner_id = ?"
+_SELECT_COMPLETIONS = "SELECT page_id, completed_at FROM completions WHERE learner_id = ?"
+_SELECT_RESPONSES = "SELECT kind, response_key, value, updated_at FROM responses WHERE learner_id = ?"
+_DELETE_LEARNER = (
+    "DELETE FROM progress_state WHERE learner_id = ?",
+    "DELETE FROM completions WHERE learner_id = ?",
+    "DELETE FROM responses WHERE learner_id = ?"
+)
+
+def empty_progress():
+    """Return the progress record for a learner with nothing saved."""
+    return {
+        "progress": None,
+        "completions": {},
+        "reflections": {},
+        "activity_responses": {},
+        "drafts": {},
+        "updated_at": {},
+        "revision": 0
+    }
+
+class ProgressStore:
+    """
+    Interface for progress backends.
+
+    write_batch receives entries from the write-behind queue that have
+    already been serialized: ("progress", None, bytes), ("completion",
+    page_id, timestamp) and ("reflections", "activity_responses" or
+    "drafts", key, envelope) for every changed key of those, where the
+    envelope holds the value, its version and when it was updated. A
+    response is only replaced by one with the same or a later update time
+    (last writer wins). load returns the update times in "updated_at",
+    keyed by "kind/key".
+
+    Every write or clear bumps the learner's revision, so a replica can tell
+    with revision() whether its copy of a learner's progress is current.
+    """
+
+    def write_batch(self, learner_id, entries):
+        """
+        Write a batch of entries for one learner.
+
+        Returns:
+        - The learner's revision after the write, or None if the store has no revisions
+        """
+        raise NotImplementedError
+
+    def revision(self, learner_id):
+        """Return the learner's current revision, or None if the store has no revisions."""
+        return None
+
+    def load(self, learner_id):
+        """Return the saved progress for a learner in the format of empty_progress()."""
+        raise NotImplementedError
+
+    def clear(self, learner_id):
+        """Delete everything saved for a learner."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the store."""
+
+class NullProgressStore(ProgressStore):
+    """Store that keeps nothing. Progress lasts only as long as the session."""
+
+    def write_batch(self, learner_id, entries):
+        return None
+
+    def load(self, learner_id):
+        return empty_progress()
+
+    def clear(self, learner_id):
+        pass
+
+class SQLiteProgressStore(ProgressStore):
+    """
+    Progress store backed by an SQLite database in WAL mode.
+
+    Connections are pooled and shared by all sessions, and each batch is
+    written in a single transaction with executemany upserts.
+    """
+
+    def __init__(self, path, pool_size=4, timeout=5.0):
+        """
+        Parameters:
+        - path: Path of the database file
+        - pool_size: Maximum number of open connections
+        - timeout: Seconds to wait for a connection or a database lock
+        """
+        self.path = path
+        self.timeout = timeout
+        self._pool = queue.LifoQueue()
+        self._pool_size = max(1, pool_size)
+        self._opened = 0
+        self._pool_lock = threading.Lock()
+
+        with self.connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        """Open a new connection configured for concurrent access."""
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=64
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        return conn
+
+    def _open_or_wait(self):
+        """Open a new connection if the pool has room, otherwise wait for one to be returned."""
+        with self._pool_lock:
+            can_open = self._opened < self._pool_size
+            if can_open:
+                self._opened += 1
+
+        if not can_open:
+            return self._pool.get(timeout=self.timeout)
+
+        try:
+            return self._connect()
+        except Exception:
+            with self._pool_lock:
+                self._opened -= 1
+            raise
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection from the pool."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._open_or_wait()
+
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def write_batch(self, learner_id, entries):
+        now = int(time.time())
+        states = []
+        completions = []
+        responses = []
+        for kind, key, value in entries:
+            if kind == "progress":
+                states.append((learner_id, value, now))
+            elif kind == "completion":
+                completions.append((learner_id, key, value))
+            else:
+                responses.append((learner_id, kind, key, json.dumps(value["value"]), value["updated_at"]))
+
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if states:
+                    conn.execute(_UPSERT_STATE, states[-1])
+                if completions:
+                    conn.executemany(_UPSERT_COMPLETION, completions)
+                if responses:
+                    conn.executemany(_UPSERT_RESPONSE, responses)
+                conn.execute(_BUMP_REVISION, (learner_id,))
+                revision = conn.execute(_SELECT_REVISION, (learner_id,)).fetchone()[0]
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return revision
+
+    def revision(self, learner_id):
+        with self.connection() as conn:
+            row = conn.execute(_SELECT_REVISION, (learner_id,)).fetchone()
+        return row[0] if row is not None else 0
+
+    def load(self, learner_id):
+        progress = empty_progress()
+        with self.connection() as conn:
+            # Read everything from one snapshot of the database
+            conn.execute("BEGIN")
+            try:
+                row = conn.execute(_SELECT_REVISION, (learner_id,)).fetchone()
+                if row is not None:
+                    progress["revision"] = row[0]
+                row = conn.execute(_SELECT_STATE, (learner_id,)).fetchone()
+                if row is not None:
+                    progress["progress"] = bytes(row[0])
+                for page_id, completed_at in conn.execute(_SELECT_COMPLETIONS, (learner_id,)):
+                    progress["completions"][page_id] = completed_at
+                for kind, key, value, updated_at in conn.execute(_SELECT_RESPONSES, (learner_id,)):
+                    if kind in progress:
+                        progress[kind][key] = json.loads(value)
+                        progress["updated_at"][f"{kind}/{key}"] = updated_at
+            finally:
+                conn.execute("COMMIT")
+        return progress
+
+    def clear(self, learner_id):
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for statement in _DELETE_LEARNER:
+                    conn.execute(statement, (learner_id,))
+                conn.execute(_BUMP_REVISION, (learner_id,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+class FileProgressStore(ProgressStore):
+    """
+    Progress store that keeps one JSON file per learner in a directory.
+
+    A simple stand-in for a shared store: point several replicas at the same
+    directory (for example on a shared volume) and any of them can serve a
+    learner. Writes hold an exclusive lock on a sidecar lock file (flock)
+    while they read, merge and replace a learner's file, so concurrent
+    writes from different processes are merged key by key like in the
+    SQLite store. Reads need no lock because files are replaced atomically.
+    flock needs a POSIX system and a file system that supports it across
+    hosts; without fcntl (Windows) only writers in one process are
+    serialized.
+    """
+
+    def __init__(self, directory):
+        """
+        Parameters:
+        - directory: Directory holding the learner files
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, learner_id):
+        """Path of a learner's file. Learner IDs only contain letters, digits, - and _."""
+        return os.path.join(self.directory, f"{learner_id}.json")
+
+    @contextmanager
+    def _locked(self, learner_id):
+        """Hold the learner's write lock, shared by every process using the directory."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self._path(learner_id) + ".lock", "a") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read(self, learner_id):
+        """Read a learner's file, or return None if there is none."""
+        try:
+            with open(self._path(learner_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, learner_id, record):
+        """Replace a learner's file atomically."""
+        path = self._path(learner_id)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, separators=(",", ":"))
+        os.replace(temp_path, path)
+
+    def write_batch(self, learner_id, entries):
+        # Read the latest file under the lock, so other replicas' changes are merged, not overwritten
+        with self._locked(learner_id):
+            record = self._read(learner_id) or {"revision": 0, "progress": None, "completions": {}, "responses": {}}
+            for kind, key, value in entries:
+                if kind == "progress":
+                    record["progress"] = base64.b64encode(value).decode("ascii")
+                elif kind == "completion":
+                    record["completions"].setdefault(key, value)
+                else:
+                    responses = record["responses"].setdefault(kind, {})
+                    stored = responses.get(key)
+                    if stored is None or value["updated_at"] >= stored["updated_at"]:
+                        responses[key] = {"value": value["value"], "updated_at": value["updated_at"]}
+            record["revision"] += 1
+            self._write(learner_id, record)
+            return record["revision"]
+
+    def revision(self, learner_id):
+        record = self._read(learner_id)
+        return record["revision"] if record is not None else 0
+
+    def load(self, learner_id):
+        progress = empty_progress()
+        record = self._read(learner_id)
+        if record is None:
+            return progress
+
+        progress["revision"] = record["revision"]
+        if record["progress"] is not None:
+            progress["progress"] = base64.b64decode(record["progress"])
+        progress["completions"] = dict(record["completions"])
+        for kind, responses in record["responses"].items():
+            if kind in progress:
+                for key, stored in responses.items():
+                    progress[kind][key] = stored["value"]
+                    progress["updated_at"][f"{kind}/{key}"] = stored["updated_at"]
+        return progress
+
+    def clear(self, learner_id):
+        with self._locked(learner_id):
+            record = self._read(learner_id)
+            revision = record["revision"] + 1 if record is not None else 1
+            self._write(learner_id, {"revision": revision, "progress": None, "completions": {}, "responses": {}})
+
+def _create_sqlite_store():
+    """Create the default SQLite store from the PROMPTENG_PROGRESS_DB* settings."""
+    path = get_setting("PROGRESS_DB", os.path.join(APP_DIR, "progress.db"))
+    return SQLiteProgressStore(path, pool_size=get_int_setting("PROGRESS_DB_POOL", 4))
+
+def _create_file_store():
+    """Create the file store from the PROMPTENG_PROGRESS_DIR setting."""
+    return FileProgressStore(get_setting("PROGRESS_DIR", os.path.join(APP_DIR, "progress_data")))
+
+# Store factories by name, selected with PROMPTENG_PROGRESS_STORE
+_store_factories = {
+    "sqlite": _create_sqlite_store,
+    "file": _create_file_store,
+    "none": NullProgressStore
+}
+
+_store = None
+_store_lock = threading.Lock()
+
+def register_progress_store(name, factory):
+    """
+    Register a progress backend.
+
+    Parameters:
+    - name: Name used in PROMPTENG_PROGRESS_STORE
+    - factory: Callable that returns a ProgressStore
+    """
+    _store_factories[name] = factory
+
+def get_progress_store():
+    """Return the progress store shared by every session in this process."""
+    global _store
+
+    if _store is not None:
+        return _store
+
+    with _store_lock:
+        if _store is None:
+            name = get_setting("PROGRESS_STORE", "sqlite").strip().lower()
+            if name not in _store_factories:
+                raise ValueError(f"Unknown progress store: {name}")
+            _store = _store_factories[name]()
+    return _store
@@ -0,0 +1,282 @@
+"""
+Two-tier cache of AI responses.
+
+Many learners send the same example prompts, so TeacherClient looks
+responses up here before calling the LLM backend. The first tier is an
+in-memory LRU per process; the second is an SQLite database shared by every
+process on the machine. Entries expire after PROMPTENG_RESPONSE_CACHE_TTL
+seconds, and the least recently used entries are evicted when either tier
+is full. Both tiers are bounded by the bytes of the responses they hold; the
+disk tier keeps its running total in a one-row table that triggers update
+in the same transaction as every write, so no process has to sum the table.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from utils.course_manifest import APP_DIR
+from utils.settings import get_setting, get_bool_setting, get_int_setting, get_float_setting
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS response_cache (
+    cache_key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS response_cache_last_used ON response_cache (last_used);
+CREATE INDEX IF NOT EXISTS response_cache_expires_at ON response_cache (expires_at);
+CREATE TABLE IF NOT EXISTS response_cache_total (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    size INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO response_cache_total (id, size) SELECT 0, COALESCE(SUM(size), 0) FROM response_cache;
+CREATE TRIGGER IF NOT EXISTS response_cache_total_insert AFTER INSERT ON response_cache BEGIN
+    UPDATE response_cache_total SET size = size + new.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS response_cache_total_update AFTER UPDATE OF size ON response_cache BEGIN
+    UPDATE response_cache_total SET size = size + new.size - old.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS response_cache_total_delete AFTER DELETE ON response_cache BEGIN
+    UPDATE response_cache_total SET size = size - old.size WHERE id = 0;
+END;
+"""
+
+_UPSERT = """
+INSERT INTO response_cache (cache_key, response, size, expires_at, last_used) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (cache_key) DO UPDATE SET
+    response = excluded.response, size = excluded.size,
+    expires_at = excluded.expires_at, last_used = excluded.last_used
+"""
+
+def normalize_prompt(prompt_text):
+    """Return the prompt with surrounding whitespace removed and inner whitespace collapsed."""
+    return re.sub(r"\s+", " ", prompt_text).strip()
+
+def cache_key(prompt_text, identity):
+    """
+    Return the cache key of a prompt.
+
+    Parameters:
+    - prompt_text: The prompt text
+    - identity: Dictionary describing the backend, model and parameters used
+
+    Returns:
+    - Hex digest identifying the request
+    """
+    payload = json.dumps({"prompt": normalize_prompt(prompt_text), "identity": identity}, sort_keys=True)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+class ResponseCache:
+    """In-memory LRU in front of a shared SQLite cache of AI responses."""
+
+    def __init__(self, path=None, memory_entries=256, ttl=86400.0, disk_max_bytes=50 * 1024 * 1024,
+                 memory_max_bytes=16 * 1024 * 1024):
+        """
+        Parameters:
+        - path: SQLite database file, or None for a memory-only cache
+        - memory_entries: Maximum number of responses kept in memory
+        - memory_max_bytes: Maximum total size of the responses kept in memory
+        - ttl: Seconds a response stays valid
+        - disk_max_bytes: Maximum total size of the responses kept on disk
+        """
+        self.memory_entries = max(1, memory_entries)
+        self.ttl = max(0.0, ttl)
+        self.disk_max_bytes = max(1, disk_max_bytes)
+        self.memory_max_bytes = max(1, memory_max_bytes)
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.metrics = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "expired": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+            "disk_errors": 0
+        }
+
+        self._db = None
+        self._db_lock = threading.Lock()
+        if path:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            # One connection shared by the process's threads, used under _db_lock
+            db = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            try:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                # One transaction, so the total is seeded exactly once alongside its triggers
+                db.executescript("BEGIN IMMEDIATE;" + _SCHEMA + "COMMIT;")
+            except sqlite3.Error:
+                db.close()
+                raise
+            self._db = db
+
+    def get(self, key, now=None):
+        """
+        Look up a response.
+
+        Returns:
+        - The cached response text, or None on a miss
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, text, size = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.metrics["memory_hits"] += 1
+                    return text
+                del self._memory[key]
+                self._memory_bytes -= size
+                self.metrics["expired"] += 1
+
+        row = self._disk_get(key, now)
+        if row is None:
+            self.metrics["misses"] += 1
+            return None
+
+        text, expires_at = row
+        self.metrics["disk_hits"] += 1
+        self._remember(key, text, expires_at)
+        return text
+
+    def put(self, key, text, now=None):
+        """Store a response in both tiers."""
+        now = time.time() if now is None else now
+        expires_at = now + self.ttl
+        size = len(text.encode("utf-8"))
+        self._remember(key, text, expires_at, size)
+        self.metrics["stores"] += 1
+
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    self._db.execute(_UPSERT, (key, text, size, expires_at, now))
+                    self._evict_disk(now)
+                    self._db.execute("COMMIT")
+                except sqlite3.Error:
+                    self._db.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error:
+            # The memory tier still has the response
+            self.metrics["disk_errors"] += 1
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM response_cache")
+
+    def memory_size(self):
+        """Return the number of responses kept in memory."""
+        return len(self._memory)
+
+    def memory_bytes(self):
+        """Return the total size of the responses kept in memory."""
+        return self._memory_bytes
+
+    def _remember(self, key, text, expires_at, size=None):
+        """Put a response in the memory tier, evicting the least recently used ones."""
+        if size is None:
+            size = len(text.encode("utf-8"))
+        if size > self.memory_max_bytes:
+            # Larger than the whole tier; it is only kept on disk
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= previous[2]
+            self._memory[key] = (expires_at, text, size)
+            self._memory_bytes += size
+            while len(self._memory) > self.memory_entries or self._memory_bytes > self.memory_max_bytes:
+                _, (_, _, evicted_size) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted_size
+                self.metrics["memory_evictions"] += 1
+
+    def _disk_get(self, key, now):
+        """Read a response from the disk tier, returning (text, expires_at) or None."""
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT response, expires_at FROM response_cache WHERE cache_key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[1] <= now:
+                    self._db.execute("DELETE FROM response_cache WHERE cache_key = ?", (key,))
+                    self.metrics["expired"] += 1
+                    return None
+                self._db.execute("UPDATE response_cache SET last_used = ? WHERE cache_key = ?", (now, key))
+                return row
+        except sqlite3.Error:
+            self.metrics["disk_errors"] += 1
+            return None
+
+    def _evict_disk(self, now):
+        """Drop expired responses, then the least recently used ones until the disk tier fits. Called with _db_lock held."""
+        self._db.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+        total = self._db.execute("SELECT size FROM response_cache_total WHERE id = 0").fetchone()[0]
+        if total <= self.disk_max_bytes:
+            return
+
+        rows = self._db.execute("SELECT cache_key, size FROM response_cache ORDER BY last_used").fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.disk_max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM response_cache WHERE cache_key = ?", evicted)
+        self.metrics["disk_evictions"] += len(evicted)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """
+    Return the response cache shared by every session in this process, or
+    None if PROMPTENG_RESPONSE_CACHE is turned off.
+
+    If the database cannot be opened (for example because its directory is
+    not writable), the cache keeps responses in memory only.
+    """
+    global _cache
+
+    if not get_bool_setting("RESPONSE_CACHE", True):
+        return None
+    if _cache is not None:
+        return _cache
+
+    with _cache_lock:
+        if _cache is None:
+            path = get_setting("RESPONSE_CACHE_DB", os.path.join(APP_DIR, "response_cache.db"))
+            options = {
+                "memory_entries": get_int_setting("RESPONSE_CACHE_MEMORY", 256),
+                "memory_max_bytes": get_int_setting("RESPONSE_CACHE_MEMORY_MB", 16) * 1024 * 1024,
+                "ttl": get_float_setting("RESPONSE_CACHE_TTL", 86400.0),
+                "disk_max_bytes": get_int_setting("RESPONSE_CACHE_DISK_MB", 50) * 1024 * 1024
+            }
+            try:
+                _cache = ResponseCache(path=path if path.strip().lower() != "none" else None, **options)
+            except (sqlite3.Error, OSError):
+                _cache = ResponseCache(path=None, **options)
+                _cache.metrics["disk_errors"] += 1
+    return _cache
@@ -0,0 +1,310 @@
+"""
+Precomputed response pack.
+
+The example pages send a fixed set of prompts. This module finds them in
+the example page scripts with the ast module (prompts passed to send_prompt
+or stream_prompt as literals, assigned to a variable named prompt, or
+listed under a "prompt" key), asks the configured LLM backend for a
+response to each and writes them to a binary pack file. TeacherClient
+memory-maps the pack and answers matching prompts from it without calling
+the backend, so the examples work offline and instantly.
+
+Pack layout (little endian):
+    header   magic "PRPK", format version, reserved, entry count, metadata length
+    metadata JSON (pack version, build time, backend, source pages)
+    index    entry count x (16-byte prompt hash, data offset, data length), sorted by hash
+    data     UTF-8 responses
+
+Usage:
+    python -m utils.response_pack [--pages-dir DIR] [--pattern GLOB] [--output FILE]
+"""
+import argparse
+import ast
+import fnmatch
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+from utils.course_manifest import APP_DIR, PAGES_DIR
+from utils.response_cache import normalize_prompt
+from utils.settings import get_setting, get_bool_setting
+
+PACK_FORMAT_VERSION = 1
+PACK_FILE = "response_pack.bin"
+
+_MAGIC = b"PRPK"
+_HEADER = struct.Struct("<4sHHII")
+_INDEX_ENTRY = struct.Struct("<16sII")
+
+# Functions whose first argument is a prompt
+_PROMPT_CALLS = ("send_prompt", "stream_prompt")
+
+def prompt_hash(prompt_text):
+    """Return the 16-byte hash a prompt is looked up by."""
+    return hashlib.blake2b(normalize_prompt(prompt_text).encode("utf-8"), digest_size=16).digest()
+
+def _string(node):
+    """Return the value of a string literal node, or None."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+def find_prompts(source, filename="<page>"):
+    """
+    Find the literal prompts in the source code of a page script.
+
+    Parameters:
+    - source: Python source of the page
+    - filename: File name used in syntax errors
+
+    Returns:
+    - List of prompts in the order they appear
+    """
+    tree = ast.parse(source, filename=filename)
+    prompts = []
+
+    def add(value):
+        if value and value.strip() and value not in prompts:
+            prompts.append(value)
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            name = node.func.attr if isinstance(node.func, ast.Attribute) else getattr(node.func, "id", None)
+            if name in _PROMPT_CALLS and node.args:
+                add(_string(node.args[0]))
+        elif isinstance(node, ast.Assign):
+            if any(isinstance(target, ast.Name) and target.id == "prompt" for target in node.targets):
+                add(_string(node.value))
+        elif isinstance(node, ast.Dict):
+            for key, value in zip(node.keys, node.values):
+                if key is not None and _string(key) == "prompt":
+                    add(_string(value))
+    return prompts
+
+def collect_prompts(pages_dir=PAGES_DIR, pattern="*_examples.py"):
+    """
+    Find the prompts of every page script matching a pattern.
+
+    Returns:
+    - Dictionary of page file name to its prompts, for pages that have any
+    """
+    found = {}
+    for name in sorted(os.listdir(pages_dir)):
+        if not fnmatch.fnmatch(name, pattern):
+            continue
+        with open(os.path.join(pages_dir, name), "r", encoding="utf-8") as f:
+            prompts = find_prompts(f.read(), name)
+        if prompts:
+            found[name] = prompts
+    return found
+
+def write_pack(responses, path, metadata=None):
+    """
+    Write a response pack.
+
+    Parameters:
+    - responses: Dictionary of prompt to response text
+    - path: Pack file to write
+    - metadata: Extra JSON-serializable information stored in the pack
+
+    Returns:
+    - Number of responses written
+    """
+    entries = {}
+    for prompt_text, text in responses.items():
+        entries[prompt_hash(prompt_text)] = text.encode("utf-8")
+
+    meta = json.dumps(dict(metadata or {}, version=PACK_FORMAT_VERSION), ensure_ascii=False).encode("utf-8")
+    index = []
+    data = []
+    offset = 0
+    for key in sorted(entries):
+        index.append(_INDEX_ENTRY.pack(key, offset, len(entries[key])))
+        data.append(entries[key])
+        offset += len(entries[key])
+
+    # Write next to the target and swap in, so running apps never map a half-written file
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, PACK_FORMAT_VERSION, 0, len(entries), len(meta)))
+        f.write(meta)
+        f.writelines(index)
+        f.writelines(data)
+    os.replace(temp_path, path)
+    return len(entries)
+
+class ResponsePack:
+    """Read-only, memory-mapped response pack."""
+
+    def __init__(self, path):
+        """
+        Parameters:
+        - path: Pack file written by write_pack
+
+        Raises:
+        - OSError if the file cannot be read
+        - ValueError if it is not a pack of the supported format version
+        """
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._map) < _HEADER.size:
+            raise ValueError("Response pack is too short")
+        magic, version, _, count, meta_length = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC or version != PACK_FORMAT_VERSION:
+            raise ValueError("Unsupported response pack format")
+
+        self.count = count
+        self.metadata = json.loads(self._map[_HEADER.size:_HEADER.size + meta_length].decode("utf-8"))
+        self._index_start = _HEADER.size + meta_length
+        self._data_start = self._index_start + count * _INDEX_ENTRY.size
+        if len(self._map) < self._data_start:
+            raise ValueError("Response pack is truncated")
+        self.metrics = {"hits": 0, "misses": 0}
+
+    def __len__(self):
+        return self.count
+
+    def get(self, prompt_text):
+        """Return the packed response to a prompt, or None if the pack has none."""
+        key = prompt_hash(prompt_text)
+
+        # Binary search over the sorted index
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            entry_key, offset, length = _INDEX_ENTRY.unpack_from(self._map, self._index_start + middle * _INDEX_ENTRY.size)
+            if entry_key == key:
+                self.metrics["hits"] += 1
+                start = self._data_start + offset
+                return self._map[start:start + length].decode("utf-8")
+            if entry_key < key:
+                low = middle + 1
+            else:
+                high = middle
+        self.metrics["misses"] += 1
+        return None
+
+_pack = None
+_pack_mtime = None
+_pack_loaded = False
+_pack_lock = threading.Lock()
+
+def get_response_pack():
+    """
+    Return the response pack shared by every session in this process.
+
+    Returns None if PROMPTENG_RESPONSE_PACK is turned off, there is no pack,
+    or the pack was built with another backend, model or parameters than
+    the configured one. The pack is mapped again when its file changes, so
+    a rebuilt pack is used without restarting the app.
+    """
+    global _pack, _pack_mtime, _pack_loaded
+
+    if not get_bool_setting("RESPONSE_PACK", True):
+        return None
+
+    path = get_setting("RESPONSE_PACK_FILE", os.path.join(APP_DIR, PACK_FILE))
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+
+    if not _pack_loaded or _pack_mtime != mtime:
+        with _pack_lock:
+            # Another thread may have loaded it while we waited for the lock
+            if not _pack_loaded or _pack_mtime != mtime:
+                try:
+                    _pack = ResponsePack(path) if mtime is not None else None
+                except (OSError, ValueError):
+                    # A pack from another format version
+                    _pack = None
+                _pack_mtime = mtime
+                _pack_loaded = True
+
+    pack = _pack
+    if pack is None:
+        return None
+
+    # Import locally so reading a pack does not load the HTTP client
+    from utils.llm_backend import get_llm_backend
+
+    # Responses recorded from another model must not stand in for this one
+    if pack.metadata.get("backend") != get_llm_backend().cache_identity():
+        return None
+    return pack
+
+def build_pack(pages_dir=PAGES_DIR, pattern="*_examples.py", output=None, backend=None, allow_demo=False):
+    """
+    Generate responses for every example prompt and write them to a pack.
+
+    The app only serves a pack built with the backend it is configured
+    with, so build it with the same PROMPTENG_LLM_* settings as the app.
+
+    Parameters:
+    - pages_dir: Directory containing the page scripts
+    - pattern: File name pattern of the pages to scan
+    - output: Pack file to write (defaults to response_pack.bin in the app directory)
+    - backend: LLMBackend to generate responses with (defaults to the configured backend)
+    - allow_demo: Build a pack of the demo backend's canned responses
+
+    Returns:
+    - Tuple of (pack path, number of responses)
+
+    Raises:
+    - ValueError if the backend is the demo backend and allow_demo is not set
+    """
+    # Import locally so reading a pack does not load the HTTP client
+    from utils.llm_backend import get_llm_backend
+    from utils.llm_scheduler import BULK, get_llm_scheduler, estimate_request_tokens
+
+    backend = backend or get_llm_backend()
+    if backend.name == "demo" and not allow_demo:
+        raise ValueError("The demo backend is configured; set PROMPTENG_LLM_BACKEND to record real model responses, or pass --allow-demo")
+    output = output or os.path.join(APP_DIR, PACK_FILE)
+    prompts = collect_prompts(pages_dir, pattern)
+
+    responses = {}
+    for prompt_list in prompts.values():
+        for prompt_text in prompt_list:
+            if prompt_text in responses:
+                continue
+            if not backend.scheduled:
+                responses[prompt_text] = backend.complete(prompt_text)
+                continue
+            # Builds share the rate limits with the running course, behind the learners' requests
+            with get_llm_scheduler().slot("response_pack", BULK, estimate_request_tokens(prompt_text)):
+                responses[prompt_text] = backend.complete(prompt_text)
+
+    metadata = {
+        "built_at": int(time.time()),
+        "backend": backend.cache_identity(),
+        "pages": sorted(prompts)
+    }
+    return output, write_pack(responses, output, metadata)
+
+def main(argv=None):
+    """Command-line entry point for building the response pack."""
+    parser = argparse.ArgumentParser(description="Precompute responses to the example prompts of the course pages.")
+    parser.add_argument("--pages-dir", default=PAGES_DIR, help="Directory containing the page scripts")
+    parser.add_argument("--pattern", default="*_examples.py", help="File name pattern of the pages to scan")
+    parser.add_argument("--output", default=os.path.join(APP_DIR, PACK_FILE), help="Pack file to write")
+    parser.add_argument("--allow-demo", action="store_true", help="Build a pack with the demo backend's canned responses")
+    args = parser.parse_args(argv)
+
+    try:
+        path, count = build_pack(args.pages_dir, args.pattern, args.output, allow_demo=args.allow_demo)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    print(f"Packed {count} responses")
+    print(f"  {path} ({os.path.getsize(path)} bytes)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import zlib
+from collections import OrderedDict
+
+# Responses shorter than this are not worth compressing
+_COMPRESS_MIN_BYTES = 512
+
+class ResponseStore:
+    """
+    Bounded store for the AI responses shown on example pages.
+
+    Responses are keyed by (page, example, variant), so pages can reuse
+    example names without overwriting each other. The store keeps the most
+    recently used responses: the newest ones as plain text, older ones
+    zlib-compressed, and evicts the least recently used once it holds more
+    than max_entries responses or max_bytes bytes.
+    """
+
+    def __init__(self, max_entries=64, max_bytes=256 * 1024, hot_entries=8):
+        """
+        Parameters:
+        - max_entries: Maximum number of responses kept
+        - max_bytes: Maximum total size of the kept responses
+        - hot_entries: Number of most recently used responses kept uncompressed
+        """
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.hot_entries = max(0, hot_entries)
+        # (page, example, variant) -> (compressed, data)
+        self._entries = OrderedDict()
+        # Bytes held; the session memory manager reads this to measure the store
+        self.size_bytes = 0
+        self.metrics = {
+            "puts": 0,
+            "hits": 0,
+            "misses": 0,
+            "compressed": 0,
+            "evictions": 0
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def put(self, page_id, example_id, variant, text):
+        """
+        Store a response.
+
+        Parameters:
+        - page_id: ID of the page showing the example
+        - example_id: ID of the example on the page (e.g. "example1")
+        - variant: Prompt variant (e.g. "no_context" or "with_context")
+        - text: Response text
+        """
+        key = (page_id, example_id, variant)
+        self._remove(key)
+        data = text.encode("utf-8")
+        self._entries[key] = (False, data)
+        self.size_bytes += len(data)
+        self.metrics["puts"] += 1
+        self._compact()
+
+    def get(self, page_id, example_id, variant, default=None):
+        """Return a stored response and mark it as recently used, or return the default."""
+        key = (page_id, example_id, variant)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.metrics["misses"] += 1
+            return default
+
+        self.metrics["hits"] += 1
+        self._entries.move_to_end(key)
+        compressed, data = entry
+        text = (zlib.decompress(data) if compressed else data).decode("utf-8")
+        if compressed:
+            # Recently used again: keep it as plain text
+            self._remove(key)
+            self._entries[key] = (False, text.encode("utf-8"))
+            self.size_bytes += len(self._entries[key][1])
+            self._compact()
+        return text
+
+    def page_responses(self, page_id):
+        """Return the keys of every response stored for a page."""
+        return [key for key in self._entries if key[0] == page_id]
+
+    def clear(self, page_id=None):
+        """Remove every response, or only those of one page."""
+        keys = self.page_responses(page_id) if page_id is not None else list(self._entries)
+        for key in keys:
+            self._remove(key)
+
+    def _remove(self, key):
+        """Remove an entry if present, keeping the size total up to date."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= len(entry[1])
+
+    def _compact(self):
+        """Compress responses that are no longer recent and evict the least recently used ones."""
+        # Compress everything older than the hot entries
+        for index, (key, (compressed, data)) in enumerate(list(self._entries.items())):
+            if index >= len(self._entries) - self.hot_entries:
+                break
+            if compressed or len(data) < _COMPRESS_MIN_BYTES:
+                continue
+            packed = zlib.compress(data)
+            if len(packed) < len(data):
+                self._entries[key] = (True, packed)
+                self.size_bytes -= len(data) - len(packed)
+                self.metrics["compressed"] += 1
+
+        # Evict from the least recently used end, always keeping the newest response
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.metrics["evictions"] += 1
@@ -0,0 +1,103 @@
+"""
+Single-entrypoint router.
+
+In router mode (PROMPTENG_ROUTER_MODE=1) app.py registers every course page
+with st.navigation from the course manifest. Only the script of the page
+being viewed is executed. The parts of the shell that do not depend on the
+page - page config, session initialization, teacher controls and the
+end-of-run writes - are done once by the entrypoint, and render_page skips
+them; each page still renders its own header, navigators and course
+navigation.
+"""
+import os
+import threading
+import streamlit as st
+from utils.course_manifest import get_course_manifest
+from utils.settings import get_bool_setting
+
+# Set while the router is running a page in the current script thread
+_local = threading.local()
+
+_registry = (None, [])
+_registry_lock = threading.Lock()
+
+def is_router_mode():
+    """Return True if the app is configured to run through the router."""
+    return get_bool_setting("ROUTER_MODE", False)
+
+def router_owns_shell():
+    """
+    Return True while a page is being run by the router.
+
+    Shell helpers such as set_standard_page_config and
+    render_teacher_controls_sidebar check this so that pages do not repeat
+    work the entrypoint has already done.
+    """
+    return getattr(_local, "running_page", False)
+
+def get_page_registry():
+    """
+    Return the page registry shared by every session.
+
+    Each entry is a dictionary with id, path and title keys, in course
+    order. The registry is rebuilt only when the course manifest changes.
+    """
+    global _registry
+
+    manifest = get_course_manifest()
+    cached_manifest, registry = _registry
+    if cached_manifest is manifest:
+        return registry
+
+    with _registry_lock:
+        registry = [
+            {
+                "id": entry["id"],
+                "path": os.path.join("pages", f"{entry['id']}.py"),
+                "title": entry.get("page_title") or entry["title"]
+            }
+            for entry in manifest.pages
+        ]
+        _registry = (manifest, registry)
+    return registry
+
+def build_navigation(home):
+    """
+    Register the home page and every course page with st.navigation.
+
+    Parameters:
+    - home: Callable that renders the home page
+
+    Returns:
+    - The StreamlitPage selected for this run
+    """
+    pages = [st.Page(home, title="Prompt Engineering Course", default=True)]
+    for spec in get_page_registry():
+        pages.append(st.Page(spec["path"], title=spec["title"], url_path=spec["id"]))
+
+    # The course has its own navigation, so hide Streamlit's page menu
+    return st.navigation(pages, position="hidden")
+
+def run_router(home):
+    """
+    Render the shared shell and run the selected page.
+
+    Parameters:
+    - home: Callable that renders the home page
+    """
+    # Import locally to avoid circular imports
+    from utils.state_management import initialize_session_state, finish_run
+    from components.progress_manager import render_shared_teacher_controls
+
+    # Once per run for every page; render_page skips it while the router runs the page
+    initialize_session_state()
+
+    page = build_navigation(home)
+    render_shared_teacher_controls()
+
+    _local.running_page = True
+    try:
+        page.run()
+    finally:
+        _local.running_page = False
+        finish_run()
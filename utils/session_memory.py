@@ -0,0 +1,343 @@
+"""
+Session memory manager.
+
+Bulky, regenerable session values (such as the store of example responses
+shown on lesson pages) are parked in a per-session slot between reruns. The manager
+shared by every session in the process measures each slot's footprint and
+spills slots that have been idle longer than PROMPTENG_SESSION_IDLE_TTL
+seconds to disk. When the resident slots together exceed
+PROMPTENG_SESSION_MEMORY_BUDGET bytes, the least recently seen slots are
+spilled as well until they fit. A spilled slot is read back the next time its session
+reruns, so a learner returning after hours finds their page as they left it.
+Spilled values idle longer than PROMPTENG_SESSION_EVICT_TTL are deleted.
+"""
+import fnmatch
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+from utils.settings import get_setting, get_int_setting, get_float_setting
+
+# Session state keys that are parked between reruns and may be spilled.
+# Progress data stays resident: button callbacks read it before the page
+# restores parked values, and the progress store already keeps a copy.
+SPILLABLE_KEY_PATTERNS = ("response_store",)
+
+def is_spillable_key(key):
+    """Return True if a session state key holds a value that may be spilled."""
+    return any(fnmatch.fnmatchcase(key, pattern) for pattern in SPILLABLE_KEY_PATTERNS)
+
+def _remove_file(path):
+    """Delete a spill file if it exists. Used when a slot is discarded."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+class SessionSlot:
+    """
+    Parked values of one session.
+
+    A slot is either resident (its values are in memory) or spilled (its
+    values are in a file and the in-memory dictionary is empty).
+    """
+
+    def __init__(self, spill_path):
+        """
+        Parameters:
+        - spill_path: File the slot's values are written to when it is spilled
+        """
+        self.id = os.path.basename(spill_path)
+        self.spill_path = spill_path
+        self.values = {}
+        self.sizes = {}
+        self.spilled = False
+        self.last_seen = time.monotonic()
+        self.lock = threading.Lock()
+
+        # Remove the spill file once the session (and with it the slot) is gone
+        self._finalizer = weakref.finalize(self, _remove_file, spill_path)
+
+    @property
+    def footprint(self):
+        """Approximate bytes of the parked values."""
+        return sum(self.sizes.values())
+
+class SessionMemoryManager:
+    """
+    Tracks the parked values of every session in the process and spills
+    idle sessions, and the least recently seen ones beyond the memory
+    budget, to disk.
+
+    Sweeps run at most once per sweep interval, piggybacking on whichever
+    session reruns next, so no background thread is needed.
+    """
+
+    def __init__(self, directory=None, idle_ttl=1800.0, evict_ttl=86400.0, sweep_interval=60.0, memory_budget=0):
+        """
+        Parameters:
+        - directory: Directory for spill files (defaults to the system temp directory)
+        - idle_ttl: Seconds a session may be idle before its values are spilled
+        - memory_budget: Bytes the resident slots may hold together before the least recently seen are spilled (0 for no limit)
+        - evict_ttl: Seconds a session may be idle before its spilled values are deleted (0 keeps them)
+        - sweep_interval: Minimum seconds between sweeps
+        """
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # A private directory per process, so replicas can share the parent
+        self.directory = tempfile.mkdtemp(prefix="promptengsessions-", dir=directory or None)
+        self._cleanup = weakref.finalize(self, shutil.rmtree, self.directory, True)
+
+        self.idle_ttl = max(0.0, idle_ttl)
+        self.evict_ttl = max(0.0, evict_ttl)
+        self.sweep_interval = max(0.0, sweep_interval)
+        self.memory_budget = max(0, memory_budget)
+        self._slots = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.metrics = {
+            "spills": 0,
+            "rehydrations": 0,
+            "evictions": 0,
+            "bytes_spilled": 0,
+            "budget_spills": 0,
+            "spill_errors": 0
+        }
+
+    def new_slot(self):
+        """Create and register a slot for a new session."""
+        slot = SessionSlot(os.path.join(self.directory, uuid.uuid4().hex))
+        with self._lock:
+            self._slots[slot.id] = slot
+        return slot
+
+    def park(self, slot, values):
+        """
+        Move values into a slot at the end of a rerun.
+
+        Parameters:
+        - slot: The session's slot
+        - values: Dictionary of spillable session state values
+        """
+        with slot.lock:
+            for key, value in values.items():
+                # Values may have changed in place, so measure them on every park
+                slot.sizes[key] = _measure(value)
+                slot.values[key] = value
+            for key in list(slot.sizes):
+                if key not in slot.values:
+                    del slot.sizes[key]
+            slot.last_seen = time.monotonic()
+
+    def take(self, slot):
+        """
+        Take a slot's values at the start of a rerun, reading them back from
+        disk if the slot was spilled.
+
+        Returns:
+        - Dictionary of the parked values
+        """
+        with slot.lock:
+            slot.last_seen = time.monotonic()
+            if slot.spilled:
+                self._rehydrate(slot)
+            values = slot.values
+            slot.values = {}
+            return values
+
+    def _rehydrate(self, slot):
+        """Read a spilled slot's values back into memory. Called with the slot lock held."""
+        try:
+            with open(slot.spill_path, "rb") as spill_file:
+                slot.values = pickle.load(spill_file)
+        except (OSError, pickle.PickleError, EOFError):
+            # The values can be regenerated; start the session over without them
+            slot.values = {}
+            slot.sizes = {}
+        _remove_file(slot.spill_path)
+        slot.spilled = False
+        self.metrics["rehydrations"] += 1
+
+    def _spill(self, slot):
+        """Write an idle slot's values to disk and drop them from memory. Called with the slot lock held."""
+        data = pickle.dumps(slot.values, protocol=pickle.HIGHEST_PROTOCOL)
+        temp_path = slot.spill_path + ".tmp"
+        with open(temp_path, "wb") as spill_file:
+            spill_file.write(data)
+        os.replace(temp_path, slot.spill_path)
+
+        slot.values = {}
+        slot.spilled = True
+        self.metrics["spills"] += 1
+        self.metrics["bytes_spilled"] += len(data)
+
+    def _evict(self, slot):
+        """Delete a spilled slot's values. Called with the slot lock held."""
+        _remove_file(slot.spill_path)
+        slot.sizes = {}
+        slot.spilled = False
+        self.metrics["evictions"] += 1
+
+    def sweep(self, now=None):
+        """
+        Spill every resident slot that has been idle longer than the idle TTL,
+        then spill the least recently seen resident slots until the rest fit
+        in the memory budget, and delete spilled values idle longer than the
+        eviction TTL.
+
+        Parameters:
+        - now: Current time.monotonic() value (for testing)
+
+        Returns:
+        - Number of slots spilled
+        """
+        now = time.monotonic() if now is None else now
+        self._last_sweep = now
+        with self._lock:
+            slots = list(self._slots.values())
+
+        spilled = 0
+        for slot in slots:
+            # Skip sessions that are rerunning right now
+            if not slot.lock.acquire(blocking=False):
+                continue
+            try:
+                idle = now - slot.last_seen
+                if slot.spilled:
+                    if self.evict_ttl and idle >= self.evict_ttl:
+                        self._evict(slot)
+                    continue
+                if not slot.values or idle < self.idle_ttl:
+                    continue
+                if self._try_spill(slot):
+                    spilled += 1
+            finally:
+                slot.lock.release()
+
+        if self.memory_budget:
+            spilled += self._spill_over_budget(slots)
+        return spilled
+
+    def _spill_over_budget(self, slots):
+        """
+        Spill resident slots, least recently seen first, until the resident
+        footprint fits in the memory budget.
+
+        Returns:
+        - Number of slots spilled
+        """
+        resident = [slot for slot in slots if not slot.spilled and slot.values]
+        excess = sum(slot.footprint for slot in resident) - self.memory_budget
+        spilled = 0
+        for slot in sorted(resident, key=lambda slot: slot.last_seen):
+            if excess <= 0:
+                break
+            if not slot.lock.acquire(blocking=False):
+                continue
+            try:
+                # The session may have rerun since the slot list was taken
+                if slot.spilled or not slot.values:
+                    continue
+                footprint = slot.footprint
+                if self._try_spill(slot):
+                    excess -= footprint
+                    spilled += 1
+                    self.metrics["budget_spills"] += 1
+            finally:
+                slot.lock.release()
+        return spilled
+
+    def _try_spill(self, slot):
+        """
+        Spill a slot, counting values that cannot be written as a spill error.
+        Called with the slot lock held.
+
+        Returns:
+        - True if the slot was spilled
+        """
+        try:
+            self._spill(slot)
+            return True
+        except (OSError, pickle.PickleError, TypeError, AttributeError):
+            # Values that cannot be pickled simply stay in memory
+            self.metrics["spill_errors"] += 1
+            return False
+
+    def maybe_sweep(self):
+        """
+        Sweep if the sweep interval has passed or the resident slots exceed
+        the memory budget.
+
+        Returns:
+        - Number of slots spilled
+        """
+        if time.monotonic() - self._last_sweep < self.sweep_interval and not self._over_budget():
+            return 0
+        return self.sweep()
+
+    def _over_budget(self):
+        """Return True if a memory budget is set and the resident slots exceed it."""
+        if not self.memory_budget:
+            return False
+        with self._lock:
+            slots = list(self._slots.values())
+        return sum(slot.footprint for slot in slots if not slot.spilled) > self.memory_budget
+
+    def stats(self):
+        """
+        Return resident and spilled session counts.
+
+        Returns:
+        - Dictionary with sessions, resident, spilled and resident_bytes keys
+        """
+        with self._lock:
+            slots = list(self._slots.values())
+        resident = [slot for slot in slots if not slot.spilled]
+        return {
+            "sessions": len(slots),
+            "resident": len(resident),
+            "spilled": len(slots) - len(resident),
+            "resident_bytes": sum(slot.footprint for slot in resident)
+        }
+
+def _measure(value):
+    """
+    Return the approximate size of a value in bytes.
+
+    Values that keep track of their own size (a size_bytes attribute, like
+    ResponseStore) report it, so they are not pickled on every park.
+    """
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    size = getattr(value, "size_bytes", None)
+    if isinstance(size, int):
+        return size
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except (pickle.PickleError, TypeError, AttributeError):
+        return 0
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_session_memory():
+    """Return the session memory manager shared by every session in this process."""
+    global _manager
+
+    if _manager is not None:
+        return _manager
+
+    with _manager_lock:
+        if _manager is None:
+            _manager = SessionMemoryManager(
+                directory=get_setting("SESSION_SPILL_DIR"),
+                idle_ttl=get_float_setting("SESSION_IDLE_TTL", 1800.0),
+                evict_ttl=get_float_setting("SESSION_EVICT_TTL", 86400.0),
+                sweep_interval=get_float_setting("SESSION_SWEEP_INTERVAL", 60.0),
+                memory_budget=get_int_setting("SESSION_MEMORY_BUDGET", 0)
+            )
+    return _manager
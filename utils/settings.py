@@ -0,0 +1,39 @@
+import os
+
+# All course settings are read from environment variables with this prefix,
+# e.g. PROMPTENG_ROUTER_MODE=1
+SETTINGS_PREFIX = "PROMPTENG_"
+
+def get_setting(name, default=None):
+    """
+    Read a setting from the environment.
+
+    Parameters:
+    - name: Setting name without the prefix (e.g. "ROUTER_MODE")
+    - default: Value returned when the setting is not defined
+
+    Returns:
+    - The setting value as a string, or the default
+    """
+    return os.environ.get(SETTINGS_PREFIX + name, default)
+
+def get_bool_setting(name, default=False):
+    """Read a boolean setting. "1", "true", "yes" and "on" count as true."""
+    value = get_setting(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def get_int_setting(name, default):
+    """Read an integer setting, falling back to the default if it is not a number."""
+    try:
+        return int(get_setting(name, default))
+    except (TypeError, ValueError):
+        return default
+
+def get_float_setting(name, default):
+    """Read a float setting, falling back to the default if it is not a number."""
+    try:
+        return float(get_setting(name, default))
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,168 @@
+"""
+Canned AI responses for the demo backend.
+
+The responses live in data/simulated_responses.json. Each entry has trigger
+phrases, a priority and a response template; a prompt gets the response of
+the highest-priority entry with a trigger phrase anywhere in it (ignoring
+case), or the default response when nothing matches. The trigger phrases
+are compiled once into an Aho-Corasick automaton, so matching a prompt
+reads it once no matter how many entries the corpus has.
+
+Templates may use $prompt (the prompt text) and $trigger (the phrase that
+matched), following string.Template syntax.
+"""
+import json
+import os
+import threading
+from collections import deque
+from string import Template
+from utils.course_manifest import APP_DIR
+from utils.settings import get_setting
+
+CORPUS_VERSION = 1
+DEFAULT_CORPUS_PATH = os.path.join(APP_DIR, "data", "simulated_responses.json")
+
+class PhraseMatcher:
+    """Aho-Corasick automaton that finds every phrase occurring in a text."""
+
+    def __init__(self, phrases):
+        """
+        Parameters:
+        - phrases: Iterable of (phrase, value) pairs; phrases are matched case-insensitively
+        """
+        # State 0 is the root; each state has transitions, a failure link and outputs
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [[]]
+
+        for phrase, value in phrases:
+            phrase = phrase.lower()
+            if not phrase:
+                continue
+            state = 0
+            for char in phrase:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append([])
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._outputs[state].append((phrase, value))
+
+        # Breadth-first pass to set failure links and merge outputs along them
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def find(self, text):
+        """
+        Yield every (phrase, value) pair whose phrase occurs in a text.
+
+        A phrase occurring several times is yielded once per occurrence.
+        """
+        state = 0
+        for char in text.lower():
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if self._outputs[state]:
+                yield from self._outputs[state]
+
+class ResponseSimulator:
+    """Matches prompts against a response corpus."""
+
+    def __init__(self, corpus):
+        """
+        Parameters:
+        - corpus: Dictionary with version, default and responses keys, as in the corpus file
+
+        Raises:
+        - ValueError if the corpus is of another version or malformed
+        """
+        if not isinstance(corpus, dict) or corpus.get("version") != CORPUS_VERSION:
+            raise ValueError("Unsupported simulated response corpus")
+
+        self.default = Template(corpus.get("default", ""))
+        self.entries = []
+        phrases = []
+        for entry in corpus.get("responses", []):
+            if not entry.get("triggers") or "response" not in entry:
+                raise ValueError(f"Corpus entry {entry.get('id')!r} needs triggers and a response")
+            # Earlier entries win ties, like the branches of an if/elif chain
+            rank = (entry.get("priority", 0), -len(self.entries))
+            self.entries.append((rank, entry.get("id"), Template(entry["response"])))
+            phrases.extend((trigger, len(self.entries) - 1) for trigger in entry["triggers"])
+        self.matcher = PhraseMatcher(phrases)
+
+    def _best_match(self, prompt_text):
+        """Return (trigger phrase, entry index) of the highest-ranked match, or None."""
+        best = None
+        for phrase, index in self.matcher.find(prompt_text):
+            if best is None or self.entries[index][0] > self.entries[best[1]][0]:
+                best = (phrase, index)
+        return best
+
+    def match(self, prompt_text):
+        """
+        Find the corpus entry for a prompt.
+
+        Returns:
+        - (entry id, matched trigger phrase), or (None, None) if nothing matches
+        """
+        best = self._best_match(prompt_text)
+        if best is None:
+            return None, None
+        return self.entries[best[1]][1], best[0]
+
+    def respond(self, prompt_text):
+        """Return the response text for a prompt."""
+        best = self._best_match(prompt_text)
+        if best is None:
+            return self.default.safe_substitute(prompt=prompt_text, trigger="")
+        return self.entries[best[1]][2].safe_substitute(prompt=prompt_text, trigger=best[0])
+
+def load_corpus(path):
+    """Read a response corpus file."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+_simulator = None
+_simulator_lock = threading.Lock()
+
+def get_response_simulator():
+    """
+    Return the simulator shared by every session in this process, compiled
+    from the corpus file in PROMPTENG_SIMULATOR_CORPUS (default
+    data/simulated_responses.json).
+    """
+    global _simulator
+
+    if _simulator is not None:
+        return _simulator
+
+    with _simulator_lock:
+        if _simulator is None:
+            _simulator = ResponseSimulator(load_corpus(get_setting("SIMULATOR_CORPUS", DEFAULT_CORPUS_PATH)))
+    return _simulator
+
+def simulate_response(prompt_text):
+    """
+    Return a canned AI response for a prompt, used by the demo backend.
+
+    Parameters:
+    - prompt_text: The prompt text
+
+    Returns:
+    - Dictionary with a response key
+    """
+    return {"response": get_response_simulator().respond(prompt_text)}
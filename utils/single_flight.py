@@ -0,0 +1,143 @@
+import threading
+from utils.llm_backend import LLMError
+from utils.settings import get_float_setting
+
+class Flight:
+    """One upstream request that other callers can wait for."""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+    def wait(self, timeout=None):
+        """
+        Wait for the request to finish.
+
+        Returns:
+        - The leader's result
+
+        Raises:
+        - LLMError if the leader failed or the wait timed out
+        """
+        if not self._done.wait(timeout):
+            raise LLMError("Timed out waiting for an identical request to finish")
+        if self.error is not None:
+            raise LLMError(str(self.error)) from self.error
+        return self.result
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical requests.
+
+    The first caller for a key becomes the leader and makes the upstream
+    call; callers arriving while it is in flight wait for the leader and
+    receive its result or its error. Nothing is remembered once the call
+    finishes; that is the response cache's job.
+    """
+
+    def __init__(self, wait_timeout=None):
+        """
+        Parameters:
+        - wait_timeout: Maximum seconds a caller waits for the leader (None waits indefinitely)
+        """
+        self.wait_timeout = wait_timeout
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.metrics = {
+            "leaders": 0,
+            "shared": 0,
+            "errors": 0,
+            "timeouts": 0
+        }
+
+    def begin(self, key):
+        """
+        Join the flight for a key, starting one if none is in progress.
+
+        Returns:
+        - (flight, is_leader); the leader must call finish()
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self.metrics["shared"] += 1
+                return flight, False
+            flight = Flight()
+            self._flights[key] = flight
+            self.metrics["leaders"] += 1
+            return flight, True
+
+    def finish(self, key, flight, result=None, error=None):
+        """Publish the leader's result or error to every waiting caller."""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.result = result
+        flight.error = error
+        if error is not None:
+            self.metrics["errors"] += 1
+        flight._done.set()
+
+    def wait(self, flight):
+        """Wait for a flight led by another caller, counting timeouts."""
+        try:
+            return flight.wait(self.wait_timeout)
+        except LLMError:
+            if not flight._done.is_set():
+                self.metrics["timeouts"] += 1
+            raise
+
+    def run(self, key, fn):
+        """
+        Call fn once for all concurrent callers with the same key.
+
+        Returns:
+        - (result, shared), where shared is True if another caller made the call
+        """
+        flight, is_leader = self.begin(key)
+        if not is_leader:
+            return self.wait(flight), True
+
+        try:
+            result = fn()
+        except Exception as e:
+            self.finish(key, flight, error=e)
+            raise
+        except BaseException:
+            self.finish(key, flight, error=LLMError("The request was interrupted"))
+            raise
+        self.finish(key, flight, result=result)
+        return result, False
+
+    def in_flight(self):
+        """Return the number of requests currently in flight."""
+        return len(self._flights)
+
+_coalescer = None
+_coalescer_lock = threading.Lock()
+
+def get_request_coalescer():
+    """
+    Return the request coalescer shared by every session in this process.
+
+    Callers wait at most PROMPTENG_LLM_COALESCE_TIMEOUT seconds for an
+    identical request. The default covers the leader's whole deadline: its
+    wait in the LLM scheduler queue plus the connect and read timeouts.
+    """
+    global _coalescer
+
+    if _coalescer is not None:
+        return _coalescer
+
+    with _coalescer_lock:
+        if _coalescer is None:
+            default_timeout = (
+                get_float_setting("LLM_QUEUE_TIMEOUT", 120.0)
+                + get_float_setting("LLM_CONNECT_TIMEOUT", 5.0)
+                + get_float_setting("LLM_READ_TIMEOUT", 60.0)
+            )
+            _coalescer = SingleFlight(wait_timeout=get_float_setting("LLM_COALESCE_TIMEOUT", default_timeout))
+    return _coalescer
@@ -1,33 +1,68 @@
+"""
+Session state, progress and draft saving for the course pages.
+
+Learners have no accounts: saved progress, reflections and drafts are
+stored under the learner ID in the "learner" query parameter, and that link
+is the only credential. Anyone who has it can read and overwrite the
+learner's saved work, so IDs are random tokens that cannot be guessed and
+short or malformed IDs are replaced with a new one.
+"""
 import streamlit as st
 import os
 import json
+import functools
+import re
+import secrets
+import time
+from utils.course_manifest import get_course_manifest
+from utils.progress_engine import ProgressTracker
+from utils.progress_state import ProgressState
+from utils.settings import get_bool_setting, get_int_setting
+from utils.write_behind import WriteBehindQueue
+from utils.progress_store import get_progress_store
+from utils.delta_sync import SyncLedger, SERVER, make_envelope, encoded_size
+from utils.drafts import DraftAutosaver, DRAFT_SECTIONS
+from utils.session_memory import get_session_memory, is_spillable_key
+from utils.response_store import ResponseStore
+
+# Learner IDs accepted from the "learner" query parameter: random tokens of
+# at least 32 URL-safe characters, so other learners' IDs cannot be guessed
+LEARNER_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{32,64}$")
+
+def is_stateless_mode():
+    """
+    Return True if the app runs as one of several stateless replicas.
+
+    Set PROMPTENG_STATELESS=1 together with a shared progress store. Every
+    rerun then starts from the store's copy of the learner's progress and
+    writes its changes back before it ends, so any replica can serve it.
+    """
+    return get_bool_setting("STATELESS", False)
 
 def get_all_pages():
     """Get all available pages from the pages directory."""
-    # Import locally to avoid circular imports
-    import os
-    import glob
-    
-    pages = []
-    pattern = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'pages', '*.py')
-    for file in glob.glob(pattern):
-        # Extract the filename without extension
-        filename = os.path.basename(file)[:-3]
-        # Skip __init__.py and other special files
-        if not filename.startswith('__'):
-            pages.append(filename)
-    return sorted(pages)
+    return list(get_course_manifest().page_ids)
 
 def initialize_session_state():
     """Initialize all required session state variables if they don't exist"""
     
+    # Bring back values parked at the end of the previous rerun
+    restore_session_memory()
+
+    # Restore saved progress once per session, or whenever another replica
+    # has changed it in stateless mode
+    if 'progress_loaded' not in st.session_state:
+        load_progress()
+    elif is_stateless_mode():
+        refresh_progress()
+    
     # Initialize navigation state
     if 'current_page' not in st.session_state:
         st.session_state.current_page = "course_introduction"
     
-    # Initialize completed pages tracking
+    # Initialize completed pages tracking (a bitset-backed set)
     if 'completed_pages' not in st.session_state:
-        st.session_state.completed_pages = set()
+        st.session_state.completed_pages = get_progress_state().completed
     
     # Initialize teacher mode toggle
     if 'show_teacher_content' not in st.session_state:
@@ -49,79 +84,412 @@ def initialize_session_state():
     if 'prompt_tests' not in st.session_state:
         st.session_state.prompt_tests = {}
 
+def get_progress_state():
+    """
+    Get the compact progress and visit state for the current session.
+
+    The state is remapped to the new page indices when the course manifest
+    changes.
+    """
+    manifest = get_course_manifest()
+    state = st.session_state.get("progress_state")
+    if state is None:
+        state = ProgressState(manifest)
+        st.session_state.progress_state = state
+    elif state.manifest is not manifest:
+        state = state.remapped(manifest)
+        st.session_state.progress_state = state
+    return state
+
+def get_progress_tracker():
+    """
+    Get the progress tracker for the current session.
+
+    The tracker counts the pages in completed_pages, which is the completion
+    bitset of the progress state. It is rebuilt only when the course manifest
+    changes or completed_pages was replaced or modified without going through
+    mark_page_completed.
+    """
+    state = get_progress_state()
+    completed = st.session_state.get("completed_pages")
+    if completed is not state.completed:
+        # completed_pages was replaced, e.g. cleared or loaded from the browser as a list
+        pages = list(completed or ())
+        state.completed.set_bits(0)
+        state.completed |= pages
+        st.session_state.completed_pages = state.completed
+
+    tracker = st.session_state.get("progress_tracker")
+    if (tracker is None
+            or tracker.manifest is not state.manifest
+            or tracker.completed is not state.completed
+            or not tracker.is_in_sync()):
+        tracker = ProgressTracker(state.manifest, state.completed)
+        st.session_state.progress_tracker = tracker
+    return tracker
+
+def get_sync_ledger():
+    """Get the per-key version ledger used to sync only changed data"""
+    if 'sync_ledger' not in st.session_state:
+        st.session_state.sync_ledger = SyncLedger()
+    return st.session_state.sync_ledger
+
+def get_progress_queue():
+    """
+    Get the write-behind queue that persists this session's progress.
+
+    Changes are written in one batch at the end of every rerun;
+    PROMPTENG_PROGRESS_QUEUE_LIMIT sets the number of pending writes that
+    forces a flush before that.
+    """
+    queue = st.session_state.get("progress_queue")
+    if queue is None:
+        queue = WriteBehindQueue(
+            functools.partial(write_progress, get_learner_id(), get_sync_ledger()),
+            max_pending=get_int_setting("PROGRESS_QUEUE_LIMIT", 256)
+        )
+        st.session_state.progress_queue = queue
+    return queue
+
+def flush_progress():
+    """Write queued progress changes. Called once at the end of every rerun."""
+    queue = st.session_state.get("progress_queue")
+    if queue is None:
+        return 0
+    try:
+        return queue.flush()
+    except Exception as e:
+        # The changes stay queued and are retried on the next rerun
+        if st.session_state.get("show_debug", False):
+            st.toast(f"Could not save progress: {str(e)}")
+        return 0
+    finally:
+        get_sync_ledger().end_run()
+
+def finish_run():
+    """
+    End-of-run work shared by every entry point: write queued progress and
+    drafts and park bulky session values.
+    Call it from a finally block so it also runs when a page navigates away
+    with st.switch_page.
+    """
+    flush_progress()
+    flush_drafts()
+    park_session_memory()
+
+def get_response_store():
+    """Get the bounded store of example responses for the current session."""
+    store = st.session_state.get("response_store")
+    if store is None:
+        store = ResponseStore(
+            max_entries=get_int_setting("RESPONSE_STORE_LIMIT", 64),
+            max_bytes=get_int_setting("RESPONSE_STORE_BYTES", 256 * 1024)
+        )
+        st.session_state.response_store = store
+    return store
+
+def save_example_response(page_id, example_id, variant, text):
+    """
+    Save the AI response generated for an example.
+
+    Parameters:
+    - page_id: ID of the page showing the example
+    - example_id: ID of the example on the page (e.g. "example1")
+    - variant: Prompt variant (e.g. "no_context")
+    - text: Response text
+    """
+    get_response_store().put(page_id, example_id, variant, text)
+
+def get_example_response(page_id, example_id, variant):
+    """Return the saved AI response for an example, or None."""
+    return get_response_store().get(page_id, example_id, variant)
+
+def get_session_slot():
+    """Get the slot this session parks its spillable values in between reruns."""
+    slot = st.session_state.get("session_slot")
+    if slot is None:
+        slot = get_session_memory().new_slot()
+        st.session_state.session_slot = slot
+    return slot
+
+def restore_session_memory():
+    """Put the session's parked values back into session state, reading them from disk if they were spilled"""
+    for key, value in get_session_memory().take(get_session_slot()).items():
+        # A value set earlier in this run is newer than the parked one
+        if key not in st.session_state:
+            st.session_state[key] = value
+
+def park_session_memory():
+    """
+    Move spillable values out of session state at the end of a rerun, so
+    they can be written to disk if the session goes idle.
+    """
+    values = {key: st.session_state[key] for key in list(st.session_state.keys()) if is_spillable_key(key)}
+    for key in values:
+        del st.session_state[key]
+
+    manager = get_session_memory()
+    manager.park(get_session_slot(), values)
+    # Spill other sessions that have gone idle
+    manager.maybe_sweep()
+
+def get_draft_autosaver():
+    """
+    Get the draft autosaver for this session.
+
+    Changed drafts are written at the end of every rerun.
+    """
+    if 'draft_autosaver' not in st.session_state:
+        st.session_state.draft_autosaver = DraftAutosaver(
+            functools.partial(write_drafts, get_learner_id(), get_sync_ledger()),
+            max_pending=get_int_setting("PROGRESS_QUEUE_LIMIT", 256)
+        )
+    return st.session_state.draft_autosaver
+
+def get_draft_fields(page_id):
+    """Get the keys of the text areas on a page whose text is autosaved"""
+    entry = get_course_manifest().get(page_id)
+    if entry is None or entry["section"] not in DRAFT_SECTIONS:
+        return []
+    return entry.get("text_fields", [])
+
+def restore_drafts(page_id):
+    """
+    Put a page's saved drafts into its text areas before they are created.
+
+    Only fields with a saved draft are written to session state, so the
+    others start out as the page defines them. Text area keys such as
+    "reflection1" are used on many pages, so a field whose current text
+    belongs to another page is cleared.
+    """
+    fields = get_draft_fields(page_id)
+    if not fields:
+        return
+
+    autosaver = get_draft_autosaver()
+    owners = st.session_state.setdefault("draft_owners", {})
+    for field in fields:
+        if owners.get(field) == page_id and field in st.session_state:
+            continue
+        draft = autosaver.get(page_id, field)
+        if draft is not None:
+            if owners.get(field) is not None or field not in st.session_state:
+                st.session_state[field] = draft
+        elif owners.get(field) is not None:
+            st.session_state.pop(field, None)
+        owners[field] = page_id
+
+def autosave_drafts(page_id):
+    """Record the text of a page's text areas after the page has run"""
+    fields = get_draft_fields(page_id)
+    if not fields:
+        return
+
+    autosaver = get_draft_autosaver()
+    for field in fields:
+        text = st.session_state.get(field)
+        if isinstance(text, str):
+            autosaver.update(page_id, field, text)
+
+def flush_drafts():
+    """Write the drafts changed during this rerun. Called once at the end of every rerun."""
+    autosaver = st.session_state.get("draft_autosaver")
+    if autosaver is None:
+        return 0
+    try:
+        return autosaver.flush()
+    except Exception as e:
+        # The drafts stay queued and are retried on the next rerun
+        if st.session_state.get("show_debug", False):
+            st.toast(f"Could not save drafts: {str(e)}")
+        return 0
+
 def mark_page_completed(page_id):
     """Mark a page as completed for progress tracking"""
-    if 'completed_pages' not in st.session_state:
-        st.session_state.completed_pages = set()
-    
-    st.session_state.completed_pages.add(page_id)
-    
-    # Save to persistent storage if available
-    save_progress()
+    # Only queue a save when the page was not already completed
+    if get_progress_tracker().mark(page_id):
+        queue = get_progress_queue()
+        queue.put("completion", page_id, int(time.time()))
+        queue.put("progress", None, get_progress_state())
 
 def mark_all_previous_completed(current_page):
     """
     Mark all pages before the current one as completed.
     Used when a user jumps ahead in the course.
     """
-    if current_page.startswith("lesson_"):
-        parts = current_page.split("_")
-        if len(parts) >= 3:
-            current_lesson = int(parts[1])
-            current_section = parts[2]
-            
-            # Get section order
-            section_order = {"introduction": 1, "examples": 2, "activities": 3, "reflection": 4}
-            current_section_order = section_order.get(current_section, 0)
-            
-            # Mark all previous lessons as completed
-            for lesson in range(1, current_lesson):
-                for section in ["introduction", "examples", "activities", "reflection"]:
-                    page_id = f"lesson_{lesson}_{section}"
-                    mark_page_completed(page_id)
-            
-            # Mark all previous sections in current lesson
-            for section, order in section_order.items():
-                if order < current_section_order:
-                    page_id = f"lesson_{current_lesson}_{section}"
-                    mark_page_completed(page_id)
+    manifest = get_course_manifest()
+    current = manifest.get(current_page)
+    if current is None or not current["lesson"].isdigit():
+        return
+
+    # Mark every lesson page that comes earlier in the course order
+    for entry in manifest.pages[:current["index"]]:
+        if entry["id"] in manifest.lesson_page_ids:
+            mark_page_completed(entry["id"])
 
 def get_progress_percentage():
     """Calculate the course completion percentage"""
-    if 'completed_pages' not in st.session_state:
-        return 0
-    
-    # Total number of pages in the course (17 lessons * 4 sections)
-    total_pages = 17 * 4
-    
-    # Count relevant completed pages (lesson_*_*)
-    completed_count = sum(1 for page in st.session_state.completed_pages 
-                         if page.startswith("lesson_") and len(page.split("_")) >= 3)
-    
-    # Calculate percentage
-    if total_pages > 0:
-        return int((completed_count / total_pages) * 100)
-    return 0
+    return get_progress_tracker().percent()
+
+def get_lesson_completion(lesson):
+    """Get the fraction (0.0 - 1.0) of a lesson's pages that are completed"""
+    return get_progress_tracker().lesson_completion(lesson)
+
+def is_lesson_completed(lesson):
+    """Check if a lesson ("intro", "1", ...) has its reflection completed"""
+    return get_progress_tracker().is_lesson_complete(lesson)
+
+def get_next_unlocked_lesson():
+    """Get the first lesson that is unlocked but not yet completed, or None"""
+    return get_progress_tracker().next_unlocked_lesson()
 
 def save_progress():
-    """Save progress to a file for persistence"""
-    # This is a placeholder - in a real app, you would save to a database
-    # or a file on the server. For this example, we'll just print.
-    
-    # Convert set to list for JSON serialization
-    progress_data = {
-        "completed_pages": list(st.session_state.completed_pages),
-        "reflections": st.session_state.reflections,
-        "activity_responses": st.session_state.activity_responses
-    }
-    
-    # Print for demonstration
-    if st.session_state.get("show_debug", False):
-        st.sidebar.write("Progress data saved:")
-        st.sidebar.json(progress_data)
-
-def load_progress():
-    """Load progress from persistent storage"""
-    # This is a placeholder - in a real app, you would load from a database
-    # or a file on the server.
-    pass
+    """Queue the session's progress for saving at the end of the rerun"""
+    queue = get_progress_queue()
+    queue.put("progress", None, get_progress_state())
+    queue.put("reflections", None, st.session_state.get("reflections", {}))
+    queue.put("activity_responses", None, st.session_state.get("activity_responses", {}))
+
+def get_learner_id():
+    """
+    Get the ID under which this learner's progress is saved.
+
+    The ID is kept in the "learner" query parameter, so opening the same link
+    later or on another device restores the learner's progress. The link is
+    the only credential, so new IDs are unguessable random tokens and IDs
+    that do not look like one are not accepted.
+    """
+    learner_id = st.session_state.get("learner_id")
+    if learner_id is None:
+        learner_id = st.query_params.get("learner", "")
+        if not LEARNER_ID_PATTERN.match(learner_id):
+            learner_id = secrets.token_urlsafe(24)
+        st.session_state.learner_id = learner_id
+
+    # Page switches drop query parameters, so put it back when needed
+    if st.query_params.get("learner") != learner_id:
+        st.query_params["learner"] = learner_id
+    return learner_id
+
+def write_progress(learner_id, ledger, batch):
+    """
+    Write a batch of queued progress changes to the progress store.
+
+    Only keys whose content differs from what the server already has are
+    sent; the ledger is updated once the write succeeds.
+
+    Parameters:
+    - learner_id: ID of the learner the changes belong to
+    - ledger: SyncLedger of the learner's session
+    - batch: List of (kind, key, value) tuples from the write-behind queue
+    """
+    entries = []
+    staged = []
+    for kind, key, value in batch:
+        if kind == "progress":
+            # Completion and visit flags are stored as a compact bitset encoding;
+            # stateless replicas also need the first-visit times
+            envelope = ledger.stage(SERVER, kind, value.to_bytes(include_timestamps=is_stateless_mode()))
+            if envelope:
+                entries.append((kind, key, envelope["value"]))
+                staged.append((kind, envelope))
+        elif kind == "completion":
+            entries.append((kind, key, value))
+        else:
+            # Reflections and activity responses are saved one row per changed key
+            for response_key, response in value.items():
+                envelope = ledger.stage(SERVER, f"{kind}/{response_key}", response)
+                if envelope:
+                    entries.append((kind, response_key, envelope))
+                    staged.append((f"{kind}/{response_key}", envelope))
+
+    if not entries:
+        return
+    ledger.note_write(get_progress_store().write_batch(learner_id, entries))
+
+    for ledger_key, envelope in staged:
+        ledger.confirm(SERVER, ledger_key, envelope, size=encoded_size(envelope["value"]))
+    for kind, key, value in entries:
+        if kind == "completion":
+            ledger.confirm(SERVER, f"completion/{key}", make_envelope(True, 1, value), size=encoded_size(key))
+
+def write_drafts(learner_id, ledger, batch):
+    """
+    Write a batch of changed drafts to the progress store.
+
+    Parameters:
+    - learner_id: ID of the learner the drafts belong to
+    - ledger: SyncLedger of the learner's session
+    - batch: List of ("drafts", key, text) tuples from the draft autosaver
+    """
+    now = int(time.time())
+    entries = [(kind, key, make_envelope(text, 0, now)) for kind, key, text in batch]
+    ledger.note_write(get_progress_store().write_batch(learner_id, entries))
+
+def load_progress(prefer_saved=False):
+    """
+    Load the learner's saved progress from the progress store
+
+    Parameters:
+    - prefer_saved: Let saved reflections and responses replace the ones in session state
+    """
+    st.session_state.progress_loaded = True
+    saved = get_progress_store().load(get_learner_id())
+
+    manifest = get_course_manifest()
+    state = None
+    if saved["progress"] is not None:
+        try:
+            state = ProgressState.from_bytes(manifest, saved["progress"])
+        except ValueError:
+            # Saved with a different set of pages; the completion rows below still apply
+            state = None
+    if state is None:
+        state = ProgressState(manifest)
+    state.completed |= saved["completions"].keys()
+
+    st.session_state.progress_state = state
+    st.session_state.completed_pages = state.completed
+    # Remember what the server holds so unchanged data is not sent back
+    ledger = get_sync_ledger()
+    for kind in ("reflections", "activity_responses"):
+        for key, value in saved[kind].items():
+            ledger_key = f"{kind}/{key}"
+            ledger.confirm(SERVER, ledger_key, make_envelope(value, 0, saved["updated_at"].get(ledger_key, 0)))
+
+    ledger.revision = saved["revision"]
+
+    for kind in ("reflections", "activity_responses"):
+        if prefer_saved:
+            st.session_state[kind] = {**st.session_state.get(kind, {}), **saved[kind]}
+        else:
+            st.session_state[kind] = {**saved[kind], **st.session_state.get(kind, {})}
+    get_draft_autosaver().load(saved["drafts"])
+
+def refresh_progress():
+    """
+    Reload the learner's progress if the store has a newer revision.
+    Used in stateless mode, where another replica may have served the previous rerun.
+    """
+    # Anything this session still has queued goes out first
+    flush_progress()
+    flush_drafts()
+
+    revision = get_progress_store().revision(get_learner_id())
+    if revision is not None and revision != get_sync_ledger().revision:
+        load_progress(prefer_saved=True)
+
+def save_visit_state():
+    """Queue the first-visit and dismissed flags for saving"""
+    get_progress_queue().put("progress", None, get_progress_state())
+
+def clear_saved_progress():
+    """Delete the learner's saved progress and drop any queued changes"""
+    queue = st.session_state.pop("progress_queue", None)
+    if queue is not None:
+        queue.discard()
+    st.session_state.pop("sync_ledger", None)
+    autosaver = st.session_state.pop("draft_autosaver", None)
+    if autosaver is not None:
+        autosaver.queue.discard()
+    get_progress_store().clear(get_learner_id())
@@ -0,0 +1,279 @@
+"""
+Local stub of an OpenAI-compatible chat completions API, for load testing.
+
+The server answers POST /v1/chat/completions (plain and streamed) with
+responses from the simulated response corpus, so the openai backend,
+its connection pool, the response cache, streaming and request
+coalescing can be exercised without network access or API costs. How it
+behaves is set by a profile: the time to the first token, the streaming
+rate, how often requests fail and how many requests it serves at once
+(requests beyond that are rejected with HTTP 429, like a rate-limited API).
+GET /v1/models lists the model and GET /stats returns request counters.
+
+Usage:
+    python -m utils.stub_llm_server [--port 8000] [--profile realistic] [--error-rate 0.05] ...
+
+then run the course with
+    PROMPTENG_LLM_BACKEND=openai PROMPTENG_LLM_BASE_URL=http://127.0.0.1:8000/v1 streamlit run app.py
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.simulated_responses import ResponseSimulator, load_corpus, DEFAULT_CORPUS_PATH
+
+STUB_MODEL = "stub-teacher"
+
+# Behaviour presets. latency is the delay before the first token: a fixed
+# number of seconds, or [low, high] for a uniform distribution, or
+# {"median": s, "sigma": x} for a log-normal one.
+PROFILES = {
+    "instant": {"latency": 0.0, "tokens_per_second": 0, "error_rate": 0.0, "max_concurrency": 0},
+    "fast": {"latency": [0.05, 0.15], "tokens_per_second": 200, "error_rate": 0.0, "max_concurrency": 0},
+    "realistic": {"latency": {"median": 0.6, "sigma": 0.5}, "tokens_per_second": 40, "error_rate": 0.01, "max_concurrency": 32},
+    "slow": {"latency": {"median": 3.0, "sigma": 0.6}, "tokens_per_second": 12, "error_rate": 0.02, "max_concurrency": 8},
+    "flaky": {"latency": [0.2, 1.5], "tokens_per_second": 30, "error_rate": 0.2, "max_concurrency": 4}
+}
+
+def sample_latency(latency, rng):
+    """Return a delay in seconds drawn from a profile's latency setting."""
+    if isinstance(latency, (list, tuple)):
+        return rng.uniform(latency[0], latency[1])
+    if isinstance(latency, dict):
+        return rng.lognormvariate(0.0, latency.get("sigma", 0.5)) * latency["median"]
+    return float(latency)
+
+def split_tokens(text):
+    """Split a response into word-sized streaming tokens."""
+    return re.findall(r"\s*\S+\s*", text) or [text]
+
+class StubLLMServer(ThreadingHTTPServer):
+    """HTTP server holding the corpus, profile and counters shared by its request handlers."""
+
+    daemon_threads = True
+
+    def __init__(self, address, profile, simulator, seed=None):
+        """
+        Parameters:
+        - address: (host, port) to listen on; port 0 picks a free port
+        - profile: Behaviour settings (see PROFILES)
+        - simulator: ResponseSimulator that produces the responses
+        - seed: Random seed for reproducible latencies and errors
+        """
+        super().__init__(address, StubRequestHandler)
+        self.profile = dict(profile)
+        self.simulator = simulator
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        limit = self.profile.get("max_concurrency", 0)
+        self.slots = threading.BoundedSemaphore(limit) if limit else None
+        self.stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "streamed": 0, "errors": 0, "rejected": 0, "active": 0, "max_active": 0}
+
+    @property
+    def url(self):
+        """Base URL to configure as PROMPTENG_LLM_BASE_URL."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def count(self, name, delta=1):
+        """Update a request counter."""
+        with self.stats_lock:
+            self.stats[name] += delta
+            self.stats["max_active"] = max(self.stats["max_active"], self.stats["active"])
+
+    def draw(self):
+        """Return (latency, fails) for one request."""
+        with self.rng_lock:
+            latency = sample_latency(self.profile.get("latency", 0.0), self.rng)
+            fails = self.rng.random() < self.profile.get("error_rate", 0.0)
+        return latency, fails
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Handles one connection to the stub server, with keep-alive."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "PromptEngStubLLM/1.0"
+
+    def log_message(self, format, *args):
+        # Keep load tests quiet
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunk(self, data):
+        """Write one chunk of a chunked response."""
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/v1/models":
+            self._send_json(200, {"object": "list", "data": [{"id": STUB_MODEL, "object": "model", "owned_by": "stub"}]})
+        elif self.path.rstrip("/") == "/stats":
+            with self.server.stats_lock:
+                stats = dict(self.server.stats)
+            self._send_json(200, stats)
+        else:
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            prompt_text = "\n".join(
+                message.get("content", "") for message in request.get("messages", []) if message.get("role") == "user"
+            )
+        except (ValueError, AttributeError):
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+
+        server = self.server
+        server.count("requests")
+        if server.slots is not None and not server.slots.acquire(blocking=False):
+            server.count("rejected")
+            self._send_json(429, {"error": {"message": "Too many concurrent requests", "type": "rate_limit_error"}},
+                            headers={"Retry-After": "1"})
+            return
+
+        server.count("active")
+        try:
+            latency, fails = server.draw()
+            time.sleep(latency)
+            if fails:
+                server.count("errors")
+                self._send_json(500, {"error": {"message": "Simulated server error", "type": "server_error"}})
+                return
+
+            text = server.simulator.respond(prompt_text)
+            model = request.get("model") or STUB_MODEL
+            if request.get("stream"):
+                server.count("streamed")
+                self._stream(text, model)
+            else:
+                self._complete(text, model, prompt_text)
+        finally:
+            server.count("active", -1)
+            if server.slots is not None:
+                server.slots.release()
+
+    def _complete(self, text, model, prompt_text):
+        """Send the whole response, after the time streaming it would have taken."""
+        tokens = split_tokens(text)
+        rate = self.server.profile.get("tokens_per_second", 0)
+        if rate:
+            time.sleep(len(tokens) / rate)
+        self._send_json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": len(split_tokens(prompt_text)),
+                "completion_tokens": len(tokens),
+                "total_tokens": len(split_tokens(prompt_text)) + len(tokens)
+            }
+        })
+
+    def _stream(self, text, model):
+        """Send the response as server-sent events, one token at a time."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        rate = self.server.profile.get("tokens_per_second", 0)
+
+        def event(delta, finish_reason=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+            self._send_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+
+        try:
+            event({"role": "assistant"})
+            for token in split_tokens(text):
+                if rate:
+                    time.sleep(1.0 / rate)
+                event({"content": token})
+            event({}, "stop")
+            self._send_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading
+            self.close_connection = True
+
+def start_stub_server(profile="instant", host="127.0.0.1", port=0, corpus_path=DEFAULT_CORPUS_PATH, seed=None, **overrides):
+    """
+    Start a stub server on a background thread, e.g. for benchmarks.
+
+    Parameters:
+    - profile: Name of a preset in PROFILES
+    - host, port: Address to listen on (port 0 picks a free port)
+    - corpus_path: Response corpus file
+    - seed: Random seed for reproducible latencies and errors
+    - overrides: Profile settings to override (latency, tokens_per_second, error_rate, max_concurrency)
+
+    Returns:
+    - The running StubLLMServer; call shutdown() to stop it
+    """
+    settings = dict(PROFILES[profile], **{name: value for name, value in overrides.items() if value is not None})
+    server = StubLLMServer((host, port), settings, ResponseSimulator(load_corpus(corpus_path)), seed=seed)
+    threading.Thread(target=server.serve_forever, name="stub-llm-server", daemon=True).start()
+    return server
+
+def main(argv=None):
+    """Command-line entry point for running the stub server."""
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible stub LLM server.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("--profile", default="realistic", choices=sorted(PROFILES), help="Behaviour preset")
+    parser.add_argument("--latency", type=float, help="Fixed seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, help="Streaming rate (0 sends everything at once)")
+    parser.add_argument("--error-rate", type=float, help="Fraction of requests that fail with HTTP 500")
+    parser.add_argument("--max-concurrency", type=int, help="Requests served at once before answering HTTP 429 (0 is unlimited)")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_PATH, help="Response corpus file")
+    parser.add_argument("--seed", type=int, help="Random seed")
+    args = parser.parse_args(argv)
+
+    server = start_stub_server(
+        args.profile, args.host, args.port, args.corpus, args.seed,
+        latency=args.latency, tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate, max_concurrency=args.max_concurrency
+    )
+    print(f"Stub LLM server ({args.profile}) listening on {server.url}")
+    print(f"  PROMPTENG_LLM_BACKEND=openai PROMPTENG_LLM_BASE_URL={server.url} streamlit run app.py")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,88 +1,197 @@
-import requests
-import json
 import streamlit as st
+import uuid
+from concurrent.futures import as_completed
+from utils.llm_backend import LLMError, get_llm_backend, get_llm_executor
+from utils.response_cache import get_response_cache, cache_key
+from utils.single_flight import get_request_coalescer
+from utils.response_pack import get_response_pack
+from utils.simulated_responses import simulate_response
+from utils.llm_scheduler import INTERACTIVE, get_llm_scheduler, estimate_tokens, estimate_request_tokens
 
 class TeacherClient:
     """Client for interacting with AI/LLM services."""
     
-    def __init__(self):
-        """Initialize the TeacherClient."""
-        # For demo purposes, we'll simulate responses
-        # In a real implementation, this would connect to an API
-        self.demo_mode = True
+    def __init__(self, backend=None, lane=INTERACTIVE):
+        """
+        Initialize the TeacherClient.
+
+        Parameters:
+        - backend: LLMBackend to use (defaults to the process-wide backend chosen by PROMPTENG_LLM_BACKEND)
+        - lane: Scheduler priority lane of this client's calls (INTERACTIVE or BULK)
+        """
+        # Every page's client shares one backend and its pooled connections
+        self.backend = backend or get_llm_backend()
+        self.demo_mode = self.backend.name == "demo"
+        self.lane = lane
     
-    def send_prompt(self, prompt_text):
+    def send_prompt(self, prompt_text, session_id=None, on_wait=None):
         """
         Send a prompt to the AI service and get a response.
         
         Args:
             prompt_text (str): The prompt text to send
+            session_id (str): Session to queue the call under (defaults to the current session)
+            on_wait (callable): Called with the queue position while the call waits for its turn
             
         Returns:
             dict: Response from the AI service
         """
-        if self.demo_mode:
-            # Simulate an AI response for demo purposes
-            return self._simulate_response(prompt_text)
-        
-        # In a real implementation, this would call an API
-        # response = requests.post(
-        #     "https://api.example.com/v1/generate",
-        #     json={"prompt": prompt_text},
-        #     headers={"Authorization": "Bearer YOUR_API_KEY"}
-        # )
-        # return response.json()
+        # Course example prompts are answered from the precomputed response pack
+        packed = self._packed_response(prompt_text)
+        if packed is not None:
+            return {"response": packed, "cached": True}
+
+        if not self.backend.cacheable:
+            return {"response": self._complete(prompt_text, session_id, on_wait)}
+
+        # Identical prompts to the same model are answered from the response cache
+        key = cache_key(prompt_text, self.backend.cache_identity())
+        cache = get_response_cache()
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return {"response": cached, "cached": True}
+
+        # ...or share one upstream call with identical requests already in flight
+        def fetch():
+            text = self._complete(prompt_text, session_id, on_wait)
+            if cache is not None:
+                cache.put(key, text)
+            return text
+
+        text, shared = get_request_coalescer().run(key, fetch)
+        return {"response": text, "cached": False, "shared": shared}
+    
+    def stream_prompt(self, prompt_text, session_id=None, on_wait=None):
+        """
+        Send a prompt and yield the response as it is generated.
+
+        The generator can be passed straight to st.write_stream, which shows
+        the text as it arrives and returns the complete response. Packed and
+        cached responses, and those of identical requests already in flight, are
+        yielded in one piece; a response that was streamed to the end is
+        added to the cache.
+
+        Args:
+            prompt_text (str): The prompt text to send
+            session_id (str): Session to queue the call under (defaults to the current session)
+            on_wait (callable): Called with the queue position while the call waits for its turn
+
+        Yields:
+            str: Pieces of the response text
+        """
+        packed = self._packed_response(prompt_text)
+        if packed is not None:
+            yield packed
+            return
+
+        if not self.backend.cacheable:
+            yield from self._stream(prompt_text, session_id, on_wait)
+            return
+
+        key = cache_key(prompt_text, self.backend.cache_identity())
+        cache = get_response_cache()
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        # Wait for an identical request already in flight instead of sending another
+        coalescer = get_request_coalescer()
+        flight, is_leader = coalescer.begin(key)
+        if not is_leader:
+            yield coalescer.wait(flight)
+            return
+
+        chunks = []
+        finished = False
+        try:
+            for chunk in self._stream(prompt_text, session_id, on_wait):
+                chunks.append(chunk)
+                yield chunk
+
+            text = "".join(chunks)
+            if cache is not None:
+                cache.put(key, text)
+            coalescer.finish(key, flight, result=text)
+            finished = True
+        except Exception as e:
+            coalescer.finish(key, flight, error=e)
+            finished = True
+            raise
+        finally:
+            # The page stopped reading before the end
+            if not finished:
+                coalescer.finish(key, flight, error=LLMError("The request was interrupted"))
+    
+    def compare_prompts(self, prompts):
+        """
+        Send several prompt variants at once and yield the responses as they arrive.
+
+        The prompts run concurrently on the shared LLM thread pool, so a
+        comparison takes about as long as its slowest prompt.
+
+        Args:
+            prompts (dict): Prompt text by variant name
+
+        Yields:
+            tuple: (variant, response) in order of completion, where response is
+            the send_prompt result or a dict with an "error" message
+        """
+        # Worker threads have no session state, so queue the calls under this session
+        session_id = self._session_id()
+        executor = get_llm_executor()
+        futures = {
+            executor.submit(self.send_prompt, prompt_text, session_id): variant
+            for variant, prompt_text in prompts.items()
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], {"error": str(e)}
+    
+    def _session_id(self):
+        """Return the ID the scheduler queues this session's calls under."""
+        try:
+            if "llm_session_id" not in st.session_state:
+                st.session_state.llm_session_id = uuid.uuid4().hex
+            return st.session_state.llm_session_id
+        except Exception:
+            # Outside a Streamlit session, e.g. in a worker thread or a command-line tool
+            return "shared"
+    
+    def _complete(self, prompt_text, session_id=None, on_wait=None):
+        """Call the backend for a complete response, after waiting for a turn in the scheduler."""
+        if not self.backend.scheduled:
+            return self.backend.complete(prompt_text)
+
+        with get_llm_scheduler().slot(session_id or self._session_id(), self.lane,
+                                      estimate_request_tokens(prompt_text), on_wait) as ticket:
+            text = self.backend.complete(prompt_text)
+            ticket.used_tokens = estimate_tokens(prompt_text) + estimate_tokens(text)
+        return text
+    
+    def _stream(self, prompt_text, session_id=None, on_wait=None):
+        """Stream from the backend, holding a scheduler slot until the stream ends."""
+        if not self.backend.scheduled:
+            yield from self.backend.stream(prompt_text)
+            return
+
+        with get_llm_scheduler().slot(session_id or self._session_id(), self.lane,
+                                      estimate_request_tokens(prompt_text), on_wait) as ticket:
+            streamed = 0
+            for chunk in self.backend.stream(prompt_text):
+                streamed += len(chunk)
+                yield chunk
+            ticket.used_tokens = estimate_tokens(prompt_text) + max(1, streamed // 4)
+    
+    def _packed_response(self, prompt_text):
+        """Return the response to a prompt from the response pack, or None."""
+        pack = get_response_pack()
+        return pack.get(prompt_text) if pack is not None else None
     
     def _simulate_response(self, prompt_text):
         """Simulate an AI response for demo purposes."""
-        # This is a very simple simulation for demonstration
-        # In a real implementation, this would be replaced with actual API calls
-        
-        if "restaurant" in prompt_text.lower():
-            return {
-                "response": """
-                Here are some highly rated Italian restaurants near Times Square that are family-friendly and open late:
-
-                1. **Carmine's Italian Restaurant**
-                   - Address: 200 W 44th St, New York, NY 10036
-                   - Review: A family-style restaurant with large portions perfect for sharing. Known for their homestyle Italian dishes and lively atmosphere. Open until midnight on weekdays and 1 AM on weekends.
-
-                2. **Tony's Di Napoli**
-                   - Address: 147 W 43rd St, New York, NY 10036
-                   - Review: Another family-style option with generous portions. Their classic Italian dishes are crowd-pleasers, and they're accommodating to families with children. Open until 11 PM most nights.
-
-                3. **Becco**
-                   - Address: 355 W 46th St, New York, NY 10036
-                   - Review: Slightly more upscale but still family-friendly, known for their pasta tasting menu. A short walk from Times Square in the Theater District. Open until 11:30 PM on weekdays and midnight on weekends.
-                """
-            }
-        elif "inception" in prompt_text.lower():
-            return {
-                "response": """
-                Dom Cobb (Leonardo DiCaprio) is a skilled thief who specializes in extracting secrets from people's dreams. He's offered a chance to have his criminal history erased in exchange for planting an idea in someone's mind, a process called "inception." Cobb assembles a team to help him navigate the complex layers of dreams within dreams. The central concept involves entering deeper levels of the subconscious, where time moves more slowly and reality becomes increasingly distorted. As they venture deeper into the target's mind, Cobb struggles with projections of his dead wife and his own guilt. The team must navigate each dream layer and plant the idea while escaping from hostile projections, all while maintaining their grip on what's real and what's a dream.
-                """
-            }
-        elif "water cycle" in prompt_text.lower():
-            return {
-                "response": """
-                The water cycle is how water moves around our Earth. First, the sun heats up water in oceans, lakes, and rivers, turning it into a gas called water vapor. This is called evaporation. The water vapor goes up into the air and cools down, forming clouds. This is called condensation. When the clouds get heavy with water, it falls back down as rain, snow, or hail. This is called precipitation. The water then flows through rivers back to the oceans, or soaks into the ground to become groundwater. Plants also help by releasing water vapor from their leaves. This whole cycle keeps repeating, giving us fresh water to drink and use every day!
-                """
-            }
-        elif "romeo and juliet" in prompt_text.lower():
-            return {
-                "response": """
-                1. How does the feud between the Montagues and Capulets shape Romeo and Juliet's perception of love? Is their love strengthened or compromised by this conflict?
-
-                2. In what ways do both Romeo and Juliet rebel against fate? Are they ultimately successful, or does fate prevail?
-
-                3. Compare the parent-child relationships in the play. How do these family dynamics contribute to the tragic outcome?
-
-                4. How do the characters of Mercutio and the Nurse provide contrasting perspectives on love compared to Romeo and Juliet?
-
-                5. The play begins with a prologue that reveals the ending. How does Shakespeare use dramatic irony throughout the play to create tension around the theme of fate?
-                """
-            }
-        else:
-            return {
-                "response": "I've processed your prompt and here is a thoughtful response based on what you asked. To get more specific responses, try using more detailed prompts with clear tasks, context, and desired formats."
-            }
+        return simulate_response(prompt_text)
@@ -0,0 +1,126 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+def _flush_entries(writer, pending, lock):
+    """Write whatever is still pending. Used when a queue is discarded or the process exits."""
+    with lock:
+        if not pending:
+            return
+        batch = [(kind, key, value) for (kind, key), value in pending.items()]
+        pending.clear()
+    try:
+        writer(batch)
+    except Exception:
+        # Nothing can be reported at this point, so keep shutdown quiet
+        pass
+
+class WriteBehindQueue:
+    """
+    Coalescing write-behind queue for one session's progress.
+
+    Writes are recorded as (kind, key, value) entries. Writing the same kind
+    and key again replaces the pending value, so the updates made during a
+    rerun are sent to the writer as a single batch. The queue is flushed at
+    the end of every rerun, when it reaches its size limit, and as a last
+    resort when it is garbage collected or the process exits. Nothing is
+    held back past the end of a rerun, since a learner may close the tab
+    right after it.
+    """
+
+    def __init__(self, writer, max_pending=256):
+        """
+        Parameters:
+        - writer: Callable that receives a list of (kind, key, value) tuples
+        - max_pending: Number of pending entries that forces an immediate flush
+        """
+        self._writer = writer
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_pending = max(1, max_pending)
+        self.metrics = {
+            "writes": 0,
+            "coalesced": 0,
+            "flushes": 0,
+            "forced_flushes": 0,
+            "entries_flushed": 0,
+            "last_batch_size": 0,
+            "max_batch_size": 0,
+            "last_flush_ms": 0.0,
+            "total_flush_ms": 0.0
+        }
+
+        # Flush-on-session-end: runs when the session state drops the queue or at exit
+        self._finalizer = weakref.finalize(self, _flush_entries, writer, self._pending, self._lock)
+
+    def put(self, kind, key, value):
+        """
+        Queue a write.
+
+        Parameters:
+        - kind: Kind of record (e.g. "completion")
+        - key: Record key within the kind, or None for single records
+        - value: Value to write
+        """
+        with self._lock:
+            self.metrics["writes"] += 1
+            if (kind, key) in self._pending:
+                self.metrics["coalesced"] += 1
+            self._pending[(kind, key)] = value
+            full = len(self._pending) >= self.max_pending
+
+        if full:
+            self.metrics["forced_flushes"] += 1
+            self.flush()
+
+    def is_dirty(self):
+        """Return True if there are writes waiting to be flushed."""
+        return bool(self._pending)
+
+    def pending_count(self):
+        """Return the number of pending entries."""
+        return len(self._pending)
+
+    def flush(self):
+        """
+        Send every pending entry to the writer as one batch.
+
+        Returns:
+        - Number of entries written
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch = [(kind, key, value) for (kind, key), value in self._pending.items()]
+            self._pending.clear()
+
+        started_at = time.perf_counter()
+        try:
+            self._writer(batch)
+        except Exception:
+            # Put the entries back, keeping any newer values written meanwhile
+            with self._lock:
+                for kind, key, value in batch:
+                    self._pending.setdefault((kind, key), value)
+            raise
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+
+        self.metrics["flushes"] += 1
+        self.metrics["entries_flushed"] += len(batch)
+        self.metrics["last_batch_size"] = len(batch)
+        self.metrics["max_batch_size"] = max(self.metrics["max_batch_size"], len(batch))
+        self.metrics["last_flush_ms"] = elapsed_ms
+        self.metrics["total_flush_ms"] += elapsed_ms
+        return len(batch)
+
+    def close(self):
+        """Flush pending writes and detach the session-end finalizer."""
+        self.flush()
+        self._finalizer.detach()
+
+    def discard(self):
+        """Drop pending writes without writing them and detach the session-end finalizer."""
+        with self._lock:
+            self._pending.clear()
+        self._finalizer.detach()